@@ -0,0 +1,94 @@
+
+"""
+Audit log page latency: page 1 versus a deep page, skip/limit versus keyset.
+
+Needs a running MongoDB. Seeds --entries audit log rows (5M by default) into a
+scratch database. Run from the server directory:
+
+    python -m benchmarks.bench_audit_logs --entries 5000000 --page 10000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.api.endpoints.users import AUDIT_LOG_PROJECTION, AUDIT_LOG_SORT
+from src.config import settings
+from src.core.indexes import INDEXES
+from src.core.pagination import keyset_filter
+
+SEED_BATCH = 10000
+PAGE_SIZE = 100
+ACTIONS = ["user_update", "user_ban", "role_change", "password_reset"]
+
+async def seed(db, count: int):
+    existing = await db.audit_logs.estimated_document_count()
+    rng = random.Random(existing)
+    admins = [ObjectId() for _ in range(20)]
+    users = [ObjectId() for _ in range(100000)]
+    origin = datetime.utcnow() - timedelta(days=365)
+    for offset in range(existing, count, SEED_BATCH):
+        batch = min(SEED_BATCH, count - offset)
+        await db.audit_logs.insert_many(
+            [
+                {
+                    "action": rng.choice(ACTIONS),
+                    "user_id": rng.choice(users),
+                    "admin_id": rng.choice(admins),
+                    "timestamp": origin + timedelta(seconds=rng.randrange(365 * 86400)),
+                    "details": {"is_active": False},
+                }
+                for _ in range(batch)
+            ],
+            ordered=False,
+        )
+        print(f"seeded {offset + batch}/{count}", end="\r", flush=True)
+    print()
+
+async def timed(make_cursor, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await make_cursor().to_list(PAGE_SIZE)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+async def run(args):
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client[args.db_name]
+    await db.audit_logs.create_indexes(INDEXES["audit_logs"])
+    await seed(db, args.entries)
+
+    skip = (args.page - 1) * PAGE_SIZE
+    # Boundary document of the deep page, found once outside the timed section
+    boundary = await db.audit_logs.find({}, {"timestamp": 1}).sort(AUDIT_LOG_SORT).skip(skip - 1).limit(1).to_list(1)
+    after = [boundary[0]["timestamp"], boundary[0]["_id"]]
+
+    def skip_page(n):
+        return lambda: db.audit_logs.find({}, AUDIT_LOG_PROJECTION).sort("timestamp", -1).skip(n).limit(PAGE_SIZE)
+
+    def keyset_page(query):
+        return lambda: db.audit_logs.find(query, AUDIT_LOG_PROJECTION).sort(AUDIT_LOG_SORT).limit(PAGE_SIZE)
+
+    print(f"skip/limit page 1:          {await timed(skip_page(0), args.repeats):8.2f}ms")
+    print(f"skip/limit page {args.page}:    {await timed(skip_page(skip), args.repeats):8.2f}ms")
+    print(f"keyset     page 1:          {await timed(keyset_page({}), args.repeats):8.2f}ms")
+    print(f"keyset     page {args.page}:    {await timed(keyset_page(keyset_filter(AUDIT_LOG_SORT, after)), args.repeats):8.2f}ms")
+    client.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongodb-url", default=settings.MONGODB_URL)
+    parser.add_argument("--db-name", default="bechdo_bench")
+    parser.add_argument("--entries", type=int, default=5_000_000)
+    parser.add_argument("--page", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Banning --users accounts: one audit insert, update and read-back per user (the
+per-user PATCH path) versus the bulk endpoint's insert_many plus bulk_write.
+
+Needs a running MongoDB. Seeds the users into a scratch database. Run from the
+server directory:
+
+    python -m benchmarks.bench_bulk_update --users 10000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.api.endpoints.users import _apply_bulk_batch
+from src.config import settings
+
+async def seed(db, count: int):
+    await db.users.delete_many({})
+    result = await db.users.insert_many(
+        [
+            {"email": f"user{i}@example.com", "username": f"user_{i}", "is_active": True}
+            for i in range(count)
+        ],
+        ordered=False,
+    )
+    return result.inserted_ids
+
+async def per_user(db, admin_id, user_ids):
+    for user_id in user_ids:
+        now = datetime.utcnow()
+        await db.audit_logs.insert_one({
+            "action": "user_update", "user_id": user_id, "admin_id": admin_id,
+            "timestamp": now, "details": {"is_active": False},
+        })
+        await db.users.update_one({"_id": user_id}, {"$set": {"is_active": False, "updated_at": now}})
+        await db.users.find_one({"_id": user_id})
+
+async def bulk(db, admin_id, user_ids):
+    for start in range(0, len(user_ids), settings.USER_BULK_BATCH_SIZE):
+        batch = user_ids[start:start + settings.USER_BULK_BATCH_SIZE]
+        await _apply_bulk_batch(db, admin_id, [(user_id, {"is_active": False}) for user_id in batch])
+
+async def run(args):
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client[args.db_name]
+    admin_id = ObjectId()
+
+    for label, apply in (("per-user", per_user), ("bulk", bulk)):
+        user_ids = await seed(db, args.users)
+        start = time.perf_counter()
+        await apply(db, admin_id, user_ids)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<9} {elapsed:8.2f}s {args.users / elapsed:10.0f} users/s")
+    client.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongodb-url", default=settings.MONGODB_URL)
+    parser.add_argument("--db-name", default="bechdo_bench")
+    parser.add_argument("--users", type=int, default=10_000)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Disk used by uuid-named local uploads versus the content-addressed blob store
+on a synthetic seller photo corpus.
+
+--photos distinct product photos (100-800 KiB) are uploaded --uploads times in
+total. Re-uploads follow a Zipf distribution, the way a few listings are
+re-posted and edited far more often than the rest. Blob refcounts are kept in
+memory rather than MongoDB. Run from the server directory:
+
+    python -m benchmarks.bench_dedup_storage --photos 500 --uploads 5000
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import tempfile
+import time
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from src.config import settings
+from src.core.blob_store import BLOBS_DIR, save_blob
+from src.core.uploads import save_upload
+
+ZIPF_EXPONENT = 1.1
+JPEG_HEADER = b"\xff\xd8\xff\xe0"
+
+class UpsertResult:
+    def __init__(self, upserted_id):
+        self.upserted_id = upserted_id
+
+class MemoryBlobs:
+    """The part of the file_blobs collection save_blob uses: an upserting refcount"""
+
+    def __init__(self):
+        self.refcounts = {}
+
+    async def update_one(self, query, update, upsert=False):
+        digest = query["_id"]
+        created = digest not in self.refcounts
+        self.refcounts[digest] = self.refcounts.get(digest, 0) + update["$inc"]["refcount"]
+        return UpsertResult(digest if created else None)
+
+class MemoryDB:
+    def __init__(self):
+        self.file_blobs = MemoryBlobs()
+
+def make_upload(photo: bytes) -> UploadFile:
+    return UploadFile(
+        file=io.BytesIO(photo),
+        filename="photo.jpg",
+        headers=Headers({"content-type": "image/jpeg"}),
+    )
+
+def disk_usage(directory: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(directory)
+        for name in names
+    )
+
+async def run(args, root: str):
+    rng = random.Random(42)
+    photos = [JPEG_HEADER + rng.randbytes(rng.randint(100, 800) * 1024) for _ in range(args.photos)]
+    weights = [1 / (rank ** ZIPF_EXPONENT) for rank in range(1, args.photos + 1)]
+    # Every photo is uploaded at least once, the rest are re-uploads
+    corpus = photos + rng.choices(photos, weights=weights, k=args.uploads - args.photos)
+
+    settings.LOCAL_STORAGE_PATH = root
+    start = time.perf_counter()
+    for i, photo in enumerate(corpus):
+        await save_upload(make_upload(photo), os.path.join(root, "uploads", f"{i}.jpg"))
+    plain_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    created = 0
+    db = MemoryDB()
+    for photo in corpus:
+        created += (await save_blob(db, make_upload(photo)))["created"]
+    blob_elapsed = time.perf_counter() - start
+
+    plain = disk_usage(os.path.join(root, "uploads"))
+    stored = disk_usage(os.path.join(root, BLOBS_DIR))
+    print(f"uploads:      {len(corpus)} ({args.photos} distinct, {created} blobs written)")
+    print(f"uuid files:   {plain / (1024 * 1024):10.1f} MiB  {len(corpus) / plain_elapsed:8.0f} uploads/s")
+    print(f"blob store:   {stored / (1024 * 1024):10.1f} MiB  {len(corpus) / blob_elapsed:8.0f} uploads/s")
+    print(f"saved:        {(plain - stored) / (1024 * 1024):10.1f} MiB ({1 - stored / plain:.1%})")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--photos", type=int, default=500)
+    parser.add_argument("--uploads", type=int, default=5000)
+    parser.add_argument("--dir", default=None, help="scratch directory on the disk under test")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(dir=args.dir) as root:
+        asyncio.run(run(args, root))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Hot image throughput on /storage/files: the old os.path.exists + FileResponse
+handler versus the indexed serving layer, for full downloads and for browser
+revalidations (If-None-Match), in-process over ASGI. Run from the server directory:
+
+    python -m benchmarks.bench_file_serving --size 204800 --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from src.core.file_serving import build_file_meta, file_index, file_response, is_current
+
+IMAGE_NAME = "0b8e7c1e-6f1a-4c8e-9a51-2f8e0b1c3d4e.jpg"
+CONCURRENCY = 32
+
+def make_app(root: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/old/{name}")
+    async def old_get_file(name: str):
+        file_path = os.path.join(root, name)
+        if not os.path.exists(file_path):
+            raise HTTPException(status_code=404, detail="File not found")
+        return FileResponse(file_path)
+
+    @app.get("/new/{name}")
+    async def new_get_file(name: str, request: Request):
+        meta = file_index.get(name)
+        if meta is not None and not await is_current(meta):
+            meta = None
+        if meta is None:
+            meta = await build_file_meta(name, os.path.join(root, name))
+            file_index.set(name, meta)
+        return await file_response(request, meta)
+
+    return app
+
+async def measure(client: httpx.AsyncClient, url: str, headers: dict, requests: int) -> tuple:
+    remaining = requests
+    transferred = 0
+
+    async def worker():
+        nonlocal remaining, transferred
+        while remaining > 0:
+            remaining -= 1
+            response = await client.get(url, headers=headers)
+            transferred += len(response.content)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return requests / (time.perf_counter() - start), transferred / requests
+
+async def run(args, root: str):
+    with open(os.path.join(root, IMAGE_NAME), "wb") as f:
+        f.write(b"\xff\xd8\xff\xe0" + os.urandom(args.size - 4))
+
+    transport = httpx.ASGITransport(app=make_app(root))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        etag = (await client.get(f"/new/{IMAGE_NAME}")).headers["etag"]
+        for label, url, headers in (
+            ("old full", f"/old/{IMAGE_NAME}", {}),
+            ("new full", f"/new/{IMAGE_NAME}", {}),
+            ("new 304", f"/new/{IMAGE_NAME}", {"If-None-Match": etag}),
+        ):
+            rate, size = await measure(client, url, headers, args.requests)
+            print(f"{label:<9} {rate:8.0f} req/s {size:10.0f} bytes/response")
+    print(f"file index stats: {file_index.stats()}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=200 * 1024)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as root:
+        asyncio.run(run(args, root))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+
+"""
+Login user lookup latency: $or over email/username versus one login_keys lookup.
+
+Needs a running MongoDB. Seeds --users documents (1M by default) into a
+scratch database. Run from the server directory:
+
+    python -m benchmarks.bench_login_lookup --users 1000000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.config import settings
+from src.core.indexes import INDEXES
+from src.models.user import build_login_keys, normalize_login_key
+
+SEED_BATCH = 10000
+
+async def seed(db, count: int):
+    existing = await db.users.estimated_document_count()
+    for offset in range(existing, count, SEED_BATCH):
+        batch = min(SEED_BATCH, count - offset)
+        await db.users.insert_many(
+            [
+                {
+                    "email": f"user{i}@example.com",
+                    "username": f"user_{i}",
+                    "login_keys": build_login_keys(f"user{i}@example.com", f"user_{i}"),
+                    "hashed_password": "x",
+                    "is_active": True,
+                }
+                for i in range(offset, offset + batch)
+            ],
+            ordered=False,
+        )
+        print(f"seeded {offset + batch}/{count}", end="\r", flush=True)
+    print()
+
+async def measure(db, make_query, identifiers) -> tuple:
+    samples = []
+    for identifier in identifiers:
+        start = time.perf_counter()
+        await db.users.find_one(make_query(identifier))
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+async def run(args):
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client[args.db_name]
+    await db.users.create_indexes(INDEXES["users"])
+    await seed(db, args.users)
+
+    rng = random.Random(7)
+    identifiers = [
+        f"user{i}@example.com" if i % 2 else f"user_{i}"
+        for i in (rng.randrange(args.users) for _ in range(args.lookups))
+    ]
+
+    legacy = lambda identifier: {"$or": [{"email": identifier}, {"username": identifier}]}
+    keyed = lambda identifier: {"login_keys": normalize_login_key(identifier)}
+
+    for label, make_query in (("$or email/username", legacy), ("login_keys", keyed)):
+        p50, p99 = await measure(db, make_query, identifiers)
+        print(f"{label:<20} p50={p50:6.3f}ms p99={p99:6.3f}ms")
+    client.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongodb-url", default=settings.MONGODB_URL)
+    parser.add_argument("--db-name", default="bechdo_bench")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+
+"""
+Throughput and pool checkout wait under concurrent load, per pool size.
+
+Needs a running MongoDB. Issues _id lookups from --concurrency coroutines,
+the access pattern of get_current_user and read_user_profile, and reports
+requests/s next to the mean and max time spent waiting for a connection.
+When the pool stops being the bottleneck, throughput flattens and checkout
+wait drops to ~0. Run from the server directory:
+
+    python -m benchmarks.bench_mongo_pool --concurrency 200 --pool-sizes 10 50 100 200
+"""
+import argparse
+import asyncio
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.config import settings
+from src.core.mongo import PoolMetrics
+
+async def run_once(args, pool_size: int):
+    metrics = PoolMetrics()
+    client = AsyncIOMotorClient(args.mongodb_url, maxPoolSize=pool_size, event_listeners=[metrics])
+    collection = client[args.db_name].pool_bench
+    await collection.delete_many({})
+    ids = (await collection.insert_many([{"n": i} for i in range(1000)])).inserted_ids
+
+    per_worker = args.requests // args.concurrency
+
+    async def worker(offset: int):
+        for i in range(per_worker):
+            await collection.find_one({"_id": ids[(offset + i) % len(ids)]})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    wait = metrics.stats()["checkout_wait"]
+    print(
+        f"pool={pool_size:<4} {per_worker * args.concurrency / elapsed:8.0f} req/s  "
+        f"checkout wait mean={wait['mean_ms']:6.2f}ms max={wait['max_ms']:7.2f}ms"
+    )
+    client.close()
+
+async def run(args):
+    for pool_size in args.pool_sizes:
+        await run_once(args, pool_size)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongodb-url", default=settings.MONGODB_URL)
+    parser.add_argument("--db-name", default="bechdo_bench")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[10, 50, 100, 200])
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Presigned upload URL throughput: a fresh boto3 client per URL (the old
+get_s3_client) versus the process-wide client, plus how long the event loop
+is held for a 20-file batch signed inline versus in one worker thread hop.
+
+Signing is local, so no bucket or network is needed; dummy credentials are
+used when none are configured. Run from the server directory:
+
+    python -m benchmarks.bench_presign
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import boto3
+from botocore.client import Config
+
+from src.config import settings
+from src.core import s3
+
+def fresh_client():
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        config=Config(signature_version='s3v4')
+    )
+
+def sign(client, i: int) -> str:
+    return client.generate_presigned_url(
+        'put_object',
+        Params={'Bucket': settings.S3_BUCKET_NAME, 'Key': f"uploads/bench/{i}.jpg", 'ContentType': 'image/jpeg'},
+        ExpiresIn=settings.S3_PRESIGN_EXPIRES_SECONDS
+    )
+
+def throughput(label: str, n: int, client_for) -> None:
+    start = time.perf_counter()
+    for i in range(n):
+        sign(client_for(), i)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {n / elapsed:>10.0f} URLs/s")
+
+async def loop_blocked(batch) -> float:
+    """Longest gap between 1ms ticks of a probe task while batch() runs"""
+    worst = 0.0
+    done = asyncio.Event()
+    
+    async def probe():
+        nonlocal worst
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst = max(worst, now - last)
+            last = now
+    
+    task = asyncio.create_task(probe())
+    await asyncio.sleep(0.005)
+    await batch()
+    done.set()
+    await task
+    return worst
+
+async def loop_report(batch_size: int) -> None:
+    files = [{"file_path": f"uploads/bench/{i}.jpg", "content_type": "image/jpeg"} for i in range(batch_size)]
+    
+    async def inline():
+        s3.generate_presigned_urls(files, settings.S3_PRESIGN_EXPIRES_SECONDS)
+    
+    async def offloaded():
+        await s3.generate_presigned_urls_async(files, settings.S3_PRESIGN_EXPIRES_SECONDS)
+    
+    for label, batch in (("inline batch", inline), ("to_thread batch", offloaded)):
+        worst = await loop_blocked(batch)
+        print(f"{label:<28} longest loop stall {worst * 1000:>7.2f} ms ({batch_size} URLs)")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=settings.S3_PRESIGN_BATCH_MAX)
+    args = parser.parse_args()
+    
+    settings.STORAGE_MODE = "s3"
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    
+    throughput("new client per URL", args.urls, fresh_client)
+    throughput("process-wide client", args.urls, s3.get_s3_client)
+    asyncio.run(loop_report(args.batch))
+
+if __name__ == "__main__":
+    main()
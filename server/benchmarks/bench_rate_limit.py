@@ -0,0 +1,64 @@
+
+"""
+Rate limit backend throughput and memory per tracked key.
+
+The Redis backend runs against fakeredis unless --redis-url points at a real
+server; only a real server gives meaningful ops/s and MEMORY USAGE numbers.
+Run from the server directory:
+
+    python -m benchmarks.bench_rate_limit [--redis-url redis://localhost:6379/15]
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from src.core.rate_limit import MemoryRateLimitBackend, RedisRateLimitBackend
+
+KEYS = 100000
+OPS = 200000
+
+async def throughput(backend, keys: int, ops: int) -> float:
+    start = time.perf_counter()
+    for i in range(ops):
+        await backend.hit(f"login:key-{i % keys}", 5, 60)
+    return ops / (time.perf_counter() - start)
+
+async def bench_memory():
+    backend = MemoryRateLimitBackend(max_keys=KEYS, sweep_interval=60)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(KEYS):
+        await backend.hit(f"login:key-{i}", 5, 60)
+    per_key = (tracemalloc.get_traced_memory()[0] - before) / KEYS
+    tracemalloc.stop()
+
+    ops = await throughput(MemoryRateLimitBackend(max_keys=KEYS, sweep_interval=60), KEYS, OPS)
+    print(f"memory  {ops:10.0f} ops/s  {per_key:6.0f} bytes/key")
+
+async def bench_redis(url):
+    if url:
+        backend = RedisRateLimitBackend(url)
+    else:
+        import fakeredis
+
+        backend = RedisRateLimitBackend("redis://fake", client=fakeredis.FakeAsyncRedis())
+    await backend.start()
+
+    ops_count = OPS // 10
+    ops = await throughput(backend, KEYS, ops_count)
+    per_key = "n/a"
+    if url:
+        per_key = f"{await backend._redis.memory_usage('ratelimit:login:key-1'):6d}"
+    print(f"redis   {ops:10.0f} ops/s  {per_key} bytes/key ({'server' if url else 'fakeredis'})")
+    await backend.stop()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url")
+    args = parser.parse_args()
+    asyncio.run(bench_memory())
+    asyncio.run(bench_redis(args.redis_url))
+
+if __name__ == "__main__":
+    main()
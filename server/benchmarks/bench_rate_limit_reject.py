@@ -0,0 +1,80 @@
+
+"""
+CPU cost of a rejected /auth/login request.
+
+"decorator" reproduces the old @rate_limited() placement, where FastAPI parses
+the form body and resolves get_db before the limit is checked. "middleware"
+is RateLimitMiddleware, which rejects before routing. Run from the server directory:
+
+    python -m benchmarks.bench_rate_limit_reject
+"""
+import asyncio
+import time
+from functools import wraps
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.security import OAuth2PasswordRequestForm
+
+from src.core.rate_limit import MemoryRateLimitBackend, RateLimitMiddleware, RateLimitPolicy
+from src.dependencies import get_db
+
+REQUESTS = 3000
+LIMIT = 5
+FORM = {"username": "someone@example.com", "password": "x" * 64, "grant_type": "password"}
+
+def legacy_rate_limited(backend):
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = kwargs["request"]
+            allowed, _ = await backend.hit(f"login:{request.client.host}", LIMIT, 60)
+            if not allowed:
+                raise HTTPException(status_code=429, detail="Rate limit exceeded")
+            return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def build_app(use_middleware: bool) -> FastAPI:
+    app = FastAPI()
+    app.mongodb = None
+    backend = MemoryRateLimitBackend(max_keys=1000, sweep_interval=60)
+
+    async def login(
+        form_data: OAuth2PasswordRequestForm = Depends(),
+        request: Request = None,
+        db = Depends(get_db)
+    ):
+        return {"ok": True}
+
+    if use_middleware:
+        app.add_middleware(
+            RateLimitMiddleware,
+            policies={("POST", "/auth/login"): [RateLimitPolicy("login", "ip", LIMIT, 60)]},
+            backend=backend,
+        )
+    else:
+        login = legacy_rate_limited(backend)(login)
+
+    app.post("/auth/login")(login)
+    return app
+
+async def run(use_middleware: bool) -> float:
+    transport = httpx.ASGITransport(app=build_app(use_middleware))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(LIMIT):
+            await client.post("/auth/login", data=FORM)
+
+        start = time.process_time()
+        for _ in range(REQUESTS):
+            response = await client.post("/auth/login", data=FORM)
+            assert response.status_code == 429
+        return (time.process_time() - start) / REQUESTS
+
+def main():
+    for label, use_middleware in (("decorator", False), ("middleware", True)):
+        cpu = asyncio.run(run(use_middleware))
+        print(f"{label:<11} {cpu * 1e6:8.1f}us CPU per rejected request (incl. in-process client)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+
+"""
+/auth/refresh rotation throughput against a large refresh_tokens collection.
+
+Needs a running MongoDB. Seeds a scratch database with --tokens rows (10M by
+default, which takes a while and a few GB of disk) and then rotates tokens
+from --concurrency concurrent clients. Run from the server directory:
+
+    python -m benchmarks.bench_refresh_tokens --tokens 10000000
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.config import settings
+from src.core import refresh_tokens
+from src.core.indexes import INDEXES
+
+SEED_BATCH = 10000
+
+async def seed(db, count: int):
+    existing = await db.refresh_tokens.estimated_document_count()
+    expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    for offset in range(existing, count, SEED_BATCH):
+        batch = min(SEED_BATCH, count - offset)
+        await db.refresh_tokens.insert_many(
+            [
+                {
+                    "user_id": ObjectId(),
+                    "token_hash": os.urandom(32),
+                    "expires_at": expires_at,
+                    "created_at": datetime.utcnow(),
+                }
+                for _ in range(batch)
+            ],
+            ordered=False,
+        )
+        print(f"seeded {offset + batch}/{count}", end="\r", flush=True)
+    print()
+
+async def run(args):
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client[args.db_name]
+    await db.refresh_tokens.create_indexes(INDEXES["refresh_tokens"])
+    await seed(db, args.tokens)
+
+    # Each client owns a chain of tokens it keeps rotating, like a real session
+    run_id = uuid.uuid4().hex
+    chains = [f"{run_id}-{i}-0" for i in range(args.concurrency)]
+    for token in chains:
+        await refresh_tokens.store_token(db, ObjectId(), token)
+
+    per_client = args.rotations // args.concurrency
+
+    async def rotate_chain(index: int):
+        token = chains[index]
+        for step in range(1, per_client + 1):
+            new_token = f"{run_id}-{index}-{step}"
+            assert await refresh_tokens.rotate_token(db, token, new_token)
+            token = new_token
+
+    start = time.perf_counter()
+    await asyncio.gather(*(rotate_chain(i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    total = per_client * args.concurrency
+    stored = await db.refresh_tokens.estimated_document_count()
+    print(f"{total} rotations over {stored} stored tokens in {elapsed:.2f}s: {total / elapsed:.0f} rotations/s")
+    client.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongodb-url", default=settings.MONGODB_URL)
+    parser.add_argument("--db-name", default="bechdo_bench")
+    parser.add_argument("--tokens", type=int, default=10_000_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rotations", type=int, default=20000)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Latency of /storage/files redirects in S3 mode, in-process over ASGI: signing
+a fresh presigned GET URL on every request versus the per-key URL cache, for
+a hot set of keys. Signing is local, so no bucket or network is needed; dummy
+credentials are used when none are configured. Run from the server directory:
+
+    python -m benchmarks.bench_s3_redirect --keys 100 --requests 5000 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import RedirectResponse
+
+from src.api.endpoints import storage
+from src.config import settings
+from src.core import s3
+from src.dependencies import get_db
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(storage.router, prefix="/storage")
+    app.dependency_overrides[get_db] = lambda: None
+
+    @app.get("/uncached/{path:path}")
+    async def uncached(path: str):
+        url = await asyncio.to_thread(s3._sign_download, path, settings.S3_DOWNLOAD_URL_EXPIRES_SECONDS)
+        return RedirectResponse(url, status_code=302)
+
+    return app
+
+async def measure(client: httpx.AsyncClient, prefix: str, keys: list, requests: int, concurrency: int) -> list:
+    remaining = requests
+    latencies = []
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await client.get(f"{prefix}/{random.choice(keys)}")
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 302
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+async def run(args):
+    keys = [f"uploads/bench/{i}.jpg" for i in range(args.keys)]
+    transport = httpx.ASGITransport(app=make_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, prefix in (("sign per request", "/uncached"), ("cached URL", "/storage/files")):
+            latencies = sorted(await measure(client, prefix, keys, args.requests, args.concurrency))
+            p99 = latencies[int(len(latencies) * 0.99) - 1]
+            print(
+                f"{label:<17} p50 {statistics.median(latencies) * 1000:7.2f} ms"
+                f"  p99 {p99 * 1000:7.2f} ms"
+            )
+    print(f"download URL cache stats: {s3.download_url_cache.stats()}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+
+    settings.STORAGE_MODE = "s3"
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Server-side S3 upload throughput for 1MB, 100MB and 2GB files, sequential
+parts versus the concurrent multipart window.
+
+By default parts go to an in-process S3 stand-in that models each request
+as --latency-ms plus the part size over a --link-mbps connection, so the
+numbers show the effect of the window rather than of a network. Pass
+--real to upload to S3_BUCKET_NAME with the configured credentials (the
+objects are deleted afterwards). Run from the server directory:
+
+    python -m benchmarks.bench_s3_upload
+    python -m benchmarks.bench_s3_upload --real --sizes 1048576 104857600
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from src.config import settings
+from src.core.s3 import get_s3_client, upload_to_s3
+
+SIZES = [1024 * 1024, 100 * 1024 * 1024, 2 * 1024 * 1024 * 1024]
+
+class SyntheticFile:
+    """Readable file of a given size that never holds more than one read in memory"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.position = 0
+
+    def read(self, n: int = -1) -> bytes:
+        remaining = self.size - self.position
+        n = remaining if n < 0 else min(n, remaining)
+        head = b"%PDF-" if self.position == 0 else b""
+        self.position += n
+        return (head + bytes(n))[:n]
+
+class SimulatedS3Client:
+    """Accepts uploads without storing them, taking as long as a link of the given speed would"""
+
+    def __init__(self, latency: float, bytes_per_second: float):
+        self.latency = latency
+        self.bytes_per_second = bytes_per_second
+
+    def _transfer(self, size: int):
+        time.sleep(self.latency + size / self.bytes_per_second)
+
+    def put_object(self, Body, **kwargs):
+        self._transfer(len(Body))
+
+    def create_multipart_upload(self, **kwargs):
+        self._transfer(0)
+        return {"UploadId": uuid.uuid4().hex}
+
+    def upload_part(self, Body, PartNumber, **kwargs):
+        self._transfer(len(Body))
+        return {"ETag": f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, **kwargs):
+        self._transfer(0)
+
+    def abort_multipart_upload(self, **kwargs):
+        self._transfer(0)
+
+async def run(args):
+    if args.real:
+        client = get_s3_client()
+        if client is None:
+            raise SystemExit("--real needs STORAGE_MODE=s3")
+    else:
+        client = SimulatedS3Client(args.latency_ms / 1000, args.link_mbps * 1024 * 1024 / 8)
+
+    for size in args.sizes:
+        for concurrency in (1, settings.S3_MULTIPART_CONCURRENCY):
+            key = f"bench/{uuid.uuid4()}.pdf"
+            upload = UploadFile(
+                file=SyntheticFile(size),
+                filename="bench.pdf",
+                headers=Headers({"content-type": "application/pdf"}),
+            )
+            start = time.perf_counter()
+            await upload_to_s3(upload, key, client=client, max_bytes=size, concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+            if args.real:
+                client.delete_object(Bucket=settings.S3_BUCKET_NAME, Key=key)
+            print(f"{size / (1024 * 1024):8.0f} MiB  concurrency {concurrency}  {size / elapsed / (1024 * 1024):8.1f} MiB/s  {elapsed:7.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--real", action="store_true", help="upload to the configured S3 bucket")
+    parser.add_argument("--latency-ms", type=float, default=30)
+    parser.add_argument("--link-mbps", type=float, default=200, help="bandwidth of one S3 connection")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
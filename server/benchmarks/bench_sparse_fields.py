@@ -0,0 +1,78 @@
+"""
+Admin user listing page: full documents versus fields=id,username,profile_picture_url.
+Reports response bytes and median latency for Mongo fetch plus serialization.
+
+Needs a running MongoDB. Seeds --users documents (100k by default) into a
+scratch database. Run from the server directory:
+
+    python -m benchmarks.bench_sparse_fields --users 100000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.api.endpoints.users import USER_LIST_SORT
+from src.config import settings
+from src.models.user import build_login_keys, build_search_tokens, user_serializer
+
+SEED_BATCH = 10000
+PAGE_SIZE = 100
+SPARSE_FIELDS = ["id", "username", "profile_picture_url"]
+
+async def seed(db, count: int):
+    existing = await db.users.estimated_document_count()
+    now = datetime.utcnow()
+    for offset in range(existing, count, SEED_BATCH):
+        batch = min(SEED_BATCH, count - offset)
+        users = []
+        for i in range(offset, offset + batch):
+            email, username, full_name = f"user{i}@example.com", f"user_{i}", f"User Number {i}"
+            users.append({
+                "email": email,
+                "username": username,
+                "full_name": full_name,
+                "login_keys": build_login_keys(email, username),
+                "search_tokens": build_search_tokens(username, full_name),
+                "hashed_password": "$argon2id$" + "x" * 87,
+                "role": "seller",
+                "is_active": True,
+                "is_verified": True,
+                "phone": "+15550100",
+                "profile_picture_url": f"https://cdn.example.com/avatars/{i}.jpg",
+                "location": {"city": "Berlin", "country": "DE", "coordinates": [13.4, 52.5]},
+                "created_at": now,
+                "updated_at": now,
+            })
+        await db.users.insert_many(users, ordered=False)
+        print(f"seeded {offset + batch}/{count}", end="\r", flush=True)
+    print()
+
+async def run(args):
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client[args.db_name]
+    await seed(db, args.users)
+
+    for label, serializer in (("full", user_serializer), ("sparse", user_serializer.partial(SPARSE_FIELDS))):
+        samples = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            users = await db.users.find({}, serializer.projection).sort(USER_LIST_SORT).limit(PAGE_SIZE).to_list(PAGE_SIZE)
+            body = serializer.dump_many(users)
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"{label:<7} {len(body):8d} bytes/page {statistics.median(samples):8.2f}ms/page")
+    client.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongodb-url", default=settings.MONGODB_URL)
+    parser.add_argument("--db-name", default="bechdo_bench")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
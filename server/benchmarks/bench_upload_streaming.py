@@ -0,0 +1,87 @@
+"""
+Event loop responsiveness while large local uploads are written.
+
+Runs --uploads concurrent uploads of --size bytes each through the old
+inline shutil.copyfileobj path and through save_upload, while a probe stands
+in for small requests: it wakes every 5ms and records how late it was
+scheduled. Run from the server directory:
+
+    python -m benchmarks.bench_upload_streaming --size 1073741824 --uploads 2
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from src.core.uploads import save_upload
+
+PROBE_INTERVAL = 0.005
+
+def make_source(directory: str, size: int) -> str:
+    path = os.path.join(directory, "source.bin")
+    block = b"%PDF-" + os.urandom(1024 * 1024 - 5)
+    with open(path, "wb") as f:
+        for _ in range(size // len(block)):
+            f.write(block)
+    return path
+
+def open_upload(path: str) -> UploadFile:
+    return UploadFile(
+        file=open(path, "rb"),
+        filename="large.pdf",
+        headers=Headers({"content-type": "application/pdf"}),
+    )
+
+async def copy_inline(upload: UploadFile, destination: str):
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    with open(destination, "wb") as f:
+        shutil.copyfileobj(upload.file, f)
+
+async def stream(upload: UploadFile, destination: str):
+    await save_upload(upload, destination, max_bytes=upload.size or 1 << 40)
+
+async def probe(delays: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        delays.append((time.perf_counter() - start - PROBE_INTERVAL) * 1000)
+
+async def run(args, directory: str, source: str):
+    for label, write in (("inline copy", copy_inline), ("save_upload", stream)):
+        delays = []
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(delays, stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            write(open_upload(source), os.path.join(directory, label.replace(" ", "_"), f"{i}.pdf"))
+            for i in range(args.uploads)
+        ))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe_task
+        shutil.rmtree(os.path.join(directory, label.replace(" ", "_")))
+        delays.sort()
+        throughput = args.uploads * args.size / elapsed / (1024 * 1024)
+        print(
+            f"{label:<12} {throughput:8.1f}MiB/s  probe delay p50 {statistics.median(delays):7.2f}ms "
+            f"p99 {delays[int(len(delays) * 0.99)]:8.2f}ms max {delays[-1]:8.2f}ms ({len(delays)} probes)"
+        )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1 << 30)
+    parser.add_argument("--uploads", type=int, default=2)
+    parser.add_argument("--dir", default=None, help="scratch directory on the disk under test")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        source = make_source(directory, args.size)
+        asyncio.run(run(args, directory, source))
+
+if __name__ == "__main__":
+    main()
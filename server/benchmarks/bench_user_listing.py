@@ -0,0 +1,102 @@
+"""
+Admin user listing latency: page 1 versus a deep page, skip/limit with whole
+documents versus keyset on _id with the listing projection, for each filter.
+
+Needs a running MongoDB. Seeds --users documents (2M by default) into a
+scratch database. Run from the server directory:
+
+    python -m benchmarks.bench_user_listing --users 2000000 --page 10000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.api.endpoints.users import USER_LIST_SORT
+from src.config import settings
+from src.core.indexes import INDEXES
+from src.core.pagination import keyset_filter
+from src.models.user import UserRole, user_serializer
+
+SEED_BATCH = 10000
+PAGE_SIZE = 100
+FILTERS = {
+    "none": {},
+    "role": {"role": UserRole.SELLER.value},
+    "role+is_active": {"role": UserRole.SELLER.value, "is_active": True},
+}
+
+async def seed(db, count: int):
+    existing = await db.users.estimated_document_count()
+    rng = random.Random(existing)
+    roles = [role.value for role in UserRole]
+    for offset in range(existing, count, SEED_BATCH):
+        batch = min(SEED_BATCH, count - offset)
+        await db.users.insert_many(
+            [
+                {
+                    "email": f"user{i}@example.com",
+                    "username": f"user_{i}",
+                    "full_name": f"User {i}",
+                    "role": rng.choice(roles),
+                    "is_active": rng.random() < 0.9,
+                    "is_verified": True,
+                    "hashed_password": "$argon2id$" + "x" * 87,
+                }
+                for i in range(offset, offset + batch)
+            ],
+            ordered=False,
+        )
+        print(f"seeded {offset + batch}/{count}", end="\r", flush=True)
+    print()
+
+async def timed(make_cursor, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await make_cursor().to_list(PAGE_SIZE)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+async def run(args):
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client[args.db_name]
+    await db.users.create_indexes(INDEXES["users"])
+    await seed(db, args.users)
+
+    skip = (args.page - 1) * PAGE_SIZE
+    for label, query in FILTERS.items():
+        # Boundary document of the deep page, found once outside the timed section
+        boundary = await db.users.find(query, {"_id": 1}).sort(USER_LIST_SORT).skip(skip - 1).limit(1).to_list(1)
+        if not boundary:
+            print(f"{label}: fewer than {skip} matching users, skipped")
+            continue
+        deep_query = {**query, **keyset_filter(USER_LIST_SORT, [boundary[0]["_id"]])}
+
+        def skip_page(n):
+            return lambda: db.users.find(query).skip(n).limit(PAGE_SIZE)
+
+        def keyset_page(q):
+            return lambda: db.users.find(q, user_serializer.projection).sort(USER_LIST_SORT).limit(PAGE_SIZE)
+
+        print(f"[{label}]")
+        print(f"  skip/limit page 1:       {await timed(skip_page(0), args.repeats):8.2f}ms")
+        print(f"  skip/limit page {args.page}: {await timed(skip_page(skip), args.repeats):8.2f}ms")
+        print(f"  keyset     page 1:       {await timed(keyset_page(query), args.repeats):8.2f}ms")
+        print(f"  keyset     page {args.page}: {await timed(keyset_page(deep_query), args.repeats):8.2f}ms")
+    client.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongodb-url", default=settings.MONGODB_URL)
+    parser.add_argument("--db-name", default="bechdo_bench")
+    parser.add_argument("--users", type=int, default=2_000_000)
+    parser.add_argument("--page", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
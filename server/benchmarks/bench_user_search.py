@@ -0,0 +1,96 @@
+"""
+Typeahead search latency (p50/p99) on the search_tokens index, uncached, plus
+the hot-prefix cache hit ratio for a Zipf-distributed prefix workload.
+
+Needs a running MongoDB. Seeds --users documents (1M by default) into a
+scratch database. Run from the server directory:
+
+    python -m benchmarks.bench_user_search --users 1000000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.config import settings
+from src.core.indexes import INDEXES
+from src.core.user_search import SEARCH_PROJECTION, rank_users, search_cache, search_filter, search_words
+from src.models.user import UserRole, build_search_tokens, user_public_serializer
+
+SEED_BATCH = 10000
+LIMIT = 10
+SYLLABLES = ["an", "be", "ca", "do", "el", "fi", "ga", "ho", "is", "jo", "ka", "li", "ma", "no", "or", "pa", "ri", "sa", "to", "vi"]
+ZIPF_EXPONENT = 1.1
+
+def make_name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+async def seed(db, count: int):
+    existing = await db.users.estimated_document_count()
+    rng = random.Random(existing)
+    roles = [role.value for role in UserRole]
+    for offset in range(existing, count, SEED_BATCH):
+        batch = min(SEED_BATCH, count - offset)
+        users = []
+        for i in range(offset, offset + batch):
+            username = f"{make_name(rng).lower()}{i}"
+            full_name = f"{make_name(rng)} {make_name(rng)}"
+            users.append({
+                "username": username,
+                "full_name": full_name,
+                "search_tokens": build_search_tokens(username, full_name),
+                "role": rng.choice(roles),
+                "is_active": True,
+            })
+        await db.users.insert_many(users, ordered=False)
+        print(f"seeded {offset + batch}/{count}", end="\r", flush=True)
+    print()
+
+async def search(db, q: str):
+    words = search_words(q)
+    candidates = await db.users.find(search_filter(words), SEARCH_PROJECTION).limit(settings.SEARCH_CANDIDATE_LIMIT).to_list(settings.SEARCH_CANDIDATE_LIMIT)
+    return user_public_serializer.dump_many(rank_users(candidates, q)[:LIMIT])
+
+async def run(args):
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client[args.db_name]
+    await db.users.create_indexes(INDEXES["users"])
+    await seed(db, args.users)
+
+    rng = random.Random(42)
+    sample = await db.users.aggregate([{"$sample": {"size": 1000}}, {"$project": {"full_name": 1}}]).to_list(1000)
+    prefixes = []
+    for user in sample:
+        first, last = user["full_name"].split()
+        prefixes.append(first[:rng.randint(1, len(first))])
+        prefixes.append(f"{first} {last[:rng.randint(1, len(last))]}")
+
+    samples = []
+    for q in rng.choices(prefixes, k=args.queries):
+        start = time.perf_counter()
+        await search(db, q)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    print(f"uncached p50 {statistics.median(samples):8.2f}ms p99 {samples[int(len(samples) * 0.99)]:8.2f}ms")
+
+    weights = [1 / (rank ** ZIPF_EXPONENT) for rank in range(1, len(prefixes) + 1)]
+    for q in rng.choices(prefixes, weights=weights, k=args.queries):
+        key = (q.lower(), None, LIMIT)
+        if search_cache.get(key) is None:
+            search_cache.set(key, await search(db, q))
+    print(f"cache stats: {search_cache.stats()}")
+    client.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongodb-url", default=settings.MONGODB_URL)
+    parser.add_argument("--db-name", default="bechdo_bench")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=5000)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Per-document cost of turning user documents into a response body.
+
+"model" is the old path: each document is copied into UserInDB and dumped,
+then FastAPI validates the list against response_model=List[User] and encodes
+it with jsonable_encoder and json.dumps. "serializer" is the precompiled
+DocumentSerializer writing orjson bytes. Run from the server directory:
+
+    python -m benchmarks.bench_user_serialization
+"""
+import json
+import time
+from datetime import datetime
+from typing import List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from src.models.user import User, UserInDB, user_serializer
+
+DOCUMENTS = 1000
+ROUNDS = 50
+
+def make_documents():
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "email": f"user{i}@example.com",
+            "username": f"user_{i}",
+            "full_name": f"User {i}",
+            "role": "basic_user",
+            "phone": "+15550100",
+            "profile_picture_url": None,
+            "location": {"city": "Berlin", "country": "DE"},
+            "is_active": True,
+            "is_verified": True,
+            "hashed_password": "x" * 97,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(DOCUMENTS)
+    ]
+
+response_adapter = TypeAdapter(List[User])
+
+def model_path(documents):
+    users = []
+    for document in documents:
+        document = dict(document)
+        document["id"] = str(document.pop("_id"))
+        users.append(UserInDB(**document).model_dump(exclude={"hashed_password"}))
+    return json.dumps(jsonable_encoder(response_adapter.validate_python(users))).encode()
+
+def serializer_path(documents):
+    return user_serializer.dump_many(documents)
+
+def main():
+    documents = make_documents()
+    assert json.loads(model_path(documents)) == json.loads(serializer_path(documents))
+
+    for label, serialize in (("model", model_path), ("serializer", serializer_path)):
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            serialize(documents)
+        elapsed = time.perf_counter() - start
+        per_document = elapsed / (ROUNDS * DOCUMENTS) * 1e6
+        print(f"{label:<11} {per_document:8.2f}us/document {ROUNDS * DOCUMENTS / elapsed:10.0f} documents/s")
+
+if __name__ == "__main__":
+    main()
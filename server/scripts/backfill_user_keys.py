@@ -0,0 +1,84 @@
+
+"""
+Backfill derived lookup fields on existing user documents.
+
+Builds the users indexes, then writes login_keys (lowercased email and
+username) and search_tokens (username and full name prefixes) for users
+created before those fields existed, in _id order and in batches. Run it
+before deploying a release that logs users in through login_keys or offers
+search. Safe to re-run; it resumes with users that still lack a field.
+
+    python -m scripts.backfill_user_keys [--batch-size 1000]
+
+Users whose keys collide case-insensitively with another account are
+reported and left untouched; merge or rename them, then run again.
+"""
+import argparse
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from src.config import settings
+from src.core.indexes import INDEXES
+from src.models.user import build_login_keys, build_search_tokens
+
+async def backfill(db, batch_size: int):
+    query = {"$or": [{"login_keys": {"$exists": False}}, {"search_tokens": {"$exists": False}}]}
+    projection = {"email": 1, "username": 1, "full_name": 1}
+    last_id = None
+    updated = 0
+    conflicts = []
+
+    while True:
+        page_query = dict(query)
+        if last_id is not None:
+            page_query["_id"] = {"$gt": last_id}
+        users = await db.users.find(page_query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not users:
+            break
+        last_id = users[-1]["_id"]
+
+        operations = [
+            UpdateOne(
+                {"_id": user["_id"]},
+                {"$set": {
+                    "login_keys": build_login_keys(user["email"], user["username"]),
+                    "search_tokens": build_search_tokens(user["username"], user.get("full_name")),
+                }}
+            )
+            for user in users
+        ]
+        try:
+            result = await db.users.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+        except BulkWriteError as e:
+            updated += e.details["nModified"]
+            for error in e.details["writeErrors"]:
+                conflicts.append(users[error["index"]])
+        print(f"updated {updated} users", end="\r", flush=True)
+
+    print(f"updated {updated} users")
+    for user in conflicts:
+        print(f"conflict: {user['_id']} {user['email']} {user['username']}")
+    return conflicts
+
+async def run(args):
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client[args.db_name]
+    # The partial unique index only covers documents that already have keys,
+    # so building it first lets the backfill itself detect collisions
+    await db.users.create_indexes(INDEXES["users"])
+    await backfill(db, args.batch_size)
+    client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongodb-url", default=settings.MONGODB_URL)
+    parser.add_argument("--db-name", default=settings.DB_NAME)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
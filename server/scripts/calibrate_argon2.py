@@ -0,0 +1,73 @@
+
+"""
+Pick Argon2 cost parameters for this host.
+
+Uses as much memory as the budget allows, then raises time_cost while the
+median hash time stays under the latency target. Prints settings for .env.
+Run from the server directory:
+
+    python -m scripts.calibrate_argon2 --target-ms 250 --max-memory-mib 64
+"""
+import argparse
+import os
+import statistics
+import time
+
+from argon2 import PasswordHasher
+
+MIN_MEMORY_KIB = 8 * 1024
+MAX_TIME_COST = 20
+
+def measure(time_cost: int, memory_cost: int, parallelism: int, samples: int) -> float:
+    """Median milliseconds per hash"""
+    hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.hash("calibration-password")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def calibrate(target_ms: float, max_memory_kib: int, parallelism: int, samples: int) -> dict:
+    # Memory is the main defence against GPU cracking, so spend the whole budget
+    # first and only shrink it when a single pass is already over the target
+    memory_cost = max_memory_kib
+    while measure(1, memory_cost, parallelism, samples) > target_ms and memory_cost > MIN_MEMORY_KIB:
+        memory_cost //= 2
+    
+    time_cost = 1
+    latency = measure(time_cost, memory_cost, parallelism, samples)
+    while time_cost < MAX_TIME_COST:
+        next_latency = measure(time_cost + 1, memory_cost, parallelism, samples)
+        print(f"  t={time_cost + 1} m={memory_cost}KiB p={parallelism}: {next_latency:.1f}ms")
+        if next_latency > target_ms:
+            break
+        time_cost += 1
+        latency = next_latency
+    
+    return {
+        "time_cost": time_cost,
+        "memory_cost": memory_cost,
+        "parallelism": parallelism,
+        "latency_ms": latency,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=250, help="per-hash latency budget")
+    parser.add_argument("--max-memory-mib", type=int, default=64, help="per-hash memory budget")
+    parser.add_argument("--parallelism", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+    
+    result = calibrate(args.target_ms, args.max_memory_mib * 1024, args.parallelism, args.samples)
+    
+    print(f"\n# {result['latency_ms']:.1f}ms per hash on this host")
+    print(f"ARGON2_TIME_COST={result['time_cost']}")
+    print(f"ARGON2_MEMORY_COST={result['memory_cost']}")
+    print(f"ARGON2_PARALLELISM={result['parallelism']}")
+    print(f"\n# Each concurrent hash holds ~{result['memory_cost'] // 1024}MiB; "
+          f"size PASSWORD_HASH_WORKERS so workers x memory fits in RAM")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+
+"""
+Diff and apply the index registry in src/core/indexes.py.
+
+    python -m scripts.migrate_indexes diff
+    python -m scripts.migrate_indexes apply [--prune] [--commit-quorum majority]
+
+apply builds missing or changed indexes one at a time, then records the registry
+fingerprint that API workers check at startup. Indexes that exist in the database
+but not in the registry are only dropped with --prune.
+"""
+import argparse
+import asyncio
+import sys
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.config import settings
+from src.core.indexes import apply_indexes, diff_indexes, registry_fingerprint
+
+async def run(args) -> int:
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client[args.db_name]
+    try:
+        changes = await diff_indexes(db)
+        for collection, change in changes.items():
+            for action in ("create", "replace", "extra"):
+                for name in change[action]:
+                    print(f"{action:<8} {collection}.{name}")
+
+        if args.command == "diff":
+            print("up to date" if not changes else f"{len(changes)} collection(s) differ")
+            return 1 if changes else 0
+
+        commit_quorum = args.commit_quorum
+        if commit_quorum is not None and commit_quorum.isdigit():
+            commit_quorum = int(commit_quorum)
+        await apply_indexes(db, prune=args.prune, commit_quorum=commit_quorum, log=print)
+        print(f"applied fingerprint {registry_fingerprint()}")
+        return 0
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["diff", "apply"])
+    parser.add_argument("--mongodb-url", default=settings.MONGODB_URL)
+    parser.add_argument("--db-name", default=settings.DB_NAME)
+    parser.add_argument("--prune", action="store_true", help="drop indexes missing from the registry")
+    parser.add_argument("--commit-quorum", help="replica set members that must finish each build")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Report space saved by the deduplicated local blob store.
+
+    python -m scripts.storage_report
+
+Compares the bytes referenced by storage paths with the bytes actually stored
+as blobs, from the file_blobs refcounts.
+"""
+import argparse
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.config import settings
+from src.core.blob_store import space_report
+
+def mib(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MiB"
+
+async def run(args):
+    client = AsyncIOMotorClient(args.mongodb_url)
+    report = await space_report(client[args.db_name])
+    client.close()
+
+    print(f"paths:   {report['references']}")
+    print(f"blobs:   {report['blobs']}")
+    print(f"logical: {mib(report['logical_bytes'])}")
+    print(f"stored:  {mib(report['stored_bytes'])}")
+    saved_ratio = report["saved_bytes"] / report["logical_bytes"] if report["logical_bytes"] else 0
+    print(f"saved:   {mib(report['saved_bytes'])} ({saved_ratio:.1%})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongodb-url", default=settings.MONGODB_URL)
+    parser.add_argument("--db-name", default=settings.DB_NAME)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,34 @@
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import EmailStr
 from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
 
 from src.core.security import (
     create_access_token,
     create_refresh_token,
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
+    password_needs_rehash,
     create_email_verification_token,
     verify_email_token,
     create_password_reset_token,
     verify_password_reset_token,
+    verify_refresh_token,
 )
-from src.core.rate_limit import rate_limited
-from src.models.user import UserCreate, User, UserInDB
+from src.core import refresh_tokens
+from src.core.rate_limit import client_ip
+from src.core.event_sink import event_sink
+from src.core.user_cache import invalidate_user
+from src.models.user import UserCreate, User, new_user_document, normalize_login_key, user_serializer
+from src.core.serializers import JSONBytesResponse
 from src.models.token import Token, RefreshToken
 from src.dependencies import get_current_user, get_db
 from src.core.email import send_verification_email, send_password_reset_email
-from src.config import settings
 
 router = APIRouter()
 
@@ -33,8 +39,11 @@ async def register_user(
     db = Depends(get_db)
 ):
     """Register a new user and send verification email"""
-    # Check if user already exists
-    existing_user = await db.users.find_one({"email": user_in.email})
+    # Check if user already exists, ignoring case
+    existing_user = await db.users.find_one(
+        {"login_keys": normalize_login_key(user_in.email)},
+        projection={"_id": 1}
+    )
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -42,22 +51,12 @@ async def register_user(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await get_password_hash_async(user_in.password)
     
     # Generate verification token
     verification_token = create_email_verification_token(user_in.email)
     
-    user_doc = {
-        "email": user_in.email,
-        "username": user_in.username,
-        "hashed_password": hashed_password,
-        "full_name": user_in.full_name,
-        "role": "basic_user",
-        "is_active": False,
-        "is_verified": False,
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow(),
-    }
+    user_doc = new_user_document(user_in, hashed_password)
     
     try:
         result = await db.users.insert_one(user_doc)
@@ -75,8 +74,8 @@ async def register_user(
         verification_token
     )
     
-    user_doc["id"] = str(result.inserted_id)
-    return UserInDB(**user_doc).model_dump(exclude={"hashed_password"})
+    user_doc["_id"] = result.inserted_id
+    return JSONBytesResponse(user_serializer.dump(user_doc), status_code=status.HTTP_201_CREATED)
 
 @router.post("/verify-email")
 async def verify_email(token: str, db = Depends(get_db)):
@@ -90,36 +89,36 @@ async def verify_email(token: str, db = Depends(get_db)):
         )
     
     # Activate user account
-    result = await db.users.update_one(
-        {"email": email},
-        {"$set": {"is_verified": True, "is_active": True, "updated_at": datetime.utcnow()}}
-    )
+    user = await db.users.find_one({"login_keys": normalize_login_key(email)}, {"_id": 1})
+    result = None
+    if user is not None:
+        result = await db.users.update_one(
+            {"_id": user["_id"], "is_verified": False},
+            {"$set": {"is_verified": True, "is_active": True, "updated_at": datetime.utcnow()}}
+        )
     
-    if result.modified_count == 0:
+    if result is None or not result.matched_count:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User not found or already verified"
         )
+    
+    await invalidate_user(user["_id"])
         
     return {"message": "Email successfully verified"}
 
 @router.post("/login", response_model=Token)
-@rate_limited()
 async def login(
+    background_tasks: BackgroundTasks,
     form_data: OAuth2PasswordRequestForm = Depends(),
     request: Request = None,
     db = Depends(get_db)
 ):
     """User login with username/email and password"""
     # Find user by email or username
-    user = await db.users.find_one({
-        "$or": [
-            {"email": form_data.username},
-            {"username": form_data.username}
-        ]
-    })
+    user = await db.users.find_one({"login_keys": normalize_login_key(form_data.username)})
     
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    if not user or not await verify_password_async(form_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email/username or password",
@@ -132,26 +131,31 @@ async def login(
             detail="User account is inactive"
         )
     
+    # Upgrade hashes made with older Argon2 settings while we have the plain password
+    if password_needs_rehash(user["hashed_password"]):
+        background_tasks.add_task(
+            _rehash_password,
+            db,
+            user["_id"],
+            user["hashed_password"],
+            form_data.password
+        )
+    
     # Record login history
     login_history = {
         "user_id": user["_id"],
-        "ip_address": request.client.host if request else None,
+        "ip_address": client_ip(request.scope) if request else None,
         "user_agent": request.headers.get("User-Agent") if request else None,
         "timestamp": datetime.utcnow()
     }
-    await db.login_history.insert_one(login_history)
+    await event_sink.emit("login_history", login_history)
     
     # Generate tokens
     access_token = create_access_token(data={"sub": str(user["_id"])})
     refresh_token = create_refresh_token(data={"sub": str(user["_id"])})
     
     # Store refresh token in db
-    await db.refresh_tokens.insert_one({
-        "user_id": user["_id"],
-        "token": refresh_token,
-        "expires_at": datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
-        "created_at": datetime.utcnow()
-    })
+    await refresh_tokens.store_token(db, user["_id"], refresh_token)
     
     return {
         "access_token": access_token,
@@ -159,6 +163,20 @@ async def login(
         "token_type": "bearer"
     }
 
+async def _rehash_password(db, user_id, old_hash: str, password: str):
+    """Replace a user's password hash with one using the current Argon2 settings"""
+    try:
+        new_hash = await get_password_hash_async(password)
+    except HTTPException:
+        # Hashing pool is saturated, try again on the next login
+        return
+    
+    # Only swap if the password was not changed in the meantime
+    await db.users.update_one(
+        {"_id": user_id, "hashed_password": old_hash},
+        {"$set": {"hashed_password": new_hash}}
+    )
+
 @router.post("/refresh", response_model=Token)
 async def refresh_token(refresh_token: RefreshToken, db = Depends(get_db)):
     """Get new access token using refresh token"""
@@ -172,35 +190,21 @@ async def refresh_token(refresh_token: RefreshToken, db = Depends(get_db)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Check if token exists and is not blacklisted
-    token_entry = await db.refresh_tokens.find_one({
-        "token": refresh_token.refresh_token,
-        "is_blacklisted": {"$ne": True}
-    })
-    
-    if not token_entry:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Refresh token not found or blacklisted",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
     # Generate new tokens
     new_access_token = create_access_token(data={"sub": user_id})
     new_refresh_token = create_refresh_token(data={"sub": user_id})
     
     # Blacklist old token and save new one
-    await db.refresh_tokens.update_one(
-        {"token": refresh_token.refresh_token},
-        {"$set": {"is_blacklisted": True}}
+    token_entry = await refresh_tokens.rotate_token(
+        db, refresh_token.refresh_token, new_refresh_token
     )
     
-    await db.refresh_tokens.insert_one({
-        "user_id": token_entry["user_id"],
-        "token": new_refresh_token,
-        "expires_at": datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
-        "created_at": datetime.utcnow()
-    })
+    if not token_entry:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token not found or blacklisted",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     return {
         "access_token": new_access_token,
@@ -215,15 +219,11 @@ async def logout(
     db = Depends(get_db)
 ):
     """Logout user by blacklisting refresh token"""
-    result = await db.refresh_tokens.update_one(
-        {
-            "token": refresh_token.refresh_token,
-            "user_id": current_user["_id"]
-        },
-        {"$set": {"is_blacklisted": True}}
+    revoked = await refresh_tokens.revoke_token(
+        db, refresh_token.refresh_token, ObjectId(current_user["id"])
     )
     
-    if result.modified_count == 0:
+    if not revoked:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Token not found or already blacklisted"
@@ -232,7 +232,6 @@ async def logout(
     return {"message": "Successfully logged out"}
 
 @router.post("/forgot-password")
-@rate_limited()
 async def forgot_password(
     email: EmailStr,
     background_tasks: BackgroundTasks,
@@ -240,18 +239,21 @@ async def forgot_password(
 ):
     """Send password reset email"""
     # Check if user exists
-    user = await db.users.find_one({"email": email})
+    user = await db.users.find_one(
+        {"login_keys": normalize_login_key(email)},
+        {"email": 1, "full_name": 1}
+    )
     if not user:
         # Don't reveal whether email exists for security
         return {"message": "If this email exists, a password reset link has been sent"}
     
-    # Generate reset token
-    reset_token = create_password_reset_token(email)
+    # Generate reset token for the address as registered
+    reset_token = create_password_reset_token(user["email"])
     
     # Send password reset email
     background_tasks.add_task(
         send_password_reset_email,
-        email,
+        user["email"],
         user["full_name"],
         reset_token
     )
@@ -259,7 +261,6 @@ async def forgot_password(
     return {"message": "Password reset email sent"}
 
 @router.post("/reset-password")
-@rate_limited()
 async def reset_password(
     token: str,
     new_password: str,
@@ -275,22 +276,22 @@ async def reset_password(
         )
     
     # Update user password
-    hashed_password = get_password_hash(new_password)
-    result = await db.users.update_one(
-        {"email": email},
-        {"$set": {"hashed_password": hashed_password, "updated_at": datetime.utcnow()}}
-    )
-    
-    if result.modified_count == 0:
+    user = await db.users.find_one({"login_keys": normalize_login_key(email)}, {"_id": 1})
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User not found"
         )
     
-    # Invalidate all refresh tokens
-    await db.refresh_tokens.update_many(
-        {"user_id": result.upserted_id},
-        {"$set": {"is_blacklisted": True}}
+    hashed_password = await get_password_hash_async(new_password)
+    await db.users.update_one(
+        {"_id": user["_id"]},
+        {"$set": {"hashed_password": hashed_password, "updated_at": datetime.utcnow()}}
     )
     
+    await invalidate_user(user["_id"])
+    
+    # Invalidate all refresh tokens
+    await refresh_tokens.revoke_user_tokens(db, user["_id"])
+    
     return {"message": "Password has been reset successfully"}
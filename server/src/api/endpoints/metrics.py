@@ -0,0 +1,34 @@
+
+from fastapi import APIRouter, Depends
+
+from src.dependencies import get_current_admin
+from src.core.hash_pool import hash_pool
+from src.core.security import token_claims_cache
+from src.core.user_cache import user_cache, user_count_cache
+from src.core.profile_cache import profile_cache
+from src.core.user_search import search_cache
+from src.core.event_sink import event_sink
+from src.core.file_serving import file_index
+from src.core.mongo import pool_metrics, command_metrics
+from src.core.s3 import download_url_cache
+
+router = APIRouter()
+
+@router.get("/")
+async def read_metrics(current_admin = Depends(get_current_admin)):
+    """
+    Get cache and worker pool statistics for this process (admin only)
+    """
+    return {
+        "user_cache": user_cache.stats(),
+        "user_count_cache": user_count_cache.stats(),
+        "token_claims_cache": token_claims_cache.stats(),
+        "profile_cache": profile_cache.stats(),
+        "search_cache": search_cache.stats(),
+        "file_index": file_index.stats(),
+        "s3_download_urls": download_url_cache.stats(),
+        "hash_pool": hash_pool.stats(),
+        "event_sink": event_sink.stats(),
+        "mongo_pool": pool_metrics.stats(),
+        "mongo_commands": command_metrics.stats(),
+    }
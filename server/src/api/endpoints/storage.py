@@ -1,13 +1,17 @@
 
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, status, Path
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, status, Path, Request
+from fastapi.responses import JSONResponse, RedirectResponse
 import os
-import shutil
 from typing import List
 import uuid
 
-from src.dependencies import get_current_user
+from src.dependencies import get_current_user, get_db
 from src.config import settings
+from src.core.uploads import check_content_type, save_upload, storage_path
+from src.core.blob_store import add_file_ref, blob_path, check_not_blob_path, release_blob, resolve_file, save_blob
+from src.core.s3 import generate_presigned_urls_async, get_object_url, presigned_download_url, upload_to_s3
+from src.models.storage import PresignBatch
+from src.core.file_serving import build_file_meta, file_index, file_response, invalidate_file, is_current
 
 router = APIRouter()
 
@@ -15,41 +19,93 @@ router = APIRouter()
 async def upload_file(
     file: UploadFile = File(...),
     folder: str = "uploads",
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
 ):
     """Upload a file to storage (S3 or local)"""
     if settings.STORAGE_MODE == "local":
-        return await _upload_local(file, folder, current_user["id"])
+        return await _upload_local(file, folder, current_user["id"], db)
     else:
-        # S3 upload would be implemented here
-        raise HTTPException(
-            status_code=status.HTTP_501_NOT_IMPLEMENTED,
-            detail="S3 upload not implemented in this demo"
-        )
+        return await _upload_s3(file, folder, current_user["id"])
 
-@router.get("/files/{path:path}", response_class=FileResponse)
-async def get_file(path: str):
-    """Get a file from local storage"""
+@router.post("/presign", response_model=dict)
+async def presign_uploads(
+    batch: PresignBatch,
+    current_user = Depends(get_current_user)
+):
+    """
+    Presigned upload URLs for up to S3_PRESIGN_BATCH_MAX files in one request,
+    e.g. every photo of a listing. All URLs are signed in a single worker thread hop.
+    """
+    files = []
+    for item in batch.files:
+        check_content_type(item.content_type, settings.UPLOAD_ALLOWED_CONTENT_TYPES)
+        file_extension = os.path.splitext(item.filename)[1]
+        file_path = f"{batch.folder}/{current_user['id']}/{uuid.uuid4()}{file_extension}"
+        # Same checks as local uploads: local mode creates the directories up front
+        check_not_blob_path(file_path)
+        files.append({"file_path": file_path, "content_type": item.content_type})
+    
+    urls = await generate_presigned_urls_async(files, expires_in=settings.S3_PRESIGN_EXPIRES_SECONDS)
+    
+    return {
+        "expires_in": settings.S3_PRESIGN_EXPIRES_SECONDS,
+        "uploads": [
+            {
+                "filename": item.filename,
+                "content_type": f["content_type"],
+                "upload_url": url,
+                "file_key": f["file_path"],
+                "url": get_object_url(f["file_path"]),
+            }
+            for item, f, url in zip(batch.files, files, urls)
+        ]
+    }
+
+@router.get("/files/{path:path}")
+async def get_file(path: str, request: Request, redirect: bool = True, db = Depends(get_db)):
+    """
+    Get a file from local storage, or a presigned S3 URL for it.
+    Locally, supports If-None-Match, If-Modified-Since and Range requests;
+    only blob paths, which name their own content, are served as immutable.
+    In S3 mode, redirects (302) to a presigned GET URL, cacheable for as long as
+    the URL stays valid; redirect=false returns the URL as JSON instead.
+    """
     if settings.STORAGE_MODE == "local":
-        file_path = os.path.join(settings.LOCAL_STORAGE_PATH, path)
-        if not os.path.exists(file_path):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="File not found"
-            )
-        return FileResponse(file_path)
-    else:
-        # S3 file access would be implemented here
-        raise HTTPException(
-            status_code=status.HTTP_501_NOT_IMPLEMENTED,
-            detail="S3 file access not implemented in this demo"
-        )
+        # Deduplicated uploads resolve to their blob; older files are stored at their path.
+        # The ref is read on every request since another worker may repoint it
+        file_ref = await resolve_file(db, path) if settings.LOCAL_STORAGE_DEDUP else None
+        digest = file_ref["digest"] if file_ref else None
+        meta = file_index.get(path)
+        if meta is not None and not await is_current(meta, digest):
+            # Rewritten by another worker; a stale size would truncate or overrun the body
+            file_index.delete(path)
+            meta = None
+        if meta is None:
+            if file_ref:
+                meta = await build_file_meta(path, storage_path(blob_path(digest)), file_ref["content_type"], digest)
+            else:
+                meta = await build_file_meta(path, storage_path(path))
+            if meta is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="File not found"
+                )
+            file_index.set(path, meta)
+        return await file_response(request, meta)
+    
+    url, max_age = await presigned_download_url(path)
+    headers = {"Cache-Control": f"public, max-age={max_age}"}
+    if not redirect:
+        return JSONResponse({"url": url, "expires_in": max_age}, headers=headers)
+    return RedirectResponse(url, status_code=status.HTTP_302_FOUND, headers=headers)
 
 @router.post("/local-upload/{path:path}", response_model=dict)
 async def local_upload(
     path: str,
     file: UploadFile = File(...),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db = Depends(get_db)
 ):
     """Endpoint for local file uploads when using local storage mode"""
     if settings.STORAGE_MODE != "local":
@@ -58,40 +114,64 @@ async def local_upload(
             detail="Local upload is only available when STORAGE_MODE is set to local"
         )
     
-    file_path = os.path.join(settings.LOCAL_STORAGE_PATH, path)
-    
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    
-    # Save file
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    saved = await _store_local(file, path, current_user["id"], db)
     
     return {
         "filename": file.filename,
         "path": path,
-        "url": f"/api/v1/storage/files/{path}"
+        "url": f"/api/v1/storage/files/{path}",
+        **saved
     }
 
-async def _upload_local(file: UploadFile, folder: str, user_id: str) -> dict:
+async def _store_local(file: UploadFile, path: str, user_id: str, db) -> dict:
+    """Store an upload at a storage path, as a shared blob when deduplication is on"""
+    # Content-addressed blobs must never be overwritten through a plain path
+    check_not_blob_path(path)
+    if not settings.LOCAL_STORAGE_DEDUP:
+        # Stream to a temp file, then rename into place
+        saved = await save_upload(file, storage_path(path))
+    else:
+        blob = await save_blob(db, file)
+        try:
+            previous = await add_file_ref(db, path, blob, user_id, file.filename, file.content_type)
+        except BaseException:
+            # The path never took the reference save_blob handed over
+            await release_blob(db, blob["sha256"])
+            raise
+        if previous is not None:
+            await release_blob(db, previous)
+        saved = {"size": blob["size"], "sha256": blob["sha256"]}
+    
+    await invalidate_file(path)
+    return saved
+
+async def _upload_local(file: UploadFile, folder: str, user_id: str, db) -> dict:
     """Helper function for local file upload"""
     # Generate a unique filename
-    file_extension = os.path.splitext(file.filename)[1]
+    file_extension = os.path.splitext(file.filename or "")[1]
     unique_filename = f"{uuid.uuid4()}{file_extension}"
     
     # Create path
     relative_path = os.path.join(folder, user_id, unique_filename)
-    absolute_path = os.path.join(settings.LOCAL_STORAGE_PATH, relative_path)
+    saved = await _store_local(file, relative_path, user_id, db)
     
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+    return {
+        "filename": file.filename,
+        "path": relative_path,
+        "url": f"/api/v1/storage/files/{relative_path}",
+        **saved
+    }
+
+async def _upload_s3(file: UploadFile, folder: str, user_id: str) -> dict:
+    """Helper function for server-side S3 upload"""
+    file_extension = os.path.splitext(file.filename or "")[1]
+    key = f"{folder}/{user_id}/{uuid.uuid4()}{file_extension}"
     
-    # Save file
-    with open(absolute_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    saved = await upload_to_s3(file, key)
     
     return {
         "filename": file.filename,
-        "path": relative_path,
-        "url": f"/api/v1/storage/files/{relative_path}"
+        "path": key,
+        "url": get_object_url(key),
+        **saved
     }
@@ -1,21 +1,76 @@
 
-from typing import List, Optional
+import asyncio
+import csv
+import io
+import logging
+from typing import AsyncIterator, List, Optional, Tuple
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Request, Response
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic import ValidationError
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from pymongo.write_concern import WriteConcern
 from pydantic import EmailStr
 
-from src.core.security import get_password_hash
-from src.dependencies import get_current_user, get_current_admin, get_db
-from src.models.user import User, UserUpdate, UserInDB, UserAdminUpdate
-from src.core.s3 import generate_presigned_url
+from src.core.hash_pool import hash_pool
+from src.core.security import get_password_hash_async
+from src.dependencies import get_current_user, get_current_admin, get_optional_current_user, get_db, get_profile_db, get_admin_read_db, optional_oauth2_scheme
+from src.config import settings
+from src.models.user import (
+    User,
+    UserCreate,
+    UserUpdate,
+    UserAdminUpdate,
+    UserBulkUpdate,
+    UserPublic,
+    UserRole,
+    build_search_tokens,
+    new_user_document,
+    normalize_search_words,
+    user_serializer,
+    user_public_serializer,
+)
+from src.core.s3 import generate_presigned_url_async
+from src.core.user_cache import estimated_user_count, invalidate_user, invalidate_users
+from src.core.event_sink import event_sink
+from src.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset_filter
+from src.core.serializers import JSONBytesResponse, dumps
+from src.core.compression import gunzip_stream, gzip_stream, iter_lines
+from src.core.profile_cache import profile_cache, profile_etag
+from src.core.conditional import etag_matches
+from src.core.fieldsets import parse_fields
+from src.core.user_search import SEARCH_PROJECTION, exact_username_filter, merge_exact, rank_users, search_cache, search_filter, search_words
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+AUDIT_LOG_SORT = [("timestamp", -1), ("_id", -1)]
+# Derived or secret fields left out of audit log details
+AUDIT_OMITTED_FIELDS = {"hashed_password", "search_tokens"}
+AUDIT_LOG_PROJECTION = {"action": 1, "user_id": 1, "admin_id": 1, "timestamp": 1, "details": 1}
+USER_LIST_SORT = [("_id", 1)]
+TOTAL_COUNT_HEADER = "X-Total-Count"
+PUBLIC_PROFILE_PROJECTION = {**user_public_serializer.projection, "updated_at": 1}
+FIELDS_DESCRIPTION = "Comma separated fields to return, e.g. id,username,profile_picture_url"
+# Profile fields each caller role may select with fields=; anyone else gets the public ones
+PROFILE_FIELDS_BY_ROLE = {
+    UserRole.ADMIN.value: user_serializer.fields,
+    UserRole.MODERATOR.value: user_serializer.fields,
+}
+
 @router.get("/me", response_model=User)
-async def read_current_user(current_user: User = Depends(get_current_user)):
+async def read_current_user(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    current_user: User = Depends(get_current_user)
+):
     """Get current user profile"""
-    return current_user
+    selected = parse_fields(fields, user_serializer.fields)
+    serializer = user_serializer.partial(selected) if selected else user_serializer
+    return JSONBytesResponse(serializer.dump(current_user))
 
 @router.patch("/me", response_model=User)
 async def update_current_user(
@@ -31,27 +86,110 @@ async def update_current_user(
         del update_data["role"]
     
     if update_data.get("password"):
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
+    
+    if "full_name" in update_data:
+        update_data["search_tokens"] = build_search_tokens(current_user["username"], update_data["full_name"])
     
     update_data["updated_at"] = datetime.utcnow()
     
-    await db.users.update_one(
+    updated_user = await db.users.find_one_and_update(
         {"_id": ObjectId(current_user["id"])},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection=user_serializer.projection,
+        return_document=ReturnDocument.AFTER
     )
+    await invalidate_user(current_user["id"])
     
-    updated_user = await db.users.find_one({"_id": ObjectId(current_user["id"])})
-    updated_user["id"] = str(updated_user.pop("_id"))
+    return JSONBytesResponse(user_serializer.dump(updated_user))
+
+@router.get("/search", response_model=List[UserPublic])
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=100),
+    role: Optional[UserRole] = None,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db = Depends(get_profile_db)
+):
+    """
+    Typeahead search of active users by username or full name prefix.
+    Every query word must prefix a word of the username or full name.
+    """
+    words = search_words(q)
+    if not words:
+        return JSONBytesResponse(b"[]")
     
-    return UserInDB(**updated_user).model_dump(exclude={"hashed_password"})
+    role = role.value if role else None
+    key = (" ".join(normalize_search_words(q)), role, limit)
+    body = search_cache.get(key)
+    if body is None:
+        candidates, exact = await asyncio.gather(
+            db.users.find(
+                search_filter(words, role),
+                SEARCH_PROJECTION
+            ).limit(settings.SEARCH_CANDIDATE_LIMIT).to_list(settings.SEARCH_CANDIDATE_LIMIT),
+            db.users.find_one(exact_username_filter(q, role), SEARCH_PROJECTION)
+        )
+        candidates = merge_exact(candidates, exact, q)
+        body = user_public_serializer.dump_many(rank_users(candidates, q)[:limit])
+        search_cache.set(key, body)
+    
+    return JSONBytesResponse(body)
 
-@router.get("/profile/{user_id}", response_model=User)
+@router.get("/profile/{user_id}", response_model=UserPublic)
 async def read_user_profile(
+    request: Request,
     user_id: str = Path(..., title="The ID of the user to get"),
-    db = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db = Depends(get_profile_db),
+    primary_db = Depends(get_db)
 ):
-    """Get public user profile by ID"""
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    """
+    Get public user profile by ID.
+    Responses carry an ETag; a matching If-None-Match gets a 304 without a database read.
+    With fields=, admins and moderators may also select non-public fields.
+    """
+    if fields is not None:
+        # Only fieldsets depend on the caller, so plain reads never decode the token
+        current_user = await get_optional_current_user(token, primary_db)
+        role = current_user["role"] if current_user else None
+        selected = parse_fields(fields, PROFILE_FIELDS_BY_ROLE.get(role, user_public_serializer.fields))
+        return await _read_profile_fields(request, user_id, selected, db)
+    
+    entry = profile_cache.get(user_id)
+    if entry is None:
+        # Cache fills read the primary: a lagging secondary right after invalidate_user
+        # would put the old profile and ETag back for the whole TTL
+        user = await primary_db.users.find_one({"_id": ObjectId(user_id)}, PUBLIC_PROFILE_PROJECTION)
+        
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        etag = profile_etag(user["_id"], user.get("updated_at"))
+        
+        # For public profile, only return safe fields
+        body = user_public_serializer.dump(user)
+        
+        entry = (etag, body)
+        profile_cache.set(user_id, entry)
+    
+    etag, body = entry
+    headers = {"ETag": etag, "Cache-Control": "public, no-cache"}
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        profile_cache.record_not_modified(body)
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return JSONBytesResponse(body, headers=headers)
+
+async def _read_profile_fields(request: Request, user_id: str, selected, db) -> Response:
+    """Sparse profile read: only the selected fields leave Mongo, bypassing the profile cache"""
+    serializer = user_serializer.partial(selected)
+    user = await db.users.find_one({"_id": ObjectId(user_id)}, {**serializer.projection, "updated_at": 1})
     
     if not user:
         raise HTTPException(
@@ -59,18 +197,14 @@ async def read_user_profile(
             detail="User not found"
         )
     
-    # For public profile, only return safe fields
-    user["id"] = str(user.pop("_id"))
+    etag = profile_etag(user["_id"], user.get("updated_at"), selected)
+    public = selected.issubset(user_public_serializer.fields)
+    headers = {"ETag": etag, "Cache-Control": "public, no-cache" if public else "private, no-cache"}
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
     
-    # Use Pydantic for data validation and field filtering
-    return UserInDB(**user).model_dump(exclude={
-        "hashed_password", 
-        "email",  # Keep email private
-        "is_active", 
-        "is_verified",
-        "created_at",
-        "updated_at"
-    })
+    return JSONBytesResponse(serializer.dump(user), headers=headers)
 
 @router.get("/avatar-upload-url")
 async def get_avatar_upload_url(
@@ -84,7 +218,7 @@ async def get_avatar_upload_url(
     file_path = f"avatars/{current_user['id']}/{filename}"
     
     # Get presigned URL from S3
-    presigned_url = generate_presigned_url(
+    presigned_url = await generate_presigned_url_async(
         file_path=file_path, 
         content_type=content_type,
         expires_in=300  # URL expires in 5 minutes
@@ -98,16 +232,22 @@ async def get_avatar_upload_url(
 # Admin endpoints
 @router.get("/", response_model=List[User])
 async def read_users(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     role: Optional[str] = None,
     is_active: Optional[bool] = None,
     current_admin: User = Depends(get_current_admin),
-    db = Depends(get_db)
+    db = Depends(get_admin_read_db)
 ):
     """
-    Get all users (admin only)
+    Get all users (admin only), oldest first.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page;
+    X-Total-Count is an estimate refreshed every USER_COUNT_CACHE_TTL_SECONDS.
     """
+    selected = parse_fields(fields, user_serializer.fields)
+    serializer = user_serializer.partial(selected) if selected else user_serializer
+    
     query = {}
     
     # Apply filters if provided
@@ -116,12 +256,35 @@ async def read_users(
     if is_active is not None:
         query["is_active"] = is_active
     
-    users = []
-    async for user in db.users.find(query).skip(skip).limit(limit):
-        user["id"] = str(user.pop("_id"))
-        users.append(UserInDB(**user).model_dump(exclude={"hashed_password"}))
+    headers = {TOTAL_COUNT_HEADER: str(await estimated_user_count(db, query))}
+    
+    if cursor:
+        after = decode_cursor(cursor, arity=len(USER_LIST_SORT))
+        query = {**query, **keyset_filter(USER_LIST_SORT, after)}
+    
+    # Fetch one extra document to learn whether there is a next page
+    users = await db.users.find(query, serializer.projection).sort(USER_LIST_SORT).limit(limit + 1).to_list(limit + 1)
+    
+    if len(users) > limit:
+        users = users[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(users[-1]["_id"])
     
-    return users
+    return JSONBytesResponse(serializer.dump_many(users), headers=headers)
+
+async def _with_search_tokens(db, batch: List[Tuple[ObjectId, dict]]) -> List[Tuple[ObjectId, dict]]:
+    """Add recomputed search_tokens to updates that change full_name; usernames never change"""
+    renamed = [user_id for user_id, update_data in batch if "full_name" in update_data]
+    if not renamed:
+        return batch
+    usernames = {
+        user["_id"]: user["username"]
+        async for user in db.users.find({"_id": {"$in": renamed}}, {"username": 1})
+    }
+    return [
+        (user_id, {**update_data, "search_tokens": build_search_tokens(usernames[user_id], update_data["full_name"])})
+        if user_id in usernames and "full_name" in update_data else (user_id, update_data)
+        for user_id, update_data in batch
+    ]
 
 @router.patch("/{user_id}", response_model=User)
 async def admin_update_user(
@@ -136,7 +299,10 @@ async def admin_update_user(
     update_data = user_update.model_dump(exclude_unset=True)
     
     if update_data.get("password"):
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
+    
+    if "full_name" in update_data:
+        [(_, update_data)] = await _with_search_tokens(db, [(ObjectId(user_id), update_data)])
     
     update_data["updated_at"] = datetime.utcnow()
     
@@ -146,40 +312,331 @@ async def admin_update_user(
         "user_id": ObjectId(user_id),
         "admin_id": ObjectId(current_admin["id"]),
         "timestamp": datetime.utcnow(),
-        "details": {k: v for k, v in update_data.items() if k != "hashed_password"}
+        "details": {k: v for k, v in update_data.items() if k not in AUDIT_OMITTED_FIELDS}
     }
     
-    await db.audit_logs.insert_one(audit_log)
+    await event_sink.emit("audit_logs", audit_log)
     
-    result = await db.users.update_one(
+    updated_user = await db.users.find_one_and_update(
         {"_id": ObjectId(user_id)},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection=user_serializer.projection,
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if updated_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    updated_user = await db.users.find_one({"_id": ObjectId(user_id)})
-    updated_user["id"] = str(updated_user.pop("_id"))
+    await invalidate_user(user_id)
+    
+    return JSONBytesResponse(user_serializer.dump(updated_user))
+
+def _object_ids(user_ids: List[str]) -> List[ObjectId]:
+    try:
+        return [ObjectId(user_id) for user_id in user_ids]
+    except (InvalidId, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid user id"
+        )
+
+async def _hash_bulk_passwords(updates: List[dict], return_exceptions: bool = False) -> list:
+    """
+    Hash the passwords of a batch concurrently, at most one per hashing worker.
+    With return_exceptions, failures are returned in order of the updates that
+    have a password instead of raised.
+    """
+    workers = asyncio.Semaphore(hash_pool.workers)
+    
+    async def hash_one(update_data: dict):
+        async with workers:
+            update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
     
-    return UserInDB(**updated_user).model_dump(exclude={"hashed_password"})
+    return await asyncio.gather(
+        *(hash_one(update_data) for update_data in updates if update_data.get("password")),
+        return_exceptions=return_exceptions
+    )
+
+async def _selected_batches(db, query: dict, update_data: dict) -> AsyncIterator[List[Tuple[ObjectId, dict]]]:
+    """Walk the selected users in _id order, one batch of ids per round trip"""
+    after = None
+    while True:
+        batch_query = query if after is None else {"$and": [query, keyset_filter(USER_LIST_SORT, [after])]}
+        users = await db.users.find(batch_query, {"_id": 1}).sort(USER_LIST_SORT).limit(settings.USER_BULK_BATCH_SIZE).to_list(settings.USER_BULK_BATCH_SIZE)
+        if not users:
+            return
+        yield [(user["_id"], update_data) for user in users]
+        after = users[-1]["_id"]
+
+async def _item_batches(db, user_ids: List[ObjectId], updates: List[dict]) -> AsyncIterator[List[Tuple[ObjectId, dict]]]:
+    """Batches of the requested updates, leaving out ids that match no user"""
+    for start in range(0, len(user_ids), settings.USER_BULK_BATCH_SIZE):
+        batch = list(zip(user_ids[start:start + settings.USER_BULK_BATCH_SIZE], updates[start:start + settings.USER_BULK_BATCH_SIZE]))
+        existing = {
+            user["_id"]
+            async for user in db.users.find({"_id": {"$in": [user_id for user_id, _ in batch]}}, {"_id": 1})
+        }
+        batch = [(user_id, update_data) for user_id, update_data in batch if user_id in existing]
+        if not batch:
+            continue
+        await _hash_bulk_passwords([update_data for _, update_data in batch])
+        yield batch
+
+async def _audit_bulk_updates(db, admin_id: ObjectId, now: datetime, batch: List[Tuple[ObjectId, dict]]):
+    if not batch:
+        return
+    audit_logs = [
+        {
+            "action": "user_update",
+            "user_id": user_id,
+            "admin_id": admin_id,
+            "timestamp": now,
+            "details": {k: v for k, v in update_data.items() if k not in AUDIT_OMITTED_FIELDS}
+        }
+        for user_id, update_data in batch
+    ]
+    audit_write_concern = WriteConcern(**settings.EVENT_SINK_WRITE_CONCERNS.get("audit_logs", {}))
+    await db.audit_logs.with_options(write_concern=audit_write_concern).insert_many(audit_logs, ordered=False)
+
+async def _apply_bulk_batch(db, admin_id: ObjectId, batch: List[Tuple[ObjectId, dict]]) -> Tuple[int, int]:
+    """
+    One unordered bulk_write for a batch of users, then one audit insert_many
+    covering only the updates that were written.
+    """
+    batch = await _with_search_tokens(db, batch)
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne({"_id": user_id}, {"$set": {**update_data, "updated_at": now}})
+        for user_id, update_data in batch
+    ]
+    
+    try:
+        result = await db.users.bulk_write(operations, ordered=False)
+    except BulkWriteError as exc:
+        failed = {error["index"] for error in exc.details.get("writeErrors", [])}
+        await _audit_bulk_updates(db, admin_id, now, [entry for index, entry in enumerate(batch) if index not in failed])
+        raise
+    finally:
+        # Unordered writes may have partly applied even when they fail
+        await invalidate_users(user_id for user_id, _ in batch)
+    await _audit_bulk_updates(db, admin_id, now, batch)
+    return result.matched_count, result.modified_count
+
+@router.post("/bulk-update")
+async def admin_bulk_update_users(
+    bulk_update: UserBulkUpdate,
+    current_admin: User = Depends(get_current_admin),
+    db = Depends(get_db)
+):
+    """
+    Update many users at once (admin only), with the same semantics as PATCH /users/{user_id}.
+    Streams one NDJSON line per batch of USER_BULK_BATCH_SIZE users with its matched and
+    modified counts, then a line with the totals.
+    """
+    if bulk_update.items is not None:
+        user_ids = _object_ids([item.user_id for item in bulk_update.items])
+        updates = [item.update.model_dump(exclude_unset=True) for item in bulk_update.items]
+        batches = _item_batches(db, user_ids, updates)
+    else:
+        query = bulk_update.filter.model_dump(mode="json", exclude_none=True) if bulk_update.filter else {}
+        if bulk_update.user_ids is not None:
+            query["_id"] = {"$in": _object_ids(bulk_update.user_ids)}
+        else:
+            # A filter like {"role": "admin"} must not deactivate or demote the caller
+            query["_id"] = {"$ne": ObjectId(current_admin["id"])}
+        update_data = bulk_update.update.model_dump(exclude_unset=True)
+        if update_data.get("password"):
+            update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
+        batches = _selected_batches(db, query, update_data)
+    
+    admin_id = ObjectId(current_admin["id"])
+    
+    async def stream():
+        matched = modified = 0
+        number = 0
+        # Headers are already sent, so failures are reported in-band
+        try:
+            async for batch in batches:
+                line = {"batch": number}
+                try:
+                    batch_matched, batch_modified = await _apply_bulk_batch(db, admin_id, batch)
+                except BulkWriteError as exc:
+                    # Unordered: the rest of the batch was still written
+                    batch_matched = exc.details.get("nMatched", 0)
+                    batch_modified = exc.details.get("nModified", 0)
+                    line["error"] = "Some updates in this batch failed"
+                    line["failed"] = len(exc.details.get("writeErrors", []))
+                except PyMongoError:
+                    logger.exception("Bulk update batch %d failed", number)
+                    batch_matched = batch_modified = 0
+                    line["error"] = "Batch could not be written"
+                matched += batch_matched
+                modified += batch_modified
+                yield dumps({**line, "matched": batch_matched, "modified": batch_modified}) + b"\n"
+                number += 1
+        except HTTPException as exc:
+            yield dumps({"batch": number, "error": exc.detail}) + b"\n"
+        except PyMongoError:
+            # Selecting the next batch failed, so there is nothing left to continue with
+            logger.exception("Bulk update stopped at batch %d", number)
+            yield dumps({"batch": number, "error": "Selecting users failed"}) + b"\n"
+        yield dumps({"batches": number, "matched": matched, "modified": modified}) + b"\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, dict):
+        return dumps(value).decode()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+async def _export_batches(cursor) -> AsyncIterator[List[dict]]:
+    batch = []
+    async for user in cursor:
+        batch.append(user)
+        if len(batch) >= settings.USER_EXPORT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def _export_ndjson(cursor) -> AsyncIterator[bytes]:
+    async for batch in _export_batches(cursor):
+        yield b"".join(user_serializer.dump(user) + b"\n" for user in batch)
+
+async def _export_csv(cursor) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(user_serializer.fields)
+    async for batch in _export_batches(cursor):
+        for user in batch:
+            writer.writerow([_csv_value(value) for value in user_serializer.to_dict(user).values()])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", _export_ndjson),
+    "csv": ("text/csv", _export_csv),
+}
+
+@router.get("/export")
+async def export_users(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    current_admin: User = Depends(get_current_admin),
+    db = Depends(get_admin_read_db)
+):
+    """
+    Export every user (admin only) as gzip-encoded NDJSON or CSV, without password hashes.
+    Users are streamed from the cursor in _id order, so memory stays constant.
+    """
+    media_type, encode = EXPORT_FORMATS[export_format]
+    cursor = db.users.find({}, user_serializer.projection).sort(USER_LIST_SORT).batch_size(settings.USER_EXPORT_BATCH_SIZE)
+    headers = {
+        "Content-Encoding": "gzip",
+        "Content-Disposition": f'attachment; filename="users.{export_format}"',
+    }
+    return StreamingResponse(
+        gzip_stream(encode(cursor), level=settings.USER_EXPORT_GZIP_LEVEL),
+        media_type=media_type,
+        headers=headers
+    )
+
+async def _import_chunk(db, rows: List[Tuple[int, bytes]], report: dict):
+    """Validate, hash and insert one chunk of NDJSON rows, recording per-row errors"""
+    def fail(line: int, error):
+        report["failed"] += 1
+        if len(report["errors"]) < settings.USER_IMPORT_MAX_ERRORS:
+            report["errors"].append({"line": line, "error": error})
+    
+    valid = []
+    for line, raw in rows:
+        try:
+            valid.append((line, UserCreate.model_validate_json(raw)))
+        except ValidationError as exc:
+            fail(line, exc.errors(include_url=False, include_context=False, include_input=False))
+    if not valid:
+        return
+    
+    updates = [{"password": user_in.password} for _, user_in in valid]
+    hashed = await _hash_bulk_passwords(updates, return_exceptions=True)
+    lines, documents = [], []
+    for (line, user_in), update, outcome in zip(valid, updates, hashed):
+        if isinstance(outcome, HTTPException):
+            # A saturated hashing pool fails the row, not the whole import
+            fail(line, outcome.detail)
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            lines.append(line)
+            documents.append(new_user_document(user_in, update["hashed_password"]))
+    if not documents:
+        return
+    
+    try:
+        result = await db.users.insert_many(documents, ordered=False)
+        report["inserted"] += len(result.inserted_ids)
+    except BulkWriteError as exc:
+        report["inserted"] += exc.details["nInserted"]
+        for error in exc.details["writeErrors"]:
+            message = "User already exists" if error["code"] == 11000 else error["errmsg"]
+            fail(lines[error["index"]], message)
+
+@router.post("/import")
+async def import_users(
+    request: Request,
+    current_admin: User = Depends(get_current_admin),
+    db = Depends(get_db)
+):
+    """
+    Import users (admin only) from an NDJSON body of UserCreate objects, optionally
+    sent with Content-Encoding: gzip. Users are created as by registration, inactive
+    and unverified. Invalid or duplicate rows are reported by line number without
+    aborting the run; at most USER_IMPORT_MAX_ERRORS are listed. A line longer than
+    USER_IMPORT_MAX_LINE_BYTES stops the import with a 413.
+    """
+    body = request.stream()
+    if request.headers.get("content-encoding") == "gzip":
+        body = gunzip_stream(body)
+    
+    report = {"inserted": 0, "failed": 0, "errors": []}
+    rows = []
+    line = 0
+    async for raw in iter_lines(body, max_line_bytes=settings.USER_IMPORT_MAX_LINE_BYTES):
+        line += 1
+        if not raw.strip():
+            continue
+        rows.append((line, raw))
+        if len(rows) >= settings.USER_IMPORT_CHUNK_SIZE:
+            await _import_chunk(db, rows, report)
+            rows = []
+    if rows:
+        await _import_chunk(db, rows, report)
+    
+    return report
 
 @router.get("/audit-logs", response_model=List[dict])
 async def get_audit_logs(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
     user_id: Optional[str] = None,
     action: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     current_admin: User = Depends(get_current_admin),
-    db = Depends(get_db)
+    db = Depends(get_admin_read_db)
 ):
     """
-    Get audit logs (admin only)
+    Get audit logs (admin only), newest first.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page.
     """
     query = {}
     
@@ -198,12 +655,16 @@ async def get_audit_logs(
     if date_filter:
         query["timestamp"] = date_filter
     
-    logs = []
-    async for log in db.audit_logs.find(query).sort("timestamp", -1).skip(skip).limit(limit):
-        # Convert ObjectId to string for each log entry
-        log["_id"] = str(log["_id"])
-        log["user_id"] = str(log["user_id"])
-        log["admin_id"] = str(log["admin_id"])
-        logs.append(log)
+    if cursor:
+        after = decode_cursor(cursor, arity=len(AUDIT_LOG_SORT))
+        query = {"$and": [query, keyset_filter(AUDIT_LOG_SORT, after)]}
+    
+    # Fetch one extra document to learn whether there is a next page
+    logs = await db.audit_logs.find(query, AUDIT_LOG_PROJECTION).sort(AUDIT_LOG_SORT).limit(limit + 1).to_list(limit + 1)
+    
+    headers = {}
+    if len(logs) > limit:
+        logs = logs[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(logs[-1]["timestamp"], logs[-1]["_id"])
     
-    return logs
+    return JSONBytesResponse(dumps(logs), headers=headers)
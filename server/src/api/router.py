@@ -1,9 +1,10 @@
 
 from fastapi import APIRouter
-from src.api.endpoints import users, auth, storage
+from src.api.endpoints import users, auth, storage, metrics
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(storage.router, prefix="/storage", tags=["storage"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
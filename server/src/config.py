@@ -1,6 +1,6 @@
 
 from pydantic_settings import BaseSettings
-from typing import List, Literal
+from typing import Dict, List, Literal, Optional
 import os
 
 class Settings(BaseSettings):
@@ -11,21 +11,72 @@ class Settings(BaseSettings):
     # MongoDB connection
     MONGODB_URL: str = "mongodb://localhost:27017"
     DB_NAME: str = "bechdo_db"
+    # Connection pool, sized per worker process
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_MAX_CONNECTING: int = 2
+    MONGODB_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = 2000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_CONNECT_TIMEOUT_MS: int = 5000
+    MONGODB_SOCKET_TIMEOUT_MS: Optional[int] = None
+    # Read preference per endpoint group; "default" covers everything else
+    MONGODB_READ_PREFERENCES: Dict[str, str] = {
+        "default": "primary",
+        "profiles": "secondaryPreferred",
+        "admin_reads": "secondaryPreferred",
+    }
+    MONGODB_MAX_STALENESS_SECONDS: int = -1
+    # "verify" only compares the index fingerprint, "apply" also builds (single-node dev)
+    INDEX_STARTUP_MODE: Literal["verify", "apply", "off"] = "verify"
     
     # JWT settings
     JWT_SECRET: str = "CHANGE_THIS_TO_A_SECURE_SECRET"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REFRESH_TOKEN_BLACKLIST_RETENTION_HOURS: int = 24
     ALGORITHM: str = "HS256"
     
     # Storage settings
     STORAGE_MODE: Literal["s3", "local"] = "s3"
     LOCAL_STORAGE_PATH: str = "./local_storage"
+    # Store each distinct local upload once under its sha256, shared by every path that uploads it
+    LOCAL_STORAGE_DEDUP: bool = True
+    
+    # File serving: metadata index and range limits for /storage/files
+    FILE_INDEX_MAX_ENTRIES: int = 50000
+    FILE_INDEX_TTL_SECONDS: int = 60
+    FILE_SERVE_CHUNK_SIZE: int = 256 * 1024
+    FILE_MAX_RANGES: int = 16
+    
+    # Uploads: size cap, accepted content types and the chunk size files are streamed in
+    UPLOAD_MAX_BYTES: int = 100 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    UPLOAD_ALLOWED_CONTENT_TYPES: List[str] = [
+        "image/jpeg",
+        "image/png",
+        "image/gif",
+        "image/webp",
+        "application/pdf",
+    ]
     
     # AWS S3 settings
     AWS_ACCESS_KEY_ID: str = "YOUR_AWS_ACCESS_KEY"
     AWS_SECRET_ACCESS_KEY: str = "YOUR_AWS_SECRET_KEY"
     S3_BUCKET_NAME: str = "bechdo-media"
+    # Server-side uploads: part size (S3 minimum 5 MiB), parts in flight per upload, retries per part
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
+    S3_MULTIPART_CONCURRENCY: int = 4
+    S3_MULTIPART_MAX_RETRIES: int = 3
+    # Presigned upload URLs: files per batch request and URL lifetime
+    S3_PRESIGN_BATCH_MAX: int = 20
+    S3_PRESIGN_EXPIRES_SECONDS: int = 300
+    # Downloads: public buckets get plain object URLs, private ones presigned GET
+    # URLs that are reused until S3_DOWNLOAD_URL_SLACK_SECONDS before they expire
+    S3_PUBLIC_BUCKET: bool = False
+    S3_DOWNLOAD_URL_EXPIRES_SECONDS: int = 3600
+    S3_DOWNLOAD_URL_SLACK_SECONDS: int = 300
+    S3_DOWNLOAD_URL_CACHE_MAX_ENTRIES: int = 50000
     
     # Redis settings (for Celery)
     REDIS_HOST: str = "localhost"
@@ -43,6 +94,60 @@ class Settings(BaseSettings):
     EMAIL_VERIFICATION_TOKEN_EXPIRE_MINUTES: int = 60
     RATE_LIMIT_ATTEMPTS: int = 5
     RATE_LIMIT_PERIOD_SECONDS: int = 60
+    RATE_LIMIT_ACCOUNT_ATTEMPTS: int = 5
+    RATE_LIMIT_BACKEND: Literal["memory", "redis"] = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_SWEEP_INTERVAL_SECONDS: int = 60
+    
+    # Argon2 cost parameters, see scripts/calibrate_argon2.py
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    
+    # Password hashing worker pool
+    PASSWORD_HASH_POOL: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    
+    # Write-behind sink for login_history and audit_logs
+    EVENT_SINK_BATCH_SIZE: int = 500
+    EVENT_SINK_FLUSH_INTERVAL_MS: int = 200
+    EVENT_SINK_MAX_BUFFER: int = 10000
+    EVENT_SINK_WRITE_CONCERNS: Dict[str, dict] = {
+        "login_history": {"w": 1},
+        "audit_logs": {"w": "majority"},
+    }
+    
+    # In-process caches
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+    CACHE_INVALIDATION_BACKEND: Literal["memory", "redis"] = "memory"
+    TOKEN_CACHE_MAX_ENTRIES: int = 50000
+    TOKEN_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    PROFILE_CACHE_MAX_ENTRIES: int = 50000
+    PROFILE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    PROFILE_CACHE_TTL_SECONDS: int = 300
+    USER_COUNT_CACHE_MAX_ENTRIES: int = 256
+    USER_COUNT_CACHE_TTL_SECONDS: int = 60
+    
+    # Typeahead search: candidates ranked per query, and a cache of hot prefixes
+    SEARCH_CANDIDATE_LIMIT: int = 100
+    SEARCH_CACHE_MAX_ENTRIES: int = 20000
+    SEARCH_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    SEARCH_CACHE_TTL_SECONDS: int = 30
+    
+    # Bulk admin operations: users written per bulk_write
+    USER_BULK_BATCH_SIZE: int = 1000
+    
+    # User export and import
+    USER_EXPORT_BATCH_SIZE: int = 2000
+    USER_EXPORT_GZIP_LEVEL: int = 6
+    USER_IMPORT_CHUNK_SIZE: int = 1000
+    USER_IMPORT_MAX_ERRORS: int = 1000
+    USER_IMPORT_MAX_LINE_BYTES: int = 64 * 1024
+    
+    # Proxies (IPs or CIDRs) whose X-Forwarded-For header is trusted
+    TRUSTED_PROXIES: List[str] = []
     
     # CORS
     CORS_ORIGINS: List[str] = ["*"]
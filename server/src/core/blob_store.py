@@ -0,0 +1,146 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile, status
+from pymongo import ReturnDocument
+
+from src.core.uploads import storage_path, stream_to_temp
+
+# Content-addressed layout under LOCAL_STORAGE_PATH: blobs/ab/cd/abcd...
+BLOBS_DIR = "blobs"
+
+def blob_path(digest: str) -> str:
+    """Storage-relative path of a blob, fanned out over two directory levels"""
+    return os.path.join(BLOBS_DIR, digest[:2], digest[2:4], digest)
+
+def check_not_blob_path(path: str):
+    """Reject storage paths inside the blob store, which only save_blob may write"""
+    blobs_root = storage_path(BLOBS_DIR)
+    absolute = storage_path(path)
+    if absolute == blobs_root or absolute.startswith(blobs_root + os.sep):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid file path"
+        )
+
+def _commit_blob(temp_path: str, destination: str):
+    # Always moved into place: the bytes are identical to any existing copy, and a
+    # concurrent release may have just moved that copy aside
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(temp_path, destination)
+
+def _unlink_blob(destination: str):
+    try:
+        os.remove(destination)
+    except FileNotFoundError:
+        pass
+
+def _move_aside(destination: str, aside: str) -> bool:
+    try:
+        os.replace(destination, aside)
+    except FileNotFoundError:
+        return False
+    return True
+
+async def _acquire_blob(db, digest: str, size: int, content_type: Optional[str]) -> bool:
+    """Take one reference to a blob, creating its document; True if the blob is new"""
+    result = await db.file_blobs.update_one(
+        {"_id": digest},
+        {
+            "$inc": {"refcount": 1},
+            "$setOnInsert": {"size": size, "content_type": content_type, "created_at": datetime.utcnow()},
+        },
+        upsert=True
+    )
+    return result.upserted_id is not None
+
+async def save_blob(db, file: UploadFile, **limits) -> dict:
+    """
+    Stream an upload into the blob store, hashing it on the way in, and take a
+    reference to the blob for the caller to hand to add_file_ref.
+    The reference is taken before the file is moved into place, so a concurrent
+    release of the same content cannot delete it in between.
+    Returns size, sha256 and whether a new blob was created.
+    """
+    temp_dir = storage_path(os.path.join(BLOBS_DIR, "tmp"))
+    temp_path, size, digest = await stream_to_temp(file, temp_dir, **limits)
+    try:
+        created = await _acquire_blob(db, digest, size, file.content_type)
+    except BaseException:
+        await asyncio.to_thread(_unlink_blob, temp_path)
+        raise
+    try:
+        await asyncio.to_thread(_commit_blob, temp_path, storage_path(blob_path(digest)))
+    except Exception:
+        await asyncio.to_thread(_unlink_blob, temp_path)
+        await release_blob(db, digest)
+        raise
+    return {"size": size, "sha256": digest, "created": created}
+
+async def add_file_ref(db, path: str, blob: dict, user_id: str, filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """
+    Point `path` at a blob stored by save_blob, handing over the reference it
+    took. Returns the digest of the blob previously at `path`, whose reference
+    the caller must release once the new one is in place.
+    """
+    previous = await db.file_refs.find_one_and_replace(
+        {"_id": path},
+        {
+            "digest": blob["sha256"],
+            "size": blob["size"],
+            "content_type": content_type,
+            "filename": filename,
+            "user_id": user_id,
+            "created_at": datetime.utcnow(),
+        },
+        upsert=True
+    )
+    return previous["digest"] if previous is not None else None
+
+async def release_blob(db, digest: str):
+    """Drop one reference to a blob, deleting its file when none remain"""
+    blob = await db.file_blobs.find_one_and_update(
+        {"_id": digest},
+        {"$inc": {"refcount": -1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if blob is None or blob["refcount"] > 0:
+        return
+    
+    # The file is moved aside before the conditional delete. An upload that takes a
+    # reference meanwhile makes the delete miss, and the file is put back (the
+    # upload also writes its own identical copy). Requests for it in that window
+    # may briefly get a 404.
+    destination = storage_path(blob_path(digest))
+    aside = storage_path(os.path.join(BLOBS_DIR, "tmp", f"{digest}.{uuid.uuid4().hex}.released"))
+    moved = await asyncio.to_thread(_move_aside, destination, aside)
+    result = await db.file_blobs.delete_one({"_id": digest, "refcount": {"$lte": 0}})
+    if not moved:
+        return
+    if result.deleted_count:
+        await asyncio.to_thread(_unlink_blob, aside)
+    else:
+        await asyncio.to_thread(_commit_blob, aside, destination)
+
+async def resolve_file(db, path: str) -> Optional[dict]:
+    """File reference for a storage path, or None for paths stored outside the blob store"""
+    return await db.file_refs.find_one({"_id": path})
+
+async def space_report(db) -> dict:
+    """Logical bytes referenced by paths versus physical bytes stored as blobs"""
+    totals = await db.file_blobs.aggregate([
+        {"$group": {
+            "_id": None,
+            "blobs": {"$sum": 1},
+            "references": {"$sum": "$refcount"},
+            "stored_bytes": {"$sum": "$size"},
+            "logical_bytes": {"$sum": {"$multiply": ["$size", "$refcount"]}},
+        }},
+    ]).to_list(1)
+    report = totals[0] if totals else {"blobs": 0, "references": 0, "stored_bytes": 0, "logical_bytes": 0}
+    report.pop("_id", None)
+    report["saved_bytes"] = report["logical_bytes"] - report["stored_bytes"]
+    return report
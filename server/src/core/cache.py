@@ -0,0 +1,90 @@
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+class LRUCache:
+    """
+    Bounded in-process LRU cache with per-entry expiry and hit/miss counters.
+    Optionally bounded by total size as well, using a caller supplied sizeof.
+    Not thread safe; meant to be used from the event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        # key -> (value, expires_at, size)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is not None:
+            value, expires_at, _ = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            self._remove(key)
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store value; ttl overrides the cache default for this entry"""
+        ttl = self.ttl_seconds if ttl is None else ttl
+        if ttl is not None and ttl <= 0:
+            self._remove(key)
+            return
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            self._remove(key)
+            return
+
+        self._remove(key)
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (value, expires_at, size)
+        self._bytes += size
+
+        while len(self._data) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def delete(self, key: Hashable):
+        self._remove(key)
+
+    def clear(self):
+        self._data.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
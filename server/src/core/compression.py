@@ -0,0 +1,66 @@
+import zlib
+from typing import AsyncIterable, AsyncIterator, Optional
+
+from fastapi import HTTPException, status
+
+# zlib window bits selecting the gzip container
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+async def gzip_stream(chunks: AsyncIterable[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Gzip a byte stream on the fly; zlib keeps only its window, so memory stays constant"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+async def gunzip_stream(chunks: AsyncIterable[bytes], max_chunk_bytes: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """
+    Inverse of gzip_stream. Output is yielded at most max_chunk_bytes at a time,
+    so a small, highly compressed body never expands in memory all at once.
+    """
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+    async for chunk in chunks:
+        while chunk:
+            decompressed = decompressor.decompress(chunk, max_chunk_bytes)
+            if decompressed:
+                yield decompressed
+            chunk = decompressor.unconsumed_tail
+    remainder = decompressor.flush()
+    if remainder:
+        yield remainder
+
+async def iter_lines(chunks: AsyncIterable[bytes], max_line_bytes: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    Split a byte stream into lines without buffering more than one partial line.
+    The partial line grows in place, so a line spanning many chunks costs linear time;
+    lines longer than max_line_bytes are refused with a 413.
+    """
+    partial = bytearray()
+    
+    def check(length: int):
+        if max_line_bytes is not None and length > max_line_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Line exceeds the {max_line_bytes} byte limit"
+            )
+    
+    async for chunk in chunks:
+        start = 0
+        end = chunk.find(b"\n")
+        while end >= 0:
+            if partial:
+                partial += chunk[start:end]
+                line = bytes(partial)
+                partial.clear()
+            else:
+                line = chunk[start:end]
+            check(len(line))
+            yield line
+            start = end + 1
+            end = chunk.find(b"\n", start)
+        partial += chunk[start:]
+        check(len(partial))
+    if partial:
+        yield bytes(partial)
@@ -0,0 +1,155 @@
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from pymongo.errors import BulkWriteError, PyMongoError
+from pymongo.write_concern import WriteConcern
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class EventSink:
+    """
+    Write-behind buffer for append-only records such as login history and audit logs.
+    Records are queued in memory and written with insert_many(ordered=False) once
+    batch_size records are waiting or flush_interval has passed. A full buffer makes
+    emit() wait, which pushes back on the request path instead of growing memory.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval: float,
+        max_buffer: int,
+        write_concerns: Optional[Dict[str, dict]] = None,
+        max_retries: int = 3,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.write_concerns = write_concerns or {}
+        self.max_retries = max_retries
+        self._db = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    async def start(self, db):
+        self._db = db
+        self._queue = asyncio.Queue(maxsize=self.max_buffer)
+        self._worker = asyncio.create_task(self._run())
+
+    async def emit(self, collection: str, document: dict):
+        """Queue a document for insertion, waiting while the buffer is full"""
+        if self._worker is None:
+            raise RuntimeError("Event sink is not running")
+        self._restart_if_dead()
+        await self._queue.put((collection, document))
+
+    def _restart_if_dead(self):
+        """Replace a writer that died, so a full buffer cannot block emit() forever"""
+        worker = self._worker
+        if worker.done() and not worker.cancelled() and worker.exception() is not None:
+            logger.error("Event sink writer died, restarting it", exc_info=worker.exception())
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything queued so far and stop the writer"""
+        if self._worker is None:
+            return
+        self._restart_if_dead()
+        await self._queue.put(_STOP)
+        await self._worker
+        self._worker = None
+
+    async def _run(self):
+        batches: Dict[str, List[dict]] = defaultdict(list)
+        pending = 0
+        deadline = None
+        stopping = False
+
+        while not stopping:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                collection, document = item
+                batches[collection].append(document)
+                pending += 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            due = deadline is not None and time.monotonic() >= deadline
+            if pending and (stopping or due or pending >= self.batch_size):
+                try:
+                    await self._flush(batches)
+                except Exception:
+                    # Never let one bad batch end the writer
+                    logger.exception("Event sink: dropping a batch of %d records", pending)
+                    self.dropped += pending
+                batches = defaultdict(list)
+                pending = 0
+                deadline = None
+
+    async def _flush(self, batches: Dict[str, List[dict]]):
+        await asyncio.gather(*(
+            self._insert(collection, documents) for collection, documents in batches.items()
+        ))
+
+    async def _insert(self, collection: str, documents: List[dict]):
+        write_concern = WriteConcern(**self.write_concerns.get(collection, {}))
+        target = self._db[collection].with_options(write_concern=write_concern)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                await target.insert_many(documents, ordered=False)
+                self.written += len(documents)
+                return
+            except BulkWriteError as e:
+                # ordered=False inserts everything it can; retrying would duplicate those rows
+                failed = len(e.details.get("writeErrors", []))
+                self.written += len(documents) - failed
+                self.dropped += failed
+                logger.error("Event sink: %d %s records rejected: %s", failed, collection, e)
+                return
+            except PyMongoError as e:
+                if attempt == self.max_retries:
+                    self.dropped += len(documents)
+                    logger.error("Event sink: dropping %d %s records: %s", len(documents), collection, e)
+                    return
+                await asyncio.sleep(0.1 * 2 ** attempt)
+            except Exception:
+                # Not retryable, e.g. bson InvalidDocument for a record that cannot be encoded
+                self.dropped += len(documents)
+                logger.exception("Event sink: dropping %d %s records", len(documents), collection)
+                return
+
+    def stats(self) -> dict:
+        return {
+            "buffered": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+event_sink = EventSink(
+    batch_size=settings.EVENT_SINK_BATCH_SIZE,
+    flush_interval=settings.EVENT_SINK_FLUSH_INTERVAL_MS / 1000,
+    max_buffer=settings.EVENT_SINK_MAX_BUFFER,
+    write_concerns=settings.EVENT_SINK_WRITE_CONCERNS,
+)
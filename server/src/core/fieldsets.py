@@ -0,0 +1,24 @@
+from typing import FrozenSet, Iterable, Optional
+
+from fastapi import HTTPException, status
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[FrozenSet[str]]:
+    """
+    Parse a comma separated fields= parameter into a set of field names.
+    Returns None when the parameter is absent; raises a 400 for fields outside `allowed`.
+    """
+    if fields is None:
+        return None
+    requested = frozenset(name.strip() for name in fields.split(",") if name.strip())
+    if not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="fields must name at least one field"
+        )
+    forbidden = requested.difference(allowed)
+    if forbidden:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown or forbidden fields: {', '.join(sorted(forbidden))}"
+        )
+    return requested
@@ -0,0 +1,238 @@
+import asyncio
+import mimetypes
+import os
+import re
+import secrets
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, List, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from src.config import settings
+from src.core.blob_store import blob_path
+from src.core.cache import LRUCache
+from src.core.conditional import etag_matches
+from src.core.invalidation import invalidation_bus
+
+FILES_CHANNEL = "files"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+_DIGEST_NAME = re.compile(r"^[0-9a-f]{64}$")
+_RANGE_SPEC = re.compile(r"^\s*(\d*)\s*-\s*(\d*)\s*$")
+
+class FileMeta(NamedTuple):
+    """Everything needed to answer a request for a stored file short of reading it"""
+    path: str
+    size: int
+    mtime: float
+    etag: str
+    last_modified: str
+    media_type: str
+    cache_control: str
+    digest: Optional[str] = None
+
+# Metadata by storage-relative request path; uploads publish on FILES_CHANNEL
+file_index = LRUCache(
+    max_entries=settings.FILE_INDEX_MAX_ENTRIES,
+    ttl_seconds=settings.FILE_INDEX_TTL_SECONDS,
+)
+
+invalidation_bus.subscribe(FILES_CHANNEL, file_index.delete)
+
+async def invalidate_file(path: str) -> None:
+    """Drop a storage path from every worker's file index after it is written"""
+    await invalidation_bus.publish(FILES_CHANNEL, path)
+
+def is_immutable_path(path: str) -> bool:
+    """
+    Whether a storage path names its own content. Only blob paths do: any other
+    path, generated names included, can be rewritten through /local-upload.
+    """
+    name = os.path.basename(path)
+    return bool(_DIGEST_NAME.match(name)) and os.path.normpath(path) == blob_path(name)
+
+def _stat(path: str) -> Optional[os.stat_result]:
+    try:
+        result = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return result if os.path.isfile(path) else None
+
+async def build_file_meta(
+    request_path: str,
+    file_path: str,
+    media_type: Optional[str] = None,
+    digest: Optional[str] = None,
+) -> Optional[FileMeta]:
+    """
+    Stat a file once and derive its validators. Content-addressed files use
+    their digest as ETag; others use mtime and size, which change on rewrite.
+    Returns None when the file does not exist.
+    """
+    stat = await asyncio.to_thread(_stat, file_path)
+    if stat is None:
+        return None
+    if digest:
+        etag = f'"{digest}"'
+    else:
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    return FileMeta(
+        path=file_path,
+        size=stat.st_size,
+        mtime=stat.st_mtime,
+        etag=etag,
+        last_modified=formatdate(stat.st_mtime, usegmt=True),
+        media_type=media_type or mimetypes.guess_type(request_path)[0] or "application/octet-stream",
+        cache_control=IMMUTABLE_CACHE_CONTROL if is_immutable_path(request_path) else REVALIDATE_CACHE_CONTROL,
+        digest=digest,
+    )
+
+async def is_current(meta: FileMeta, digest: Optional[str] = None) -> bool:
+    """
+    Whether cached metadata still describes what its path serves. `digest` is the
+    blob the path's file ref points at now, if any: blobs never change, so a
+    deduplicated path is current while it points at the same one. Other files
+    must still have the size and mtime the metadata was built from.
+    Other workers' indexes only learn of rewrites through the invalidation bus,
+    which is per process by default.
+    """
+    if meta.digest or digest:
+        return meta.digest == digest
+    stat = await asyncio.to_thread(_stat, meta.path)
+    return stat is not None and stat.st_size == meta.size and stat.st_mtime == meta.mtime
+
+def _not_modified(request: Request, meta: FileMeta) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, meta.etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(meta.mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def parse_ranges(header: Optional[str], size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Inclusive byte ranges of a Range header, clamped to the file.
+    None means serve the whole file (no, malformed or too many ranges);
+    an empty list means no range is satisfiable.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    specs = header[len("bytes="):].split(",")
+    if len(specs) > settings.FILE_MAX_RANGES:
+        return None
+    ranges = []
+    for spec in specs:
+        match = _RANGE_SPEC.match(spec)
+        if not match or match.groups() == ("", ""):
+            return None
+        first, last = match.groups()
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0:
+                continue
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(first)
+            if last and int(last) < start:
+                return None
+            if start >= size:
+                continue
+            end = min(int(last), size - 1) if last else size - 1
+        ranges.append((start, end))
+    return ranges
+
+def _if_range_matches(request: Request, meta: FileMeta) -> bool:
+    if_range = request.headers.get("if-range")
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == meta.etag
+    return if_range == meta.last_modified
+
+def _read(path: str, start: int, length: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(length)
+
+async def _stream_ranges(path: str, ranges: List[Tuple[int, int]], parts: Optional[List[bytes]] = None) -> AsyncIterator[bytes]:
+    """File slices read on a worker thread, each preceded by its multipart header if given"""
+    chunk_size = settings.FILE_SERVE_CHUNK_SIZE
+    for i, (start, end) in enumerate(ranges):
+        if parts:
+            yield parts[i]
+        position = start
+        while position <= end:
+            length = min(chunk_size, end + 1 - position)
+            yield await asyncio.to_thread(_read, path, position, length)
+            position += length
+        if parts:
+            yield b"\r\n"
+    if parts:
+        yield parts[-1]
+
+async def file_response(request: Request, meta: FileMeta) -> Response:
+    """
+    Serve a file with ETag, Last-Modified and Cache-Control, answering
+    conditional requests with 304 and Range requests with 206 (single range)
+    or multipart/byteranges (several), or 416 when nothing is satisfiable.
+    """
+    headers = {
+        "ETag": meta.etag,
+        "Last-Modified": meta.last_modified,
+        "Cache-Control": meta.cache_control,
+        "Accept-Ranges": "bytes",
+    }
+    if _not_modified(request, meta):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    ranges = parse_ranges(request.headers.get("range"), meta.size)
+    if ranges is not None and not _if_range_matches(request, meta):
+        ranges = None
+    
+    if ranges is None:
+        headers["Content-Length"] = str(meta.size)
+        if meta.size <= settings.FILE_SERVE_CHUNK_SIZE:
+            body = await asyncio.to_thread(_read, meta.path, 0, meta.size)
+            return Response(body, media_type=meta.media_type, headers=headers)
+        return StreamingResponse(_stream_ranges(meta.path, [(0, meta.size - 1)]), media_type=meta.media_type, headers=headers)
+    
+    if not ranges:
+        headers["Content-Range"] = f"bytes */{meta.size}"
+        return Response(status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE, headers=headers)
+    
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end}/{meta.size}"
+        headers["Content-Length"] = str(end + 1 - start)
+        return StreamingResponse(
+            _stream_ranges(meta.path, ranges),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=meta.media_type,
+            headers=headers
+        )
+    
+    boundary = secrets.token_hex(16)
+    parts = [
+        (
+            f"--{boundary}\r\nContent-Type: {meta.media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{meta.size}\r\n\r\n"
+        ).encode()
+        for start, end in ranges
+    ]
+    parts.append(f"--{boundary}--\r\n".encode())
+    length = sum(len(part) for part in parts) + sum(end + 1 - start + 2 for start, end in ranges)
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(
+        _stream_ranges(meta.path, ranges, parts),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers=headers
+    )
@@ -0,0 +1,85 @@
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from src.config import settings
+
+class HashPoolSaturated(Exception):
+    """Raised when the hashing pool already has its maximum amount of queued work"""
+
+class HashPool:
+    """
+    Bounded executor for CPU-heavy password hashing.
+    Work beyond max_pending is refused immediately instead of queueing,
+    so a login burst degrades into fast rejections rather than a growing backlog.
+    """
+
+    def __init__(self, kind: str, workers: int, max_pending: int):
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hash",
+                )
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) on the pool, raising HashPoolSaturated when full"""
+        # Only touched from the event loop thread, so no lock is needed
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HashPoolSaturated()
+
+        loop = asyncio.get_running_loop()
+        job = self._get_executor().submit(func, *args)
+        self._pending += 1
+        # Released when the job itself ends, not when the caller stops waiting:
+        # a cancelled request (client disconnect) does not stop a running hash
+        job.add_done_callback(lambda _: self._release(loop))
+        return await asyncio.wrap_future(job)
+
+    def _release(self, loop: asyncio.AbstractEventLoop):
+        # Runs on the executor's thread; hand the decrement back to the event loop
+        try:
+            loop.call_soon_threadsafe(self._decrement)
+        except RuntimeError:
+            # The loop has closed, so nothing can be waiting on the count
+            self._decrement()
+
+    def _decrement(self):
+        self._pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+hash_pool = HashPool(
+    kind=settings.PASSWORD_HASH_POOL,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,142 @@
+
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, List
+
+import orjson
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from src.config import settings
+from src.core import refresh_tokens
+
+logger = logging.getLogger(__name__)
+
+# Single source of truth for every index the application relies on.
+# Keyset pagination relies on every sort ending in _id.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("username", ASCENDING)], unique=True),
+        # Lowercased email and username, so login is a single equality lookup
+        IndexModel(
+            [("login_keys", ASCENDING)],
+            name="login_keys_unique",
+            unique=True,
+            partialFilterExpression={"login_keys": {"$exists": True}},
+        ),
+        # Admin listing filters, each ending in _id for keyset pagination
+        IndexModel([("role", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("is_active", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("role", ASCENDING), ("is_active", ASCENDING), ("_id", ASCENDING)]),
+        # Typeahead search on username and full name edge n-grams
+        IndexModel([("search_tokens", ASCENDING), ("is_active", ASCENDING), ("role", ASCENDING)]),
+    ],
+    "refresh_tokens": refresh_tokens.INDEXES,
+    "login_history": [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)]),
+    ],
+    "audit_logs": [
+        IndexModel([("timestamp", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("action", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([
+            ("user_id", ASCENDING),
+            ("action", ASCENDING),
+            ("timestamp", DESCENDING),
+            ("_id", DESCENDING),
+        ]),
+    ],
+}
+
+# Options that change what an index is; anything else (v, ns, ...) is server bookkeeping
+_SPEC_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression", "collation")
+
+SCHEMA_COLLECTION = "schema_migrations"
+INDEXES_DOCUMENT_ID = "indexes"
+
+def index_spec(document: dict) -> dict:
+    """Comparable form of an index, from an IndexModel document or a listIndexes entry"""
+    spec = {"key": [[field, direction] for field, direction in document["key"].items()]}
+    for option in _SPEC_OPTIONS:
+        value = document.get(option)
+        # Identity checks: expireAfterSeconds=0 is a TTL index, and 0 == False
+        if value is not None and value is not False:
+            spec[option] = value
+    return spec
+
+def registry_specs() -> Dict[str, Dict[str, dict]]:
+    """collection -> index name -> spec, as declared in INDEXES"""
+    return {
+        collection: {model.document["name"]: index_spec(model.document) for model in models}
+        for collection, models in INDEXES.items()
+    }
+
+def registry_fingerprint() -> str:
+    canonical = orjson.dumps(registry_specs(), option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(canonical).hexdigest()
+
+async def diff_indexes(db) -> Dict[str, Dict[str, list]]:
+    """
+    Compare the registry with the live database.
+    Returns collection -> {"create": [names], "replace": [names], "extra": [names]}.
+    """
+    changes = {}
+    for collection, declared in registry_specs().items():
+        live = {}
+        async for document in db[collection].list_indexes():
+            if document["name"] != "_id_":
+                live[document["name"]] = index_spec(document)
+
+        create = [name for name in declared if name not in live]
+        replace = [name for name in declared if name in live and live[name] != declared[name]]
+        extra = [name for name in live if name not in declared]
+        if create or replace or extra:
+            changes[collection] = {"create": create, "replace": replace, "extra": extra}
+    return changes
+
+async def apply_indexes(db, prune: bool = False, commit_quorum=None, log=logger.info):
+    """
+    Bring the live database in line with the registry, one index build at a time
+    so the primary never runs more than a single build, then record the fingerprint.
+    """
+    models = {
+        collection: {model.document["name"]: model for model in indexes}
+        for collection, indexes in INDEXES.items()
+    }
+    build_options = {"commitQuorum": commit_quorum} if commit_quorum is not None else {}
+
+    for collection, change in (await diff_indexes(db)).items():
+        for name in change["replace"]:
+            log(f"{collection}: dropping {name} to rebuild it")
+            await db[collection].drop_index(name)
+        for name in change["replace"] + change["create"]:
+            log(f"{collection}: building {name}")
+            await db[collection].create_indexes([models[collection][name]], **build_options)
+        if prune:
+            for name in change["extra"]:
+                log(f"{collection}: dropping unregistered index {name}")
+                await db[collection].drop_index(name)
+
+    await db[SCHEMA_COLLECTION].update_one(
+        {"_id": INDEXES_DOCUMENT_ID},
+        {"$set": {"fingerprint": registry_fingerprint(), "applied_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+async def check_indexes(db):
+    """
+    Startup check: a single read comparing the recorded fingerprint with the registry.
+    Index builds are left to scripts/migrate_indexes unless INDEX_STARTUP_MODE is "apply".
+    """
+    if settings.INDEX_STARTUP_MODE == "off":
+        return
+
+    recorded = await db[SCHEMA_COLLECTION].find_one({"_id": INDEXES_DOCUMENT_ID})
+    if recorded and recorded.get("fingerprint") == registry_fingerprint():
+        return
+
+    if settings.INDEX_STARTUP_MODE == "apply":
+        await apply_indexes(db)
+    else:
+        logger.warning("Database indexes are out of date, run `python -m scripts.migrate_indexes apply`")
@@ -0,0 +1,119 @@
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str], None]
+
+class InvalidationBus(ABC):
+    """
+    Fan-out of cache invalidation messages.
+    Handlers are plain callables registered per channel and receive the key to drop.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+
+    def subscribe(self, channel: str, handler: Handler):
+        self._handlers[channel].append(handler)
+
+    def _dispatch(self, channel: str, key: str):
+        for handler in self._handlers.get(channel, []):
+            handler(key)
+
+    @abstractmethod
+    async def publish(self, channel: str, key: str):
+        """Drop key from every subscriber of channel"""
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+class MemoryInvalidationBus(InvalidationBus):
+    """Single-process bus, used in development and tests"""
+
+    async def publish(self, channel: str, key: str):
+        self._dispatch(channel, key)
+
+class RedisInvalidationBus(InvalidationBus):
+    """Bus backed by Redis pub/sub so invalidations reach every worker and node"""
+
+    def __init__(self, url: str, prefix: str = "invalidate", client=None, max_backoff: float = 30.0):
+        super().__init__()
+        self.url = url
+        self.prefix = prefix
+        self.max_backoff = max_backoff
+        self._redis = client
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._redis is None:
+            import redis.asyncio as redis
+
+            self._redis = redis.from_url(self.url)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        """Subscribe and dispatch forever, resubscribing with backoff whenever the connection drops"""
+        offset = len(self.prefix) + 1
+        backoff = 0.1
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.psubscribe(f"{self.prefix}:*")
+                backoff = 0.1
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    channel = message["channel"].decode()[offset:]
+                    self._dispatch(channel, message["data"].decode())
+                logger.warning("Invalidation subscription ended, resubscribing in %.1fs", backoff)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Until resubscribed, other workers' writes only expire from caches by TTL
+                logger.exception("Invalidation subscription failed, resubscribing in %.1fs", backoff)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def publish(self, channel: str, key: str):
+        # Drop locally right away; the echo from Redis is a harmless second delete
+        self._dispatch(channel, key)
+        if self._redis is not None:
+            try:
+                await self._redis.publish(f"{self.prefix}:{channel}", key)
+            except Exception:
+                # The write this follows has committed; other workers catch up by TTL
+                logger.exception("Publishing invalidation of %s:%s failed", channel, key)
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+def create_invalidation_bus() -> InvalidationBus:
+    if settings.CACHE_INVALIDATION_BACKEND == "redis":
+        return RedisInvalidationBus(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/1")
+    return MemoryInvalidationBus()
+
+invalidation_bus = create_invalidation_bus()
@@ -0,0 +1,167 @@
+
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+
+from src.config import settings
+
+# Upper bounds, in milliseconds, of the latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf"))
+
+class LatencyStats:
+    """Count, total, max and a fixed-bucket histogram of durations"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+
+    def record(self, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, duration_ms)] += 1
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "buckets_ms": {
+                ("inf" if bound == float("inf") else str(bound)): count
+                for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)
+            },
+        }
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Connection pool instrumentation: how long requests wait for a connection,
+    how many connections are open and in use, and how often checkout fails.
+    Events arrive from driver threads, so updates are guarded by a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkout_wait = LatencyStats()
+        self.checkout_failures = defaultdict(int)
+        self.open_connections = defaultdict(int)
+        self.in_use = defaultdict(int)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checkout_wait.record(event.duration * 1000)
+            self.in_use[event.address] += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_wait.record(event.duration * 1000)
+            self.checkout_failures[event.reason] += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use[event.address] -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections[event.address] += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections[event.address] -= 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checkout_wait": self.checkout_wait.stats(),
+                "checkout_failures": dict(self.checkout_failures),
+                "open_connections": {f"{host}:{port}": n for (host, port), n in self.open_connections.items()},
+                "in_use": {f"{host}:{port}": n for (host, port), n in self.in_use.items()},
+            }
+
+class CommandMetrics(monitoring.CommandListener):
+    """Latency per command name, plus failure counts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: Dict[str, LatencyStats] = defaultdict(LatencyStats)
+        self.failures = defaultdict(int)
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        with self._lock:
+            self.latency[event.command_name].record(event.duration_micros / 1000)
+
+    def failed(self, event):
+        with self._lock:
+            self.latency[event.command_name].record(event.duration_micros / 1000)
+            self.failures[event.command_name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "latency": {name: stats.stats() for name, stats in self.latency.items()},
+                "failures": dict(self.failures),
+            }
+
+pool_metrics = PoolMetrics()
+command_metrics = CommandMetrics()
+
+def create_client() -> AsyncIOMotorClient:
+    """Motor client with pool sizing and timeouts from Settings"""
+    options = {
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "maxConnecting": settings.MONGODB_MAX_CONNECTING,
+        "maxIdleTimeMS": settings.MONGODB_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGODB_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGODB_SOCKET_TIMEOUT_MS,
+    }
+    return AsyncIOMotorClient(
+        settings.MONGODB_URL,
+        event_listeners=[pool_metrics, command_metrics],
+        **{name: value for name, value in options.items() if value is not None}
+    )
+
+def read_preference(name: str):
+    """Read preference from a name such as "secondaryPreferred" """
+    mode = read_pref_mode_from_name(name)
+    # Primary reads cannot be stale, and pymongo rejects a staleness bound on them
+    max_staleness = settings.MONGODB_MAX_STALENESS_SECONDS if name != "primary" else -1
+    return make_read_preference(mode, None, max_staleness)
+
+def group_databases(db) -> dict:
+    """Database handles per endpoint group, each with its configured read preference"""
+    groups = {"default": db}
+    groups.update({
+        group: db.with_options(read_preference=read_preference(name))
+        for group, name in settings.MONGODB_READ_PREFERENCES.items()
+    })
+    return groups
@@ -0,0 +1,58 @@
+
+import base64
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import orjson
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque continuation token for the sort key values of the last returned document"""
+    encoded = []
+    for value in values:
+        if isinstance(value, ObjectId):
+            encoded.append({"o": str(value)})
+        elif isinstance(value, datetime):
+            encoded.append({"d": value.isoformat()})
+        else:
+            encoded.append(value)
+    return base64.urlsafe_b64encode(orjson.dumps(encoded)).decode().rstrip("=")
+
+def decode_cursor(cursor: str, arity: int) -> List[Any]:
+    """Inverse of encode_cursor; raises a 400 for tokens we did not issue"""
+    try:
+        raw = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        values = []
+        for value in raw:
+            if isinstance(value, dict) and "o" in value:
+                values.append(ObjectId(value["o"]))
+            elif isinstance(value, dict) and "d" in value:
+                values.append(datetime.fromisoformat(value["d"]))
+            elif isinstance(value, (dict, list)):
+                # Would reach the query as an operator document, e.g. {"$ne": null}
+                raise ValueError("Unexpected cursor value")
+            else:
+                values.append(value)
+        if len(values) != arity:
+            raise ValueError("Cursor arity mismatch")
+        return values
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def keyset_filter(sort: List[Tuple[str, int]], after: List[Any]) -> Dict[str, Any]:
+    """
+    Filter matching documents strictly after `after` in `sort` order, e.g. for
+    [("timestamp", -1), ("_id", -1)]: timestamp < t OR (timestamp == t AND _id < id)
+    """
+    branches = []
+    for i, (field, direction) in enumerate(sort):
+        branch = {prefix: after[j] for j, (prefix, _) in enumerate(sort[:i])}
+        branch[field] = {"$lt" if direction < 0 else "$gt": after[i]}
+        branches.append(branch)
+    return branches[0] if len(branches) == 1 else {"$or": branches}
@@ -0,0 +1,47 @@
+
+import hashlib
+from datetime import datetime
+from typing import Iterable, Optional
+
+from src.config import settings
+from src.core.cache import LRUCache
+from src.core.invalidation import invalidation_bus
+from src.core.user_cache import USERS_CHANNEL
+
+class ProfileCache(LRUCache):
+    """
+    Serialized public profile responses keyed by user id, stored as (etag, body bytes).
+    Tracks conditional requests answered with 304 and the body bytes they saved.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.not_modified = 0
+        self.bytes_saved = 0
+
+    def record_not_modified(self, body: bytes):
+        self.not_modified += 1
+        self.bytes_saved += len(body)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["not_modified"] = self.not_modified
+        stats["bytes_saved"] = self.bytes_saved
+        return stats
+
+def profile_etag(user_id, updated_at: Optional[datetime], fields: Iterable[str] = ()) -> str:
+    """Strong ETag that changes whenever the user document is updated, distinct per fieldset"""
+    variant = f"{user_id}:{updated_at}"
+    if fields:
+        variant += ":" + ",".join(sorted(fields))
+    digest = hashlib.sha256(variant.encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+profile_cache = ProfileCache(
+    max_entries=settings.PROFILE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PROFILE_CACHE_TTL_SECONDS,
+    max_bytes=settings.PROFILE_CACHE_MAX_BYTES,
+    sizeof=lambda entry: len(entry[0]) + len(entry[1]) + 100,
+)
+
+invalidation_bus.subscribe(USERS_CHANNEL, profile_cache.delete)
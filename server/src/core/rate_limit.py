@@ -1,67 +1,313 @@
 
-from functools import wraps
-from fastapi import HTTPException, Request, status
-import time
 import asyncio
+import ipaddress
+import logging
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from fastapi import status
+from fastapi.responses import JSONResponse
 from src.config import settings
 
-# Simple in-memory rate limiting store
-# For production, use Redis or similar
-rate_limit_store = {}
-
-def rate_limited():
-    """Rate limit decorator for API endpoints"""
-    def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            # Get the IP from the request object
-            request = None
-            for arg in args:
-                if isinstance(arg, Request):
-                    request = arg
-                    break
-                    
-            if not request and "request" in kwargs:
-                request = kwargs["request"]
-                
-            if request:
-                ip = request.client.host
-            else:
-                ip = "unknown"
-                
-            # Generate a key based on the function and IP
-            key = f"{func.__name__}:{ip}"
-            
-            current_time = time.time()
-            
-            # Initialize or clean up old entries
-            if key not in rate_limit_store or current_time - rate_limit_store[key]["start"] > settings.RATE_LIMIT_PERIOD_SECONDS:
-                rate_limit_store[key] = {
-                    "count": 0,
-                    "start": current_time
-                }
-                
-            # Increment count
-            rate_limit_store[key]["count"] += 1
-            
-            # Check if rate limit exceeded
-            if rate_limit_store[key]["count"] > settings.RATE_LIMIT_ATTEMPTS:
-                time_passed = current_time - rate_limit_store[key]["start"]
-                wait_time = settings.RATE_LIMIT_PERIOD_SECONDS - time_passed
-                
-                if wait_time > 0:
-                    # Add jitter to prevent time-based attacks
-                    wait_time = wait_time + (wait_time * 0.1)
-                    
-                    # For very sensitive endpoints, uncomment to add delay
-                    # await asyncio.sleep(wait_time)
-                    
-                    raise HTTPException(
+logger = logging.getLogger(__name__)
+
+class RateLimitBackend:
+    """
+    Generic cell rate algorithm (GCRA) limiter.
+    Allows `limit` requests per `period` with the same burst, and stores a single
+    timestamp per key: the theoretical arrival time (TAT) of the next request.
+    """
+
+    async def hit(self, key: str, limit: int, period: float) -> Tuple[bool, float]:
+        """Count a request against key. Returns (allowed, seconds until next allowed request)"""
+        return await self.hit_all([(key, limit, period)])
+
+    async def hit_all(self, hits: List[Tuple[str, int, float]]) -> Tuple[bool, float]:
+        """
+        Count a request against several (key, limit, period) budgets at once: either
+        every budget allows it and all are spent, or none is spent. The retry delay
+        is the longest of the rejecting budgets.
+        """
+        raise NotImplementedError
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process limiter with a bounded key table.
+    Least recently used keys are evicted once max_keys is reached, and a
+    periodic sweeper drops keys whose budget has fully replenished.
+    """
+
+    def __init__(self, max_keys: int, sweep_interval: float):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        # key -> theoretical arrival time, oldest first
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    async def hit_all(self, hits: List[Tuple[str, int, float]]) -> Tuple[bool, float]:
+        now = time.monotonic()
+        new_tats = []
+        retry_after = 0.0
+        for key, limit, period in hits:
+            tat = max(self._tats.get(key, now), now)
+            new_tat = tat + period / limit
+            retry_after = max(retry_after, new_tat - period - now)
+            new_tats.append((key, new_tat))
+        if retry_after > 0:
+            return False, retry_after
+
+        for key, new_tat in new_tats:
+            self._tats[key] = new_tat
+            self._tats.move_to_end(key)
+            if len(self._tats) > self.max_keys:
+                self._tats.popitem(last=False)
+                self.evictions += 1
+        return True, 0.0
+
+    def sweep(self):
+        """Drop keys that are back to a full budget and so carry no state"""
+        now = time.monotonic()
+        expired = [key for key, tat in self._tats.items() if tat <= now]
+        for key in expired:
+            del self._tats[key]
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.sweep()
+
+    async def start(self):
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+# Check every key, then update them all, in a single round trip. Uses the Redis
+# server clock so every API node agrees on time, and expires keys once their
+# budget refills. ARGV holds an (emission interval, period) pair per key.
+GCRA_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+
+local new_tats = {}
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local emission_interval = tonumber(ARGV[2 * i - 1])
+    local period = tonumber(ARGV[2 * i])
+    local tat = tonumber(redis.call('GET', key))
+    if tat == nil or tat < now then
+        tat = now
+    end
+    new_tats[i] = tat + emission_interval
+    retry_after = math.max(retry_after, new_tats[i] - period - now)
+end
+if retry_after > 0 then
+    return {0, tostring(retry_after)}
+end
+
+for i, key in ipairs(KEYS) do
+    redis.call('SET', key, tostring(new_tats[i]), 'PX', math.ceil((new_tats[i] - now) * 1000))
+end
+return {1, '0'}
+"""
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Limiter shared by every worker and node through Redis"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit", client=None):
+        self.url = url
+        self.prefix = prefix
+        self._redis = client
+        self._script = None
+
+    async def start(self):
+        if self._redis is None:
+            import redis.asyncio as redis
+
+            self._redis = redis.from_url(self.url)
+        self._script = self._redis.register_script(GCRA_SCRIPT)
+
+    async def hit_all(self, hits: List[Tuple[str, int, float]]) -> Tuple[bool, float]:
+        if self._script is None:
+            await self.start()
+        allowed, retry_after = await self._script(
+            keys=[f"{self.prefix}:{key}" for key, _, _ in hits],
+            args=[arg for _, limit, period in hits for arg in (period / limit, period)]
+        )
+        return bool(allowed), float(retry_after)
+
+    async def stop(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+            self._script = None
+
+def create_memory_backend() -> MemoryRateLimitBackend:
+    return MemoryRateLimitBackend(
+        max_keys=settings.RATE_LIMIT_MAX_KEYS,
+        sweep_interval=settings.RATE_LIMIT_SWEEP_INTERVAL_SECONDS,
+    )
+
+def create_rate_limit_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/2")
+    return create_memory_backend()
+
+rate_limiter = create_rate_limit_backend()
+
+# Used by RateLimitMiddleware while rate_limiter fails; started and stopped with it
+fallback_rate_limiter = create_memory_backend()
+
+def client_ip(scope) -> Optional[str]:
+    """
+    Address of the real client.
+    X-Forwarded-For is only honoured when the direct peer is a trusted proxy, and is
+    walked from the right so clients cannot spoof their way past our own proxies.
+    """
+    client = scope.get("client")
+    peer = client[0] if client else None
+    if peer is not None and not _is_trusted_proxy(peer):
+        return peer
+
+    forwarded = None
+    for name, value in scope.get("headers", []):
+        if name == b"x-forwarded-for":
+            forwarded = value.decode("latin-1")
+            break
+    if not forwarded:
+        return peer
+
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in _TRUSTED_PROXY_NETWORKS)
+
+_TRUSTED_PROXY_NETWORKS = [ipaddress.ip_network(proxy, strict=False) for proxy in settings.TRUSTED_PROXIES]
+
+class RateLimitPolicy:
+    """
+    One limit applied to a route.
+    key is "ip" (per client address) or "query:<param>" (per account, identified
+    by a query parameter).
+    """
+
+    def __init__(self, name: str, key: str, limit: int, period: float):
+        self.name = name
+        self.key = key
+        self.limit = limit
+        self.period = period
+
+    def key_for(self, scope) -> Optional[str]:
+        if self.key == "ip":
+            return client_ip(scope)
+        if self.key.startswith("query:"):
+            values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(self.key[6:])
+            return values[0].strip().lower() if values else None
+        raise ValueError(f"Unknown rate limit key: {self.key}")
+
+def _per_ip(name: str) -> RateLimitPolicy:
+    return RateLimitPolicy(name, "ip", settings.RATE_LIMIT_ATTEMPTS, settings.RATE_LIMIT_PERIOD_SECONDS)
+
+def _per_account(name: str, param: str) -> RateLimitPolicy:
+    return RateLimitPolicy(
+        f"{name}:account", f"query:{param}",
+        settings.RATE_LIMIT_ACCOUNT_ATTEMPTS, settings.RATE_LIMIT_PERIOD_SECONDS
+    )
+
+# (method, path) -> policies, all of which must allow the request; a rejected
+# request spends none of their budgets
+RATE_LIMIT_POLICIES = {
+    ("POST", f"{settings.API_V1_STR}/auth/login"): [
+        _per_ip("login"),
+    ],
+    ("POST", f"{settings.API_V1_STR}/auth/forgot-password"): [
+        _per_ip("forgot_password"),
+        _per_account("forgot_password", "email"),
+    ],
+    ("POST", f"{settings.API_V1_STR}/auth/reset-password"): [
+        _per_ip("reset_password"),
+    ],
+}
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing RATE_LIMIT_POLICIES before routing.
+    Rejected requests get a 429 without their body being read and without any
+    dependency (database, form parsing) being resolved.
+    If the backend fails (e.g. Redis is down) requests are limited per process
+    by an in-memory fallback instead of failing with a 500.
+    """
+
+    def __init__(
+        self,
+        app,
+        policies=None,
+        backend: Optional[RateLimitBackend] = None,
+        fallback: Optional[RateLimitBackend] = None,
+    ):
+        self.app = app
+        self.policies = RATE_LIMIT_POLICIES if policies is None else policies
+        self.backend = backend
+        self.fallback = fallback
+
+    async def _hit_all(self, backend: RateLimitBackend, hits: List[Tuple[str, int, float]]) -> Tuple[bool, float]:
+        fallback = self.fallback or fallback_rate_limiter
+        try:
+            return await backend.hit_all(hits)
+        except Exception as e:
+            if backend is fallback:
+                raise
+            logger.warning("Rate limit backend failed, limiting in-process: %r", e)
+            return await fallback.hit_all(hits)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            policies = self.policies.get((scope["method"], scope["path"]))
+            if policies:
+                hits = []
+                for policy in policies:
+                    key = policy.key_for(scope)
+                    if key is not None:
+                        hits.append((f"{policy.name}:{key}", policy.limit, policy.period))
+                allowed, wait_time = (True, 0.0)
+                if hits:
+                    allowed, wait_time = await self._hit_all(self.backend or rate_limiter, hits)
+                if not allowed:
+                    # Round up so clients never retry before the budget refills
+                    retry_after = max(1, int(wait_time + 0.999))
+                    response = JSONResponse(
+                        {"detail": f"Rate limit exceeded. Try again in {retry_after} seconds."},
                         status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                        detail=f"Rate limit exceeded. Try again in {int(wait_time)} seconds.",
-                        headers={"Retry-After": str(int(wait_time))}
+                        headers={"Retry-After": str(retry_after)}
                     )
-                    
-            return await func(*args, **kwargs)
-        return wrapper
-    return decorator
+                    await response(scope, receive, send)
+                    return
+
+        await self.app(scope, receive, send)
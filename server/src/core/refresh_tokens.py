@@ -0,0 +1,80 @@
+
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import ASCENDING, IndexModel
+
+from src.config import settings
+
+# Raw refresh tokens are never stored, only their fixed-size SHA-256 digest
+INDEXES = [
+    IndexModel(
+        [("token_hash", ASCENDING)],
+        name="token_hash_unique",
+        unique=True,
+        partialFilterExpression={"token_hash": {"$exists": True}},
+    ),
+    IndexModel([("user_id", ASCENDING)], name="user_id"),
+    # Purge tokens once they expire, and blacklisted tokens after a retention window
+    IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    IndexModel(
+        [("blacklisted_at", ASCENDING)],
+        name="blacklisted_at_ttl",
+        expireAfterSeconds=settings.REFRESH_TOKEN_BLACKLIST_RETENTION_HOURS * 3600,
+    ),
+]
+
+def hash_token(token: str) -> bytes:
+    """Fixed-size lookup key for a refresh token"""
+    return hashlib.sha256(token.encode()).digest()
+
+async def store_token(db, user_id, token: str):
+    """Persist a newly issued refresh token"""
+    now = datetime.utcnow()
+    await db.refresh_tokens.insert_one({
+        "user_id": user_id,
+        "token_hash": hash_token(token),
+        "expires_at": now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        "created_at": now
+    })
+
+async def rotate_token(db, old_token: str, new_token: str) -> Optional[dict]:
+    """
+    Atomically blacklist old_token and store new_token in its place.
+    Returns the old token entry, or None if it was unknown, expired or already used.
+    """
+    now = datetime.utcnow()
+    entry = await db.refresh_tokens.find_one_and_update(
+        {
+            "token_hash": hash_token(old_token),
+            "is_blacklisted": {"$ne": True},
+            "expires_at": {"$gt": now}
+        },
+        {"$set": {"is_blacklisted": True, "blacklisted_at": now}},
+        projection={"user_id": 1}
+    )
+    if entry is None:
+        return None
+    
+    await store_token(db, entry["user_id"], new_token)
+    return entry
+
+async def revoke_token(db, token: str, user_id) -> bool:
+    """Blacklist a single refresh token belonging to user_id"""
+    result = await db.refresh_tokens.update_one(
+        {
+            "token_hash": hash_token(token),
+            "user_id": user_id,
+            "is_blacklisted": {"$ne": True}
+        },
+        {"$set": {"is_blacklisted": True, "blacklisted_at": datetime.utcnow()}}
+    )
+    return result.modified_count > 0
+
+async def revoke_user_tokens(db, user_id):
+    """Blacklist every active refresh token of a user"""
+    await db.refresh_tokens.update_many(
+        {"user_id": user_id, "is_blacklisted": {"$ne": True}},
+        {"$set": {"is_blacklisted": True, "blacklisted_at": datetime.utcnow()}}
+    )
@@ -1,21 +1,63 @@
 
+import asyncio
+import hashlib
+import logging
 import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
 import boto3
 from botocore.client import Config
+from botocore.exceptions import BotoCoreError, ClientError, ConnectionError, HTTPClientError
+from fastapi import HTTPException, UploadFile, status
+
 from src.config import settings
+from src.core.cache import LRUCache
+from src.core.uploads import check_content_type, check_signature, too_large
+
+logger = logging.getLogger(__name__)
+
+S3_ERRORS = (BotoCoreError, ClientError)
+THROTTLING_CODES = frozenset({
+    "SlowDown", "Throttling", "ThrottlingException", "RequestLimitExceeded",
+    "TooManyRequestsException", "RequestTimeout", "InternalError", "ServiceUnavailable",
+})
+
+_client = None
+_client_lock = threading.Lock()
+
+def _reset_client():
+    # A client's connection pool must not be shared with a forked child
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_client)
 
 def get_s3_client():
-    """Get boto3 S3 client or use local storage"""
+    """
+    Process-wide boto3 S3 client, or None in local storage mode.
+    Built once: endpoint and credential resolution are the expensive part, and
+    boto3 clients are safe to share between threads. Forked children build their own.
+    """
+    global _client
     if settings.STORAGE_MODE == "local":
         # For local development, we'll return None and handle differently
         return None
     
-    return boto3.client(
-        's3',
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        config=Config(signature_version='s3v4')
-    )
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # Sessions are not thread safe, so each client gets its own
+                session = boto3.session.Session()
+                _client = session.client(
+                    's3',
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                    config=Config(signature_version='s3v4')
+                )
+    return _client
 
 def generate_presigned_url(file_path: str, content_type: str, expires_in: int = 3600):
     """Generate a presigned URL for S3 upload or prepare local path"""
@@ -40,9 +82,215 @@ def generate_presigned_url(file_path: str, content_type: str, expires_in: int =
     
     return presigned_url
 
+async def generate_presigned_url_async(file_path: str, content_type: str, expires_in: int = 3600) -> str:
+    """generate_presigned_url on a worker thread, keeping signing CPU off the event loop"""
+    return await asyncio.to_thread(generate_presigned_url, file_path, content_type, expires_in)
+
+def generate_presigned_urls(files: List[Dict[str, str]], expires_in: int = 3600) -> List[str]:
+    """Presigned upload URLs for several {"file_path", "content_type"} entries"""
+    return [generate_presigned_url(f["file_path"], f["content_type"], expires_in) for f in files]
+
+async def generate_presigned_urls_async(files: List[Dict[str, str]], expires_in: int = 3600) -> List[str]:
+    """generate_presigned_urls in one worker thread hop for the whole batch"""
+    return await asyncio.to_thread(generate_presigned_urls, files, expires_in)
+
 def get_object_url(file_path: str):
-    """Get the URL for an S3 object or local file"""
-    if settings.STORAGE_MODE == "local":
+    """
+    Get the URL for an S3 object or local file.
+    Private S3 objects get the storage API path, which redirects to a presigned URL,
+    so the stored URL never expires.
+    """
+    if settings.STORAGE_MODE == "local" or not settings.S3_PUBLIC_BUCKET:
         return f"/api/v1/storage/files/{file_path}"
     
     return f"https://{settings.S3_BUCKET_NAME}.s3.amazonaws.com/{file_path}"
+
+# Presigned GET URLs by object key, each with the wall-clock time it stops being handed out.
+# Entries expire S3_DOWNLOAD_URL_SLACK_SECONDS before the URL itself, so a client
+# (or CDN) given a cached URL always has at least that long to use it.
+download_url_cache = LRUCache(
+    max_entries=settings.S3_DOWNLOAD_URL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.S3_DOWNLOAD_URL_EXPIRES_SECONDS - settings.S3_DOWNLOAD_URL_SLACK_SECONDS,
+)
+
+def _sign_download(key: str, expires_in: int) -> str:
+    return get_s3_client().generate_presigned_url(
+        'get_object',
+        Params={
+            'Bucket': settings.S3_BUCKET_NAME,
+            'Key': key
+        },
+        ExpiresIn=expires_in
+    )
+
+async def presigned_download_url(key: str) -> Tuple[str, int]:
+    """
+    Presigned GET URL for an S3 object and the seconds it may still be reused for.
+    Hot objects share one signature until the cache entry lapses, which keeps
+    redirects to them identical (and so cacheable) across requests.
+    """
+    entry = download_url_cache.get(key)
+    if entry is None:
+        expires_in = settings.S3_DOWNLOAD_URL_EXPIRES_SECONDS
+        url = await asyncio.to_thread(_sign_download, key, expires_in)
+        entry = (url, time.time() + expires_in - settings.S3_DOWNLOAD_URL_SLACK_SECONDS)
+        download_url_cache.set(key, entry)
+    url, reuse_until = entry
+    return url, max(0, int(reuse_until - time.time()))
+
+async def _read_part(file: UploadFile, part_size: int) -> bytes:
+    """Read up to part_size bytes, short only at the end of the file"""
+    buffer = bytearray()
+    while len(buffer) < part_size:
+        chunk = await file.read(part_size - len(buffer))
+        if not chunk:
+            break
+        buffer += chunk
+    return bytes(buffer)
+
+def _is_retryable(exc: Exception) -> bool:
+    """Whether an S3 error is transient: throttling, a 5xx or a dropped connection"""
+    if isinstance(exc, ClientError):
+        status_code = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        return status_code >= 500 or exc.response.get("Error", {}).get("Code") in THROTTLING_CODES
+    return isinstance(exc, (ConnectionError, HTTPClientError))
+
+async def _with_retries(max_retries: int, func, *args, **kwargs):
+    """
+    Run a blocking S3 call on a worker thread, retrying transient errors with exponential backoff.
+    Client errors such as AccessDenied or NoSuchBucket are raised on the first attempt.
+    Cancellation takes effect once the call in flight, if any, has returned.
+    """
+    for attempt in range(max_retries + 1):
+        call = asyncio.ensure_future(asyncio.to_thread(func, *args, **kwargs))
+        try:
+            return await asyncio.shield(call)
+        except asyncio.CancelledError:
+            # The thread cannot be interrupted: wait for the call to finish so a
+            # cancelled caller knows nothing is still being sent (e.g. before an abort)
+            await asyncio.gather(call, return_exceptions=True)
+            raise
+        except S3_ERRORS as exc:
+            if attempt == max_retries or not _is_retryable(exc):
+                raise
+            await asyncio.sleep(0.1 * 2 ** attempt)
+
+def _upload_failed() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_502_BAD_GATEWAY,
+        detail="Upload to storage failed"
+    )
+
+async def upload_to_s3(
+    file: UploadFile,
+    key: str,
+    client=None,
+    max_bytes: Optional[int] = None,
+    allowed_types: Optional[Iterable[str]] = None,
+    part_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    max_retries: Optional[int] = None,
+) -> dict:
+    """
+    Stream an upload to S3 as a multipart upload, or a single PUT when it fits in one part.
+    At most `concurrency` parts are in flight while the next one is read, so
+    memory per upload stays at (concurrency + 1) * part_size. Parts are retried
+    with backoff; on any failure the multipart upload is aborted so no orphaned
+    parts are billed. Size and content type are checked as parts are read.
+    Returns the size in bytes and the sha256 hex digest.
+    """
+    client = client or get_s3_client()
+    max_bytes = settings.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    allowed_types = settings.UPLOAD_ALLOWED_CONTENT_TYPES if allowed_types is None else allowed_types
+    part_size = part_size or settings.S3_MULTIPART_PART_SIZE
+    concurrency = concurrency or settings.S3_MULTIPART_CONCURRENCY
+    max_retries = settings.S3_MULTIPART_MAX_RETRIES if max_retries is None else max_retries
+    bucket = settings.S3_BUCKET_NAME
+    
+    check_content_type(file.content_type, allowed_types)
+    if file.size is not None and file.size > max_bytes:
+        raise too_large(max_bytes)
+    
+    digest = hashlib.sha256()
+    data = await _read_part(file, part_size)
+    check_signature(file.content_type, data)
+    size = len(data)
+    if size > max_bytes:
+        raise too_large(max_bytes)
+    await asyncio.to_thread(digest.update, data)
+    
+    if size < part_size:
+        try:
+            await _with_retries(
+                max_retries, client.put_object,
+                Bucket=bucket, Key=key, Body=data, ContentType=file.content_type
+            )
+        except S3_ERRORS:
+            logger.exception("S3 upload of %s failed", key)
+            raise _upload_failed()
+        return {"size": size, "sha256": digest.hexdigest()}
+    
+    try:
+        created = await _with_retries(
+            max_retries, client.create_multipart_upload,
+            Bucket=bucket, Key=key, ContentType=file.content_type
+        )
+    except S3_ERRORS:
+        logger.exception("S3 upload of %s failed", key)
+        raise _upload_failed()
+    upload_id = created["UploadId"]
+    
+    window = asyncio.Semaphore(concurrency)
+    tasks = []
+    
+    async def upload_part(part_number: int, body: bytes) -> dict:
+        try:
+            response = await _with_retries(
+                max_retries, client.upload_part,
+                Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        finally:
+            window.release()
+    
+    try:
+        part_number = 1
+        while data:
+            await window.acquire()
+            # Stop reading as soon as any part has failed for good
+            for task in tasks:
+                if task.done() and task.exception() is not None:
+                    raise task.exception()
+            tasks.append(asyncio.create_task(upload_part(part_number, data)))
+            part_number += 1
+            
+            data = await _read_part(file, part_size)
+            size += len(data)
+            if size > max_bytes:
+                raise too_large(max_bytes)
+            if data:
+                await asyncio.to_thread(digest.update, data)
+        
+        parts = await asyncio.gather(*tasks)
+        await _with_retries(
+            max_retries, client.complete_multipart_upload,
+            Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+        )
+    except BaseException as exc:
+        # Cancelled parts return once their upload_part call has, so none lands after the abort
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            await _with_retries(
+                max_retries, client.abort_multipart_upload,
+                Bucket=bucket, Key=key, UploadId=upload_id
+            )
+        except S3_ERRORS:
+            logger.exception("Aborting S3 multipart upload %s of %s failed", upload_id, key)
+        if isinstance(exc, S3_ERRORS):
+            logger.exception("S3 upload of %s failed", key)
+            raise _upload_failed()
+        raise
+    
+    return {"size": size, "sha256": digest.hexdigest()}
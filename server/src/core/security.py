@@ -1,11 +1,34 @@
 
+import hashlib
+import time
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 from src.config import settings
+from src.core.hash_pool import hash_pool, HashPoolSaturated
+from src.core.cache import LRUCache
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+
+def _claims_size(claims: Dict[str, Any]) -> int:
+    """Rough memory footprint of a cached claims entry"""
+    return 200 + sum(len(str(key)) + len(str(value)) for key, value in claims.items())
+
+# Verified access token claims keyed by a digest of the token, each entry expiring at the token's exp
+token_claims_cache = LRUCache(
+    max_entries=settings.TOKEN_CACHE_MAX_ENTRIES,
+    max_bytes=settings.TOKEN_CACHE_MAX_BYTES,
+    sizeof=_claims_size,
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
@@ -15,6 +38,31 @@ def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check whether a hash was made with different cost settings than the current ones"""
+    return pwd_context.needs_update(hashed_password)
+
+def _hash_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please try again shortly",
+        headers={"Retry-After": "1"}
+    )
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against hash on the hashing pool"""
+    try:
+        return await hash_pool.run(verify_password, plain_password, hashed_password)
+    except HashPoolSaturated:
+        raise _hash_pool_busy()
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate password hash on the hashing pool"""
+    try:
+        return await hash_pool.run(get_password_hash, password)
+    except HashPoolSaturated:
+        raise _hash_pool_busy()
+
 def create_token(data: dict, expires_delta: timedelta) -> str:
     """Create JWT token"""
     to_encode = data.copy()
@@ -31,11 +79,19 @@ def create_access_token(data: Dict[str, Any]) -> str:
 def create_refresh_token(data: Dict[str, Any]) -> str:
     """Create refresh token"""
     expires_delta = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    return create_token(data, expires_delta)
+    # A unique jti keeps tokens issued within the same second distinct
+    return create_token({**data, "jti": uuid.uuid4().hex}, expires_delta)
 
 def decode_token(token: str) -> Dict[str, Any]:
-    """Decode and verify JWT token"""
-    return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.ALGORITHM])
+    """Decode and verify JWT token, reusing claims already verified for the same token"""
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_claims_cache.get(key)
+    if claims is None:
+        claims = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.ALGORITHM])
+        exp = claims.get("exp")
+        if exp is not None:
+            token_claims_cache.set(key, claims, ttl=exp - time.time())
+    return dict(claims)
 
 def verify_refresh_token(token: str) -> Dict[str, Any]:
     """Verify refresh token"""
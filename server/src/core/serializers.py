@@ -0,0 +1,69 @@
+
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Type
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """Encode Mongo documents to JSON bytes in one pass, converting ObjectId values on the way"""
+    return orjson.dumps(content, default=_default)
+
+class JSONBytesResponse(Response):
+    """JSON response for content that is already encoded, or encoded with dumps()"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+class DocumentSerializer:
+    """
+    Encodes Mongo documents as a response model, straight to JSON bytes.
+    The field list is resolved from the model once, so a document is neither
+    validated nor copied into a model instance; _id is emitted as a string id.
+    Documents are trusted to match the model, as they are written by this API.
+    """
+
+    def __init__(self, model: Type[BaseModel], exclude: Iterable[str] = (), fields: Optional[Iterable[str]] = None):
+        excluded = set(exclude)
+        selected = None if fields is None else set(fields)
+        self.model = model
+        self.fields = tuple(
+            name for name in model.model_fields
+            if name not in excluded and (selected is None or name in selected)
+        )
+        # An empty projection would return whole documents
+        self.projection = {name: 1 for name in self.fields if name != "id"} or {"_id": 1}
+        self._partials: Dict[FrozenSet[str], "DocumentSerializer"] = {}
+
+    def partial(self, fields: Iterable[str]) -> "DocumentSerializer":
+        """Serializer and projection for a subset of the fields, built once per subset"""
+        key = frozenset(fields)
+        serializer = self._partials.get(key)
+        if serializer is None:
+            serializer = DocumentSerializer(self.model, fields=[name for name in self.fields if name in key])
+            self._partials[key] = serializer
+        return serializer
+
+    def to_dict(self, document: dict) -> dict:
+        content = {}
+        for name in self.fields:
+            if name == "id":
+                content["id"] = str(document["_id"]) if "_id" in document else document["id"]
+            else:
+                content[name] = document.get(name)
+        return content
+
+    def dump(self, document: dict) -> bytes:
+        return orjson.dumps(self.to_dict(document), default=_default)
+
+    def dump_many(self, documents: Iterable[dict]) -> bytes:
+        return orjson.dumps([self.to_dict(document) for document in documents], default=_default)
@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import AsyncIterator, Iterable, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+
+from src.config import settings
+
+# Leading bytes of the content types we can recognise from the first chunk
+CONTENT_SIGNATURES = {
+    "image/jpeg": (b"\xff\xd8\xff",),
+    "image/png": (b"\x89PNG\r\n\x1a\n",),
+    "image/gif": (b"GIF87a", b"GIF89a"),
+    "image/webp": (b"RIFF",),
+    "application/pdf": (b"%PDF-",),
+}
+
+def storage_path(relative_path: str) -> str:
+    """Absolute path of a file under LOCAL_STORAGE_PATH; rejects paths escaping it"""
+    root = os.path.realpath(settings.LOCAL_STORAGE_PATH)
+    absolute = os.path.realpath(os.path.join(root, relative_path))
+    if not absolute.startswith(root + os.sep):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid file path"
+        )
+    return absolute
+
+def check_content_type(content_type: Optional[str], allowed: Iterable[str]):
+    if content_type not in allowed:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported content type: {content_type}"
+        )
+
+def check_signature(content_type: str, head: bytes):
+    signatures = CONTENT_SIGNATURES.get(content_type)
+    if signatures and not head.startswith(signatures):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"File content does not match {content_type}"
+        )
+
+def too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File exceeds the {max_bytes} byte limit"
+    )
+
+async def upload_chunks(file: UploadFile, chunk_size: int) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+def _write_chunk(fd: int, digest, chunk: bytes):
+    # hashlib releases the GIL on large buffers, so this runs in parallel with the loop
+    digest.update(chunk)
+    view = memoryview(chunk)
+    while view:
+        view = view[os.write(fd, view):]
+
+def _discard(fd: int, temp_path: str):
+    os.close(fd)
+    try:
+        os.remove(temp_path)
+    except FileNotFoundError:
+        pass
+
+async def stream_to_temp(
+    file: UploadFile,
+    directory: str,
+    max_bytes: Optional[int] = None,
+    allowed_types: Optional[Iterable[str]] = None,
+    chunk_size: Optional[int] = None,
+) -> Tuple[str, int, str]:
+    """
+    Stream an upload into a new temp file in `directory` without blocking the
+    event loop. Chunks are written and hashed on a worker thread; the size cap
+    and content type are enforced while reading, and a rejected upload leaves
+    nothing behind. Returns the temp path, size in bytes and sha256 hex digest.
+    """
+    max_bytes = settings.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    allowed_types = settings.UPLOAD_ALLOWED_CONTENT_TYPES if allowed_types is None else allowed_types
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    
+    check_content_type(file.content_type, allowed_types)
+    if file.size is not None and file.size > max_bytes:
+        raise too_large(max_bytes)
+    
+    await asyncio.to_thread(os.makedirs, directory, exist_ok=True)
+    fd, temp_path = await asyncio.to_thread(tempfile.mkstemp, dir=directory, prefix=".upload-")
+    
+    digest = hashlib.sha256()
+    size = 0
+    write = None
+    try:
+        async for chunk in upload_chunks(file, chunk_size):
+            if size == 0:
+                check_signature(file.content_type, chunk)
+            size += len(chunk)
+            if size > max_bytes:
+                raise too_large(max_bytes)
+            # Shielded so a cancelled request cannot close the file under a running write
+            write = asyncio.ensure_future(asyncio.to_thread(_write_chunk, fd, digest, chunk))
+            await asyncio.shield(write)
+        await asyncio.to_thread(os.close, fd)
+    except BaseException:
+        if write is not None:
+            await asyncio.wait({write})
+        await asyncio.to_thread(_discard, fd, temp_path)
+        raise
+    
+    return temp_path, size, digest.hexdigest()
+
+async def save_upload(file: UploadFile, destination: str, **limits) -> dict:
+    """
+    Stream an upload to `destination` through a temp file next to it, which is
+    atomically renamed into place once complete so readers never see a partial
+    file. Returns the size in bytes and the sha256 hex digest.
+    """
+    temp_path, size, digest = await stream_to_temp(file, os.path.dirname(destination), **limits)
+    try:
+        await asyncio.to_thread(os.replace, temp_path, destination)
+    except BaseException:
+        await asyncio.to_thread(os.remove, temp_path)
+        raise
+    
+    return {"size": size, "sha256": digest}
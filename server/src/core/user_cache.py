@@ -0,0 +1,46 @@
+
+import asyncio
+from typing import Any, Dict, Iterable
+
+from src.config import settings
+from src.core.cache import LRUCache
+from src.core.invalidation import invalidation_bus
+
+USERS_CHANNEL = "users"
+
+# Authenticated user documents keyed by user id, without hashed_password
+user_cache = LRUCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+)
+
+invalidation_bus.subscribe(USERS_CHANNEL, user_cache.delete)
+
+# Admin listing totals keyed by filter; allowed to lag writes by the TTL
+user_count_cache = LRUCache(
+    max_entries=settings.USER_COUNT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.USER_COUNT_CACHE_TTL_SECONDS,
+)
+
+async def estimated_user_count(db, query: Dict[str, Any]) -> int:
+    """
+    Total users matching a listing filter. The unfiltered total comes from
+    collection metadata; filtered totals are counted on the listing indexes.
+    """
+    key = tuple(sorted(query.items()))
+    count = user_count_cache.get(key)
+    if count is None:
+        if query:
+            count = await db.users.count_documents(query)
+        else:
+            count = await db.users.estimated_document_count()
+        user_count_cache.set(key, count)
+    return count
+
+async def invalidate_user(user_id) -> None:
+    """Drop a user from every worker's caches after a write"""
+    await invalidation_bus.publish(USERS_CHANNEL, str(user_id))
+
+async def invalidate_users(user_ids: Iterable) -> None:
+    """invalidate_user for a batch of users, published concurrently"""
+    await asyncio.gather(*(invalidate_user(user_id) for user_id in user_ids))
@@ -0,0 +1,68 @@
+from typing import List, Optional
+
+from src.config import settings
+from src.core.cache import LRUCache
+from src.models.user import SEARCH_TOKEN_MAX_LENGTH, normalize_login_key, normalize_search_words, user_public_serializer
+
+SEARCH_PROJECTION = user_public_serializer.projection
+
+# Serialized result lists keyed by (normalized query, role, limit). Entries are
+# not invalidated on writes; renames and deactivations show up within the TTL.
+search_cache = LRUCache(
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS,
+    max_bytes=settings.SEARCH_CACHE_MAX_BYTES,
+    sizeof=lambda body: len(body) + 100,
+)
+
+def search_words(query: str) -> List[str]:
+    """Query words as stored tokens, most selective (longest) first"""
+    words = {word[:SEARCH_TOKEN_MAX_LENGTH] for word in normalize_search_words(query)}
+    return sorted(words, key=lambda word: (-len(word), word))
+
+def search_filter(words: List[str], role: Optional[str] = None) -> dict:
+    """Active users having every query word as a token; the index serves the first one"""
+    query = {"search_tokens": {"$all": words}, "is_active": True}
+    if role:
+        query["role"] = role
+    return query
+
+def exact_username_filter(query: str, role: Optional[str] = None) -> dict:
+    """
+    Active user whose username is exactly the query, through the unique login_keys index.
+    Fetched alongside the candidates, which are capped and in index order, so the
+    best match is never missed for a common prefix.
+    """
+    exact = {"login_keys": normalize_login_key(query), "is_active": True}
+    if role:
+        exact["role"] = role
+    return exact
+
+def merge_exact(candidates: List[dict], exact: Optional[dict], query: str) -> List[dict]:
+    """Add the exact username match to the candidates; login_keys also holds emails, which never match"""
+    if exact is None or normalize_login_key(exact["username"]) != normalize_login_key(query):
+        return candidates
+    if any(user["_id"] == exact["_id"] for user in candidates):
+        return candidates
+    return [exact] + candidates
+
+def _rank(user: dict, phrase: str) -> tuple:
+    username = " ".join(normalize_search_words(user.get("username")))
+    full_name = " ".join(normalize_search_words(user.get("full_name")))
+    if username == phrase:
+        score = 0
+    elif username.startswith(phrase):
+        score = 1
+    elif full_name.startswith(phrase):
+        score = 2
+    else:
+        score = 3
+    return (score, len(username), username)
+
+def rank_users(users: List[dict], query: str) -> List[dict]:
+    """
+    Order candidates by exact username, username prefix, full name prefix,
+    then any word prefix; shorter usernames first within each group
+    """
+    phrase = " ".join(normalize_search_words(query))
+    return sorted(users, key=lambda user: _rank(user, phrase))
@@ -1,18 +1,36 @@
 
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from src.core.security import decode_token
+from src.core.user_cache import user_cache
 from src.config import settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
 
 async def get_db(request: Request) -> AsyncIOMotorDatabase:
     """Get MongoDB database from request app state"""
     return request.app.mongodb
 
+def get_db_for(group: str):
+    """Dependency returning the database handle configured for an endpoint group"""
+    async def dependency(request: Request) -> AsyncIOMotorDatabase:
+        groups = getattr(request.app, "mongodb_groups", {})
+        return groups.get(group, request.app.mongodb)
+    return dependency
+
+# Read-only endpoint groups that tolerate slightly stale reads
+get_profile_db = get_db_for("profiles")
+get_admin_read_db = get_db_for("admin_reads")
+
+# Lookup-only fields stay out of the user cache
+CURRENT_USER_PROJECTION = {"hashed_password": 0, "login_keys": 0, "search_tokens": 0}
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db = Depends(get_db)
@@ -34,9 +52,15 @@ async def get_current_user(
     except Exception:
         raise credentials_exception
     
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
-    if not user:
-        raise credentials_exception
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await db.users.find_one({"_id": ObjectId(user_id)}, CURRENT_USER_PROJECTION)
+        if not user:
+            raise credentials_exception
+        
+        # Convert ObjectId to string
+        user["id"] = str(user.pop("_id"))
+        user_cache.set(user_id, user)
     
     if not user["is_active"]:
         raise HTTPException(
@@ -44,10 +68,23 @@ async def get_current_user(
             detail="Inactive user"
         )
     
-    # Convert ObjectId to string
-    user["id"] = str(user.pop("_id"))
-    
-    return user
+    # Callers get their own copy so the cached document stays untouched
+    return dict(user)
+
+async def get_optional_current_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db = Depends(get_db)
+):
+    """
+    Current user for endpoints that also serve anonymous callers.
+    Missing, invalid or expired tokens and inactive users are treated as anonymous (None)
+    """
+    if token is None:
+        return None
+    try:
+        return await get_current_user(token, db)
+    except HTTPException:
+        return None
 
 async def get_current_admin(
     current_user = Depends(get_current_user),
@@ -1,12 +1,17 @@
 
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 
 from src.config import settings
 from src.api.router import api_router
 from src.dependencies import get_current_user
+from src.core.hash_pool import hash_pool
+from src.core.invalidation import invalidation_bus
+from src.core.indexes import check_indexes
+from src.core.mongo import create_client, group_databases
+from src.core.rate_limit import fallback_rate_limiter, rate_limiter, RateLimitMiddleware
+from src.core.event_sink import event_sink
 
 # Create local storage directory if using local storage mode
 if settings.STORAGE_MODE == "local":
@@ -21,6 +26,10 @@ app = FastAPI(
     openapi_url="/api/openapi.json",  # OpenAPI schema
 )
 
+# Rate limiting runs before routing so rejected requests never reach body parsing.
+# Added before CORS so that 429 responses still carry CORS headers.
+app.add_middleware(RateLimitMiddleware)
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -33,17 +42,27 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_db_client():
     # Connect to MongoDB
-    app.mongodb_client = AsyncIOMotorClient(settings.MONGODB_URL)
-    app.mongodb = app.mongodb_client[settings.DB_NAME]
+    app.mongodb_client = create_client()
+    app.mongodb_groups = group_databases(app.mongodb_client[settings.DB_NAME])
+    app.mongodb = app.mongodb_groups["default"]
+    
+    # Verify indexes match the registry; builds happen through scripts/migrate_indexes
+    await check_indexes(app.mongodb)
     
-    # Create indexes for collections
-    await app.mongodb.users.create_index("email", unique=True)
-    await app.mongodb.users.create_index("username", unique=True)
-    # Add more indexes as needed
+    await invalidation_bus.start()
+    await rate_limiter.start()
+    await fallback_rate_limiter.start()
+    await event_sink.start(app.mongodb)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Drain buffered records while the database connection is still open
+    await event_sink.stop()
     app.mongodb_client.close()
+    hash_pool.shutdown()
+    await invalidation_bus.stop()
+    await rate_limiter.stop()
+    await fallback_rate_limiter.stop()
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -0,0 +1,13 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from src.config import settings
+
+class PresignFile(BaseModel):
+    filename: str
+    content_type: str
+
+class PresignBatch(BaseModel):
+    files: List[PresignFile] = Field(..., min_length=1, max_length=settings.S3_PRESIGN_BATCH_MAX)
+    folder: str = "uploads"
@@ -1,8 +1,56 @@
 
-from pydantic import BaseModel, Field, EmailStr, validator
-from typing import Optional
+from pydantic import BaseModel, Field, EmailStr, root_validator, validator
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
+import re
+import unicodedata
+
+from src.core.serializers import DocumentSerializer
+
+def normalize_login_key(identifier: str) -> str:
+    """Canonical form of an email or username used for lookups"""
+    return identifier.strip().lower()
+
+def build_login_keys(email: str, username: str) -> List[str]:
+    """Values stored in a user's login_keys field, covered by one unique index"""
+    return sorted({normalize_login_key(email), normalize_login_key(username)})
+
+# Longest prefix indexed per word; longer queries match on their first characters
+SEARCH_TOKEN_MAX_LENGTH = 20
+
+def normalize_search_words(text: Optional[str]) -> List[str]:
+    """Lowercased, accent-free words of a name or query; punctuation separates words"""
+    if not text:
+        return []
+    folded = unicodedata.normalize("NFKD", text)
+    folded = "".join(char for char in folded if not unicodedata.combining(char)).lower()
+    return re.findall(r"[^\W_]+", folded)
+
+def build_search_tokens(username: str, full_name: Optional[str]) -> List[str]:
+    """Edge n-grams of every username and full name word, stored in search_tokens"""
+    tokens = set()
+    for word in normalize_search_words(username) + normalize_search_words(full_name):
+        for length in range(1, min(len(word), SEARCH_TOKEN_MAX_LENGTH) + 1):
+            tokens.add(word[:length])
+    return sorted(tokens)
+
+def new_user_document(user_in: "UserCreate", hashed_password: str) -> dict:
+    """Document inserted for a newly registered user, inactive until verified"""
+    now = datetime.utcnow()
+    return {
+        "email": user_in.email,
+        "username": user_in.username,
+        "login_keys": build_login_keys(user_in.email, user_in.username),
+        "search_tokens": build_search_tokens(user_in.username, user_in.full_name),
+        "hashed_password": hashed_password,
+        "full_name": user_in.full_name,
+        "role": "basic_user",
+        "is_active": False,
+        "is_verified": False,
+        "created_at": now,
+        "updated_at": now,
+    }
 
 class UserRole(str, Enum):
     BASIC_USER = "basic_user"
@@ -50,6 +98,40 @@ class UserAdminUpdate(UserUpdate):
     is_verified: Optional[bool] = None
     role: Optional[UserRole] = None
 
+class UserBulkFilter(BaseModel):
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+    is_verified: Optional[bool] = None
+
+class UserBulkItem(BaseModel):
+    user_id: str
+    update: UserAdminUpdate
+
+class UserBulkUpdate(BaseModel):
+    """
+    Either one `update` applied to the users selected by `user_ids` and/or
+    `filter`, or per-user `items`. Filter-only updates never touch the calling admin.
+    """
+    user_ids: Optional[List[str]] = None
+    filter: Optional[UserBulkFilter] = None
+    update: Optional[UserAdminUpdate] = None
+    items: Optional[List[UserBulkItem]] = None
+    
+    @root_validator(skip_on_failure=True)
+    def one_operation(cls, values):
+        # An empty filter would select every user, admins included
+        if values.get("user_ids") is not None and not values["user_ids"]:
+            raise ValueError('user_ids must not be empty')
+        if values.get("filter") is not None and not values["filter"].model_dump(exclude_none=True):
+            raise ValueError('filter must set at least one field')
+        selects = values.get("user_ids") is not None or values.get("filter") is not None
+        if values.get("items") is not None:
+            if selects or values.get("update") is not None:
+                raise ValueError('Send either items or update with user_ids/filter, not both')
+        elif values.get("update") is None or not selects:
+            raise ValueError('update needs user_ids or filter to select users')
+        return values
+
 class UserInDB(UserBase):
     id: str = Field(..., alias="id")
     hashed_password: str
@@ -83,3 +165,17 @@ class User(UserBase):
         json_encoders = {
             datetime: lambda dt: dt.isoformat()
         }
+
+class UserPublic(BaseModel):
+    """Profile fields visible to anyone"""
+    id: str
+    username: str
+    full_name: str
+    role: UserRole
+    phone: Optional[str] = None
+    profile_picture_url: Optional[str] = None
+    location: Optional[dict] = None
+
+# Precompiled encoders from Mongo documents to response JSON
+user_serializer = DocumentSerializer(User)
+user_public_serializer = DocumentSerializer(UserPublic)
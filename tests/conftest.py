@@ -7,10 +7,158 @@ from bson import ObjectId
 import os
 import json
 from datetime import datetime
+from pymongo import ReturnDocument
 
 from src.main import app
 from src.config import settings
+from src.core.indexes import INDEXES
 from src.core.security import get_password_hash, create_access_token
+from src.models.user import build_login_keys, build_search_tokens
+
+class FakeResult:
+    """Stand-in for the pymongo result types, carrying every count a caller may read"""
+    
+    def __init__(self, inserted_ids=(), matched_count=0, modified_count=0, upserted_id=None, deleted_count=0):
+        self.inserted_ids = list(inserted_ids)
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+        self.deleted_count = deleted_count
+
+def _matches(document: dict, query: dict) -> bool:
+    for field, condition in query.items():
+        value = document.get(field)
+        if isinstance(condition, dict):
+            if "$ne" in condition and value == condition["$ne"]:
+                return False
+            if "$gt" in condition and not (value is not None and value > condition["$gt"]):
+                return False
+            if "$lte" in condition and not (value is not None and value <= condition["$lte"]):
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+def _apply_update(document: dict, update: dict):
+    document.update(update.get("$set", {}))
+    for field, amount in update.get("$inc", {}).items():
+        document[field] = document.get(field, 0) + amount
+
+def _project(document: dict, projection) -> dict:
+    if not projection:
+        return dict(document)
+    fields = {field for field, included in projection.items() if included}
+    if "_id" not in projection:
+        fields.add("_id")
+    return {field: value for field, value in document.items() if field in fields}
+
+class FakeCollection:
+    """
+    In-memory stand-in for the Motor collection calls the core modules make,
+    supporting equality, $ne, $gt, $lte and $in filters and $set/$inc updates.
+    `indexes` is what list_indexes yields; `batches` records insert_many sizes.
+    """
+    
+    def __init__(self, documents=None, indexes=None):
+        self.documents = list(documents or [])
+        self.indexes = list(indexes or [])
+        self.batches = []
+    
+    def with_options(self, **kwargs):
+        return self
+    
+    def _find(self, query: dict):
+        return next((document for document in self.documents if _matches(document, query)), None)
+    
+    async def insert_one(self, document):
+        document.setdefault("_id", ObjectId())
+        self.documents.append(dict(document))
+        return FakeResult(inserted_ids=[document["_id"]])
+    
+    async def insert_many(self, documents, ordered=True):
+        # Yield like a round trip would, so concurrent writers interleave
+        await asyncio.sleep(0)
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+        self.documents.extend(dict(document) for document in documents)
+        self.batches.append(len(documents))
+        return FakeResult(inserted_ids=[document["_id"] for document in documents])
+    
+    async def find_one(self, query, projection=None):
+        document = self._find(query)
+        return _project(document, projection) if document is not None else None
+    
+    async def update_one(self, query, update, upsert=False):
+        document = self._find(query)
+        if document is not None:
+            _apply_update(document, update)
+            return FakeResult(matched_count=1, modified_count=1)
+        if not upsert:
+            return FakeResult()
+        document = {field: value for field, value in query.items() if not isinstance(value, dict)}
+        document.setdefault("_id", ObjectId())
+        document.update(update.get("$setOnInsert", {}))
+        _apply_update(document, update)
+        self.documents.append(document)
+        return FakeResult(upserted_id=document["_id"])
+    
+    async def update_many(self, query, update):
+        matched = [document for document in self.documents if _matches(document, query)]
+        for document in matched:
+            _apply_update(document, update)
+        return FakeResult(matched_count=len(matched), modified_count=len(matched))
+    
+    async def find_one_and_update(self, query, update, projection=None, return_document=ReturnDocument.BEFORE):
+        document = self._find(query)
+        if document is None:
+            return None
+        before = _project(document, projection)
+        _apply_update(document, update)
+        return _project(document, projection) if return_document == ReturnDocument.AFTER else before
+    
+    async def find_one_and_replace(self, query, replacement, upsert=False):
+        document = self._find(query)
+        if document is None:
+            if upsert:
+                self.documents.append({"_id": query["_id"], **replacement})
+            return None
+        before = dict(document)
+        document.clear()
+        document.update({"_id": before["_id"], **replacement})
+        return before
+    
+    async def delete_one(self, query):
+        document = self._find(query)
+        if document is None:
+            return FakeResult()
+        self.documents.remove(document)
+        return FakeResult(deleted_count=1)
+    
+    async def list_indexes(self):
+        for index in self.indexes:
+            yield index
+
+class FakeDB(dict):
+    """Database stand-in whose collections are created on first access, as items or attributes"""
+    
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+    
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+    
+    def __setattr__(self, name, value):
+        self[name] = value
+
+@pytest.fixture
+def fake_db():
+    """In-memory database for unit tests of code that only needs a few collection calls"""
+    return FakeDB()
 
 # Use a separate test database
 TEST_MONGODB_URL = "mongodb://localhost:27017"
@@ -44,6 +192,10 @@ async def test_db():
     for collection in collections:
         await db[collection].delete_many({})
     
+    # Unique indexes back the duplicate checks under test
+    for collection, indexes in INDEXES.items():
+        await db[collection].create_indexes(indexes)
+    
     yield db
     
     # Clear the database after tests
@@ -59,6 +211,8 @@ async def test_user(test_db):
     user_data = {
         "username": "testuser",
         "email": "test@example.com",
+        "login_keys": build_login_keys("test@example.com", "testuser"),
+        "search_tokens": build_search_tokens("testuser", "Test User"),
         "full_name": "Test User",
         "hashed_password": get_password_hash("password123"),
         "is_active": True,
@@ -86,6 +240,8 @@ async def test_admin(test_db):
     admin_data = {
         "username": "admin",
         "email": "admin@example.com",
+        "login_keys": build_login_keys("admin@example.com", "admin"),
+        "search_tokens": build_search_tokens("admin", "Admin User"),
         "full_name": "Admin User",
         "hashed_password": get_password_hash("admin123"),
         "is_active": True,
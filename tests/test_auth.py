@@ -3,6 +3,7 @@ import pytest
 from fastapi.testclient import TestClient
 from src.main import app
 from src.core.security import create_email_verification_token
+from src.models.user import build_login_keys
 
 client = TestClient(app)
 
@@ -56,6 +57,7 @@ def test_verify_email(test_db):
     test_user = {
         "email": test_email,
         "username": "unverified_user",
+        "login_keys": build_login_keys(test_email, "unverified_user"),
         "hashed_password": "hashed_password",  # Not needed for this test
         "full_name": "Unverified User",
         "role": "basic_user",
@@ -65,8 +67,8 @@ def test_verify_email(test_db):
     # Insert user directly into test database
     test_db.users.insert_one(test_user)
     
-    # Generate a valid verification token
-    valid_token = create_email_verification_token(test_email)
+    # Generate a valid verification token, for the address typed in another case
+    valid_token = create_email_verification_token("Unverified@Example.com")
     
     # Test with valid token
     response = client.post(
@@ -81,6 +83,13 @@ def test_verify_email(test_db):
     assert verified_user["is_verified"] == True
     assert verified_user["is_active"] == True
     
+    # Verifying twice is rejected
+    response = client.post(
+        "/api/v1/auth/verify-email",
+        params={"token": valid_token}
+    )
+    assert response.status_code == 400
+    
     # Invalid token case
     response = client.post(
         "/api/v1/auth/verify-email",
@@ -0,0 +1,135 @@
+
+import asyncio
+import time
+
+from src.core.cache import LRUCache
+from src.core.invalidation import MemoryInvalidationBus, RedisInvalidationBus
+
+def test_lru_eviction():
+    """Test least recently used entries are evicted first"""
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_entry_expiry():
+    """Test entries expire after their ttl"""
+    cache = LRUCache(max_entries=10, ttl_seconds=60)
+    cache.set("short", "value", ttl=0.01)
+    cache.set("long", "value")
+    time.sleep(0.02)
+    
+    assert cache.get("short") is None
+    assert cache.get("long") == "value"
+
+def test_byte_budget():
+    """Test the cache stays under its byte budget"""
+    cache = LRUCache(max_entries=100, max_bytes=10, sizeof=len)
+    cache.set("a", b"12345")
+    cache.set("b", b"12345")
+    cache.set("c", b"12345")
+    
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 10
+
+def test_hit_miss_counters():
+    """Test hit and miss counters"""
+    cache = LRUCache(max_entries=10)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+    
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+def test_invalidation_bus_drops_key():
+    """Test published invalidations reach subscribed caches"""
+    bus = MemoryInvalidationBus()
+    cache = LRUCache(max_entries=10)
+    bus.subscribe("users", cache.delete)
+    cache.set("user-1", {"username": "testuser"})
+    
+    asyncio.run(bus.publish("users", "user-1"))
+    
+    assert cache.get("user-1") is None
+
+class FakePubSub:
+    """Delivers its messages, then either drops the connection or stays subscribed"""
+    
+    def __init__(self, messages, drop):
+        self.messages = messages
+        self.drop = drop
+    
+    async def psubscribe(self, pattern):
+        pass
+    
+    async def listen(self):
+        for message in self.messages:
+            yield message
+        if self.drop:
+            raise ConnectionError("connection lost")
+        await asyncio.Event().wait()
+    
+    async def aclose(self):
+        pass
+
+class FakeRedis:
+    def __init__(self, pubsubs):
+        self.pubsubs = list(pubsubs)
+    
+    def pubsub(self):
+        return self.pubsubs.pop(0)
+    
+    async def publish(self, channel, key):
+        raise ConnectionError("redis unavailable")
+    
+    async def aclose(self):
+        pass
+
+def test_redis_bus_resubscribes_after_disconnect():
+    """Test invalidations keep arriving after the pub/sub connection drops"""
+    message = {"type": "pmessage", "channel": b"invalidate:users", "data": b"user-1"}
+    bus = RedisInvalidationBus("redis://unused", client=FakeRedis([FakePubSub([], True), FakePubSub([message], False)]))
+    cache = LRUCache(max_entries=10)
+    bus.subscribe("users", cache.delete)
+    cache.set("user-1", {"username": "testuser"})
+    
+    async def run():
+        await bus.start()
+        await asyncio.sleep(0.3)
+        await bus.stop()
+    
+    asyncio.run(run())
+    assert cache.get("user-1") is None
+
+def test_redis_bus_publish_failure_is_not_raised():
+    """Test a Redis outage after a committed write still drops the local entry"""
+    bus = RedisInvalidationBus("redis://unused", client=FakeRedis([]))
+    cache = LRUCache(max_entries=10)
+    bus.subscribe("users", cache.delete)
+    cache.set("user-1", {"username": "testuser"})
+    
+    asyncio.run(bus.publish("users", "user-1"))
+    
+    assert cache.get("user-1") is None
+
+def test_decode_token_reuses_verified_claims():
+    """Test repeated decodes of one token are served from the claims cache"""
+    from src.core.security import create_access_token, decode_token, token_claims_cache
+    
+    token = create_access_token(data={"sub": "cached-user"})
+    hits = token_claims_cache.hits
+    first = decode_token(token)
+    first["sub"] = "mutated"
+    second = decode_token(token)
+    
+    assert second["sub"] == "cached-user"
+    assert token_claims_cache.hits == hits + 1
@@ -0,0 +1,43 @@
+import asyncio
+import gzip
+
+import pytest
+from fastapi import HTTPException
+
+from src.core.compression import gunzip_stream, gzip_stream, iter_lines
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+async def collect(chunks) -> list:
+    return [chunk async for chunk in chunks]
+
+def test_gzip_stream_round_trip():
+    """Test streamed gzip output is a valid gzip file that streams back unchanged"""
+    data = b"".join(b'{"username": "user_%d"}\n' % i for i in range(10000))
+    compressed = b"".join(asyncio.run(collect(gzip_stream(chunked(data, 4096)))))
+    assert gzip.decompress(compressed) == data
+    assert b"".join(asyncio.run(collect(gunzip_stream(chunked(compressed, 1000))))) == data
+
+def test_iter_lines_across_chunk_boundaries():
+    """Test lines split across chunks are rejoined and a missing final newline is tolerated"""
+    lines = asyncio.run(collect(iter_lines(chunked(b"first\nsecond\n\nthird", 3))))
+    assert lines == [b"first", b"second", b"", b"third"]
+
+def test_iter_lines_caps_partial_line():
+    """Test a line longer than the cap is refused even before its newline arrives"""
+    lines = asyncio.run(collect(iter_lines(chunked(b"a" * 100 + b"\nb", 7), max_line_bytes=100)))
+    assert lines == [b"a" * 100, b"b"]
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(collect(iter_lines(chunked(b"a" * 1000, 7), max_line_bytes=100)))
+    assert exc.value.status_code == 413
+
+def test_gunzip_stream_bounds_output_chunks():
+    """Test a highly compressed body is inflated a bounded piece at a time"""
+    data = b"\0" * (8 * 1024 * 1024)
+    compressed = gzip.compress(data)
+    assert len(compressed) < 16 * 1024
+    chunks = asyncio.run(collect(gunzip_stream(chunked(compressed, 4096), max_chunk_bytes=64 * 1024)))
+    assert max(len(chunk) for chunk in chunks) <= 64 * 1024
+    assert sum(len(chunk) for chunk in chunks) == len(data)
@@ -0,0 +1,76 @@
+
+import asyncio
+
+from src.core.event_sink import EventSink
+
+def test_no_records_lost_on_graceful_shutdown(fake_db):
+    """Test every emitted record is written once stop() returns"""
+    sink = EventSink(batch_size=50, flush_interval=60, max_buffer=20)
+    
+    async def run():
+        await sink.start(fake_db)
+        for i in range(1000):
+            collection = "login_history" if i % 2 else "audit_logs"
+            await sink.emit(collection, {"seq": i})
+        await sink.stop()
+    
+    asyncio.run(run())
+    
+    written = sorted(doc["seq"] for name in fake_db for doc in fake_db[name].documents)
+    assert written == list(range(1000))
+    assert sink.written == 1000
+    assert max(fake_db["login_history"].batches) <= 50
+
+def test_flushes_on_interval(fake_db):
+    """Test a partial batch is written once the flush interval passes"""
+    sink = EventSink(batch_size=100, flush_interval=0.01, max_buffer=100)
+    
+    async def run():
+        await sink.start(fake_db)
+        await sink.emit("login_history", {"seq": 1})
+        await asyncio.sleep(0.1)
+        flushed = len(fake_db["login_history"].documents)
+        await sink.stop()
+        return flushed
+    
+    assert asyncio.run(run()) == 1
+
+def test_unexpected_insert_error_drops_batch_only(fake_db):
+    """Test a non-Mongo error drops that batch and the writer keeps going"""
+    async def insert_many(documents, ordered=True):
+        raise ValueError("cannot encode object")
+    
+    fake_db["audit_logs"].insert_many = insert_many
+    sink = EventSink(batch_size=10, flush_interval=60, max_buffer=5)
+    
+    async def run():
+        await sink.start(fake_db)
+        await sink.emit("audit_logs", {"seq": 0})
+        for i in range(100):
+            await sink.emit("login_history", {"seq": i})
+        await sink.stop()
+    
+    asyncio.run(run())
+    
+    assert len(fake_db["login_history"].documents) == 100
+    assert sink.dropped == 1
+
+def test_emit_restarts_dead_worker(fake_db):
+    """Test emit() does not block forever on a full buffer after the writer died"""
+    sink = EventSink(batch_size=10, flush_interval=60, max_buffer=5)
+    
+    async def crash():
+        raise RuntimeError("writer crashed")
+    
+    async def run():
+        await sink.start(fake_db)
+        sink._worker.cancel()
+        sink._worker = asyncio.create_task(crash())
+        await asyncio.sleep(0)
+        for i in range(50):
+            await asyncio.wait_for(sink.emit("login_history", {"seq": i}), 1)
+        await sink.stop()
+    
+    asyncio.run(run())
+    
+    assert len(fake_db["login_history"].documents) == 50
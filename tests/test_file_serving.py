@@ -0,0 +1,112 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from src.core.blob_store import blob_path
+from src.core.file_serving import (
+    IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, build_file_meta, file_response, is_current, parse_ranges
+)
+
+CONTENT = bytes(range(256)) * 4
+UUID_NAME = "0b8e7c1e-6f1a-4c8e-9a51-2f8e0b1c3d4e.png"
+DIGEST = "ab" * 32
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / UUID_NAME).write_bytes(CONTENT)
+    app = FastAPI()
+    
+    @app.get("/files/{name}")
+    async def get_file(name: str, request: Request):
+        meta = await build_file_meta(name, os.path.join(tmp_path, name))
+        return await file_response(request, meta)
+    
+    return TestClient(app)
+
+def test_full_response_and_not_modified(client):
+    """Test validators are sent and a matching If-None-Match gets a 304"""
+    response = client.get(f"/files/{UUID_NAME}")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+    assert response.headers["last-modified"]
+    
+    response = client.get(f"/files/{UUID_NAME}", headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+    assert response.content == b""
+
+def test_single_and_multiple_ranges(client):
+    """Test one range gets a plain 206 and several get multipart/byteranges"""
+    response = client.get(f"/files/{UUID_NAME}", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+    assert response.content == CONTENT[10:20]
+    
+    response = client.get(f"/files/{UUID_NAME}", headers={"Range": "bytes=0-3, -4"})
+    assert response.status_code == 206
+    assert response.headers["content-type"].startswith("multipart/byteranges; boundary=")
+    assert int(response.headers["content-length"]) == len(response.content)
+    assert CONTENT[:4] in response.content and CONTENT[-4:] in response.content
+    assert f"Content-Range: bytes {len(CONTENT) - 4}-{len(CONTENT) - 1}/{len(CONTENT)}".encode() in response.content
+
+def test_unsatisfiable_and_stale_if_range(client):
+    """Test ranges past the end get a 416 and a stale If-Range gets the whole file"""
+    response = client.get(f"/files/{UUID_NAME}", headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+    
+    response = client.get(f"/files/{UUID_NAME}", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+def test_parse_ranges():
+    """Test range specs are clamped, and malformed headers fall back to the whole file"""
+    assert parse_ranges("bytes=0-99", 50) == [(0, 49)]
+    assert parse_ranges("bytes=-10,40-", 50) == [(40, 49), (40, 49)]
+    assert parse_ranges("bytes=60-70", 50) == []
+    assert parse_ranges("bytes=9-3", 50) is None
+    assert parse_ranges("items=0-1", 50) is None
+    assert parse_ranges(None, 50) is None
+
+def test_rewritten_file_is_not_current(tmp_path):
+    """Test metadata cached by another worker is detected as stale after a smaller rewrite"""
+    path = tmp_path / UUID_NAME
+    path.write_bytes(CONTENT)
+    meta = asyncio.run(build_file_meta(UUID_NAME, str(path)))
+    assert asyncio.run(is_current(meta))
+    
+    path.write_bytes(CONTENT[:10])
+    assert not asyncio.run(is_current(meta))
+    
+    path.unlink()
+    assert not asyncio.run(is_current(meta))
+
+def test_only_blob_paths_are_immutable(tmp_path):
+    """Test a uuid name a client can rewrite revalidates, while a blob path is immutable"""
+    path = tmp_path / UUID_NAME
+    path.write_bytes(CONTENT)
+    meta = asyncio.run(build_file_meta(f"uploads/{UUID_NAME}", str(path)))
+    assert meta.cache_control == REVALIDATE_CACHE_CONTROL
+    
+    meta = asyncio.run(build_file_meta(blob_path(DIGEST), str(path)))
+    assert meta.cache_control == IMMUTABLE_CACHE_CONTROL
+    meta = asyncio.run(build_file_meta(f"uploads/{DIGEST}", str(path)))
+    assert meta.cache_control == REVALIDATE_CACHE_CONTROL
+
+def test_repointed_ref_is_not_current(tmp_path):
+    """Test a deduplicated path is stale once its file ref points at another blob"""
+    path = tmp_path / DIGEST
+    path.write_bytes(CONTENT)
+    meta = asyncio.run(build_file_meta(UUID_NAME, str(path), "image/png", DIGEST))
+    assert meta.etag == f'"{DIGEST}"'
+    assert asyncio.run(is_current(meta, DIGEST))
+    assert not asyncio.run(is_current(meta, "cd" * 32))
+    assert not asyncio.run(is_current(meta, None))
+    
+    # A plain file that has since been replaced by a deduplicated upload
+    meta = asyncio.run(build_file_meta(UUID_NAME, str(path)))
+    assert not asyncio.run(is_current(meta, DIGEST))
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from src.core import security
+from src.core.hash_pool import HashPool, HashPoolSaturated
+
+def test_full_pool_rejects_with_503(monkeypatch):
+    """Test work beyond max_pending is refused with a 503 instead of queueing"""
+    pool = HashPool(kind="thread", workers=1, max_pending=2)
+    monkeypatch.setattr(security, "hash_pool", pool)
+    release = threading.Event()
+    monkeypatch.setattr(security, "verify_password", lambda plain, hashed: release.wait(5))
+    
+    async def run():
+        busy = [asyncio.create_task(security.verify_password_async("password", "hash")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert pool.pending == 2
+        with pytest.raises(HTTPException) as exc:
+            await security.verify_password_async("password", "hash")
+        release.set()
+        return exc.value, await asyncio.gather(*busy)
+    
+    try:
+        rejection, results = asyncio.run(run())
+    finally:
+        release.set()
+        pool.shutdown()
+    
+    assert rejection.status_code == 503
+    assert rejection.headers["Retry-After"] == "1"
+    assert results == [True, True]
+    assert pool.stats()["rejected"] == 1
+    assert pool.pending == 0
+
+def test_cancelled_caller_keeps_slot_until_job_ends():
+    """Test a hash whose caller went away still counts against max_pending while it runs"""
+    pool = HashPool(kind="thread", workers=1, max_pending=1)
+    release = threading.Event()
+    
+    async def run():
+        waiter = asyncio.create_task(pool.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert pool.pending == 1
+        with pytest.raises(HashPoolSaturated):
+            await pool.run(release.wait, 5)
+        
+        release.set()
+        for _ in range(100):
+            if pool.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        return await pool.run(lambda: "hashed")
+    
+    try:
+        result = asyncio.run(run())
+    finally:
+        release.set()
+        pool.shutdown()
+    
+    assert result == "hashed"
+    assert pool.pending == 0
+    assert pool.rejected == 1
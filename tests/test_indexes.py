@@ -0,0 +1,49 @@
+import asyncio
+
+from src.core import indexes
+from src.core.indexes import diff_indexes, index_spec, registry_fingerprint, registry_specs
+
+def live_documents(collection):
+    documents = [{"name": "_id_", "key": {"_id": 1}, "v": 2}]
+    return documents + [{**model.document, "v": 2} for model in indexes.INDEXES[collection]]
+
+def registry_db(fake_db, overrides=None):
+    """listIndexes results per collection, defaulting to exactly what the registry declares"""
+    for collection in indexes.INDEXES:
+        fake_db[collection].indexes = (overrides or {}).get(collection) or live_documents(collection)
+    return fake_db
+
+def test_index_spec_keeps_zero_ttl():
+    """Test expireAfterSeconds=0 is part of the spec while false options are dropped"""
+    spec = index_spec({"key": {"expires_at": 1}, "expireAfterSeconds": 0, "sparse": False, "v": 2})
+    assert spec == {"key": [["expires_at", 1]], "expireAfterSeconds": 0}
+    assert spec != index_spec({"key": {"expires_at": 1}})
+
+def test_diff_matches_registry(fake_db):
+    assert asyncio.run(diff_indexes(registry_db(fake_db))) == {}
+
+def test_diff_detects_missing_ttl_and_extra_index(fake_db):
+    """Test a plain expires_at index is replaced by the TTL one, and unknown indexes are reported"""
+    documents = live_documents("refresh_tokens")
+    for document in documents:
+        if document["name"] == "expires_at_ttl":
+            del document["expireAfterSeconds"]
+    documents.append({"name": "legacy_1", "key": {"legacy": 1}})
+    
+    changes = asyncio.run(diff_indexes(registry_db(fake_db, {"refresh_tokens": documents})))
+    
+    assert changes == {"refresh_tokens": {"create": [], "replace": ["expires_at_ttl"], "extra": ["legacy_1"]}}
+
+def test_fingerprint_tracks_index_options(monkeypatch):
+    """Test the fingerprint changes when only an index option changes"""
+    before = registry_fingerprint()
+    assert registry_specs()["refresh_tokens"]["expires_at_ttl"]["expireAfterSeconds"] == 0
+    
+    monkeypatch.setattr(indexes, "registry_specs", lambda: {
+        **registry_specs(),
+        "refresh_tokens": {
+            **registry_specs()["refresh_tokens"],
+            "expires_at_ttl": {"key": [["expires_at", 1]]},
+        },
+    })
+    assert registry_fingerprint() != before
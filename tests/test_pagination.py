@@ -0,0 +1,76 @@
+import base64
+from datetime import datetime
+
+import orjson
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from src.core.pagination import decode_cursor, encode_cursor, keyset_filter
+
+SORT = [("timestamp", -1), ("_id", -1)]
+
+def _after(document: dict, query: dict) -> bool:
+    """Evaluate a keyset_filter result against a document"""
+    if "$or" in query:
+        return any(_after(document, branch) for branch in query["$or"])
+    for field, condition in query.items():
+        if isinstance(condition, dict):
+            (operator, value), = condition.items()
+            if not (document[field] < value if operator == "$lt" else document[field] > value):
+                return False
+        elif document[field] != condition:
+            return False
+    return True
+
+def test_cursor_round_trip():
+    """Test ObjectIds, datetimes and plain values survive encoding"""
+    values = [datetime(2026, 10, 17, 12, 30, 15, 123000), ObjectId(), "seller", 42]
+    cursor = encode_cursor(*values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 4) == values
+
+def test_keyset_pages_break_timestamp_ties_by_id():
+    """Test paging with equal timestamps neither skips nor repeats documents"""
+    same = datetime(2026, 10, 17)
+    documents = [{"timestamp": same if i < 7 else datetime(2026, 10, 16), "_id": ObjectId()} for i in range(10)]
+    ordered = sorted(documents, key=lambda d: (d["timestamp"], d["_id"]), reverse=True)
+    
+    seen, cursor = [], None
+    while True:
+        candidates = ordered
+        if cursor is not None:
+            query = keyset_filter(SORT, decode_cursor(cursor, 2))
+            candidates = [document for document in ordered if _after(document, query)]
+        page = candidates[:3]
+        if not page:
+            break
+        seen.extend(page)
+        cursor = encode_cursor(page[-1]["timestamp"], page[-1]["_id"])
+    
+    assert [d["_id"] for d in seen] == [d["_id"] for d in ordered]
+
+def test_keyset_filter_shape():
+    after = [datetime(2026, 10, 17), ObjectId()]
+    assert keyset_filter(SORT, after) == {"$or": [
+        {"timestamp": {"$lt": after[0]}},
+        {"timestamp": after[0], "_id": {"$lt": after[1]}},
+    ]}
+    assert keyset_filter([("_id", 1)], after[1:]) == {"_id": {"$gt": after[1]}}
+
+def _raw(value) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(value)).decode()
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    _raw({"o": "abc"}),
+    _raw([{"o": "not-an-object-id"}, 1]),
+    _raw([{"d": "yesterday"}, 1]),
+    _raw([{"$ne": None}, {"o": str(ObjectId())}]),
+    encode_cursor(datetime(2026, 10, 17)),
+])
+def test_bad_cursor_is_400(cursor):
+    """Test malformed, tampered and wrong-arity cursors are rejected"""
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, 2)
+    assert exc.value.status_code == 400
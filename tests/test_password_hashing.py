@@ -0,0 +1,40 @@
+from argon2 import PasswordHasher
+from passlib.context import CryptContext
+
+from scripts import calibrate_argon2
+from src.config import settings
+from src.core import security
+
+def test_hash_with_other_cost_settings_needs_rehash():
+    """Test hashes made with older Argon2 costs still verify but are flagged for upgrade"""
+    old_hash = PasswordHasher(time_cost=1, memory_cost=8 * 1024, parallelism=1).hash("password123")
+    assert security.verify_password("password123", old_hash)
+    assert security.password_needs_rehash(old_hash)
+    
+    current_hash = security.get_password_hash("password123")
+    assert not security.password_needs_rehash(current_hash)
+
+def test_changed_settings_flag_existing_hashes(monkeypatch):
+    """Test raising the configured cost makes hashes made under the old settings outdated"""
+    current_hash = security.get_password_hash("password123")
+    monkeypatch.setattr(security, "pwd_context", CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__time_cost=settings.ARGON2_TIME_COST + 1,
+        argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+        argon2__parallelism=settings.ARGON2_PARALLELISM,
+    ))
+    assert security.password_needs_rehash(current_hash)
+    assert security.verify_password("password123", current_hash)
+
+def test_calibration_spends_memory_then_time(monkeypatch):
+    """Test memory is halved only while one pass is over target, then time_cost grows to fit"""
+    monkeypatch.setattr(calibrate_argon2, "measure", lambda t, m, p, samples: t * m / 1024)
+    
+    result = calibrate_argon2.calibrate(target_ms=100, max_memory_kib=256 * 1024, parallelism=1, samples=1)
+    
+    assert result["memory_cost"] == 64 * 1024
+    assert result["time_cost"] == 1
+    
+    result = calibrate_argon2.calibrate(target_ms=250, max_memory_kib=64 * 1024, parallelism=1, samples=1)
+    assert (result["memory_cost"], result["time_cost"], result["latency_ms"]) == (64 * 1024, 3, 192)
@@ -0,0 +1,193 @@
+
+import asyncio
+import time
+
+import pytest
+
+from src.core.rate_limit import MemoryRateLimitBackend, RedisRateLimitBackend
+
+def test_memory_backend_blocks_after_limit():
+    """Test requests beyond the limit are rejected with a retry delay"""
+    backend = MemoryRateLimitBackend(max_keys=100, sweep_interval=60)
+    
+    async def run():
+        results = [await backend.hit("login:1.2.3.4", 5, 60) for _ in range(6)]
+        return results
+    
+    results = asyncio.run(run())
+    assert all(allowed for allowed, _ in results[:5])
+    allowed, retry_after = results[5]
+    assert not allowed
+    assert 0 < retry_after <= 12
+
+def test_memory_backend_bounded_keys():
+    """Test the key table never grows past max_keys"""
+    backend = MemoryRateLimitBackend(max_keys=10, sweep_interval=60)
+    
+    async def run():
+        for i in range(100):
+            await backend.hit(f"login:10.0.0.{i}", 5, 60)
+    
+    asyncio.run(run())
+    assert len(backend) == 10
+    assert backend.evictions == 90
+
+def test_memory_backend_sweep():
+    """Test keys with a replenished budget are swept"""
+    backend = MemoryRateLimitBackend(max_keys=10, sweep_interval=60)
+    asyncio.run(backend.hit("login:1.2.3.4", 100, 1))
+    time.sleep(0.02)
+    backend.sweep()
+    assert len(backend) == 0
+
+def test_redis_backend_blocks_after_limit():
+    """Test the Lua limiter against fakeredis"""
+    fakeredis = pytest.importorskip("fakeredis")
+    backend = RedisRateLimitBackend("redis://unused", client=fakeredis.FakeAsyncRedis())
+    
+    async def run():
+        await backend.start()
+        results = [await backend.hit("login:1.2.3.4", 5, 60) for _ in range(6)]
+        other = await backend.hit("login:5.6.7.8", 5, 60)
+        await backend.stop()
+        return results, other
+    
+    results, other = asyncio.run(run())
+    assert all(allowed for allowed, _ in results[:5])
+    assert not results[5][0]
+    assert results[5][1] > 0
+    assert other[0]
+
+def test_redis_backend_spends_all_budgets_or_none():
+    """Test a request rejected by one key leaves the other keys' budgets untouched"""
+    fakeredis = pytest.importorskip("fakeredis")
+    backend = RedisRateLimitBackend("redis://unused", client=fakeredis.FakeAsyncRedis())
+    
+    async def run():
+        await backend.start()
+        first = await backend.hit_all([("ip:1.2.3.4", 2, 60), ("account:a", 1, 60)])
+        rejected = await backend.hit_all([("ip:1.2.3.4", 2, 60), ("account:a", 1, 60)])
+        other_account = await backend.hit_all([("ip:1.2.3.4", 2, 60), ("account:b", 1, 60)])
+        await backend.stop()
+        return first, rejected, other_account
+    
+    first, rejected, other_account = asyncio.run(run())
+    assert first[0]
+    assert not rejected[0] and 0 < rejected[1] <= 60
+    assert other_account[0]
+
+def _scope(client, path="/api/v1/auth/login", query=b"", headers=()):
+    return {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "client": (client, 50000),
+        "query_string": query,
+        "headers": list(headers),
+    }
+
+def test_middleware_rejects_before_body_is_read():
+    """Test over-limit requests get a 429 without the app or body being touched"""
+    from src.core.rate_limit import RateLimitMiddleware, RateLimitPolicy
+    
+    calls = []
+    
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+    
+    async def receive():
+        raise AssertionError("request body must not be read")
+    
+    sent = []
+    
+    async def send(message):
+        sent.append(message)
+    
+    middleware = RateLimitMiddleware(
+        app,
+        policies={("POST", "/api/v1/auth/login"): [RateLimitPolicy("login", "ip", 2, 60)]},
+        backend=MemoryRateLimitBackend(max_keys=100, sweep_interval=60),
+    )
+    
+    async def run():
+        for _ in range(3):
+            await middleware(_scope("1.2.3.4"), receive, send)
+    
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert sent[0]["status"] == 429
+
+def test_middleware_rejection_spends_no_budget():
+    """Test a request rejected per account does not use up its address's budget"""
+    from src.core.rate_limit import RateLimitMiddleware, RateLimitPolicy
+    
+    calls = []
+    
+    async def app(scope, receive, send):
+        calls.append(scope["query_string"])
+    
+    sent = []
+    
+    async def send(message):
+        sent.append(message)
+    
+    path = "/api/v1/auth/forgot-password"
+    middleware = RateLimitMiddleware(
+        app,
+        policies={("POST", path): [
+            RateLimitPolicy("forgot_password", "ip", 2, 60),
+            RateLimitPolicy("forgot_password:account", "query:email", 1, 60),
+        ]},
+        backend=MemoryRateLimitBackend(max_keys=100, sweep_interval=60),
+    )
+    
+    async def run():
+        for query in (b"email=a@example.com", b"email=a@example.com", b"email=a@example.com", b"email=b@example.com"):
+            await middleware(_scope("1.2.3.4", path=path, query=query), None, send)
+    
+    asyncio.run(run())
+    assert calls == [b"email=a@example.com", b"email=b@example.com"]
+    assert [message["status"] for message in sent if message["type"] == "http.response.start"] == [429, 429]
+
+def test_middleware_falls_back_when_backend_fails():
+    """Test a failing backend (Redis down) limits in-process instead of raising a 500"""
+    from src.core.rate_limit import RateLimitBackend, RateLimitMiddleware, RateLimitPolicy
+    
+    class DownBackend(RateLimitBackend):
+        async def hit_all(self, hits):
+            raise ConnectionError("redis unavailable")
+    
+    calls = []
+    
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+    
+    sent = []
+    
+    async def send(message):
+        sent.append(message)
+    
+    middleware = RateLimitMiddleware(
+        app,
+        policies={("POST", "/api/v1/auth/login"): [RateLimitPolicy("login", "ip", 2, 60)]},
+        backend=DownBackend(),
+    )
+    
+    async def run():
+        for _ in range(3):
+            await middleware(_scope("1.2.3.4"), None, send)
+    
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert sent[0]["status"] == 429
+
+def test_client_ip_only_trusts_configured_proxies(monkeypatch):
+    """Test X-Forwarded-For is ignored unless the peer is a trusted proxy"""
+    import ipaddress
+    from src.core import rate_limit
+    
+    monkeypatch.setattr(rate_limit, "_TRUSTED_PROXY_NETWORKS", [ipaddress.ip_network("10.0.0.0/8")])
+    headers = [(b"x-forwarded-for", b"6.6.6.6, 203.0.113.7, 10.0.0.2")]
+    
+    assert rate_limit.client_ip(_scope("10.0.0.1", headers=headers)) == "203.0.113.7"
+    assert rate_limit.client_ip(_scope("198.51.100.1", headers=headers)) == "198.51.100.1"
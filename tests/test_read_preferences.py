@@ -0,0 +1,38 @@
+import asyncio
+from types import SimpleNamespace
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
+
+from src.config import settings
+from src.core.mongo import group_databases
+from src.dependencies import get_admin_read_db, get_db, get_db_for, get_profile_db
+
+def resolve(dependency, app):
+    return asyncio.run(dependency(SimpleNamespace(app=app)))
+
+def make_app():
+    async def build():
+        client = AsyncIOMotorClient("mongodb://localhost:27017", connect=False)
+        groups = group_databases(client["bechdo_test_db"])
+        return SimpleNamespace(mongodb=groups["default"], mongodb_groups=groups)
+    return asyncio.run(build())
+
+def test_each_dependency_gets_its_read_preference(monkeypatch):
+    """Test endpoint groups read from secondaries while everything else stays on the primary"""
+    monkeypatch.setattr(settings, "MONGODB_MAX_STALENESS_SECONDS", 90)
+    app = make_app()
+    
+    assert resolve(get_db, app).read_preference == ReadPreference.PRIMARY
+    for dependency in (get_profile_db, get_admin_read_db):
+        preference = resolve(dependency, app).read_preference
+        assert preference.mongos_mode == "secondaryPreferred"
+        assert preference.max_staleness == 90
+
+def test_unknown_group_falls_back_to_default():
+    app = make_app()
+    assert resolve(get_db_for("reports"), app) is app.mongodb
+    
+    # Apps that never configured groups (e.g. the test fixture) use their single handle
+    plain = SimpleNamespace(mongodb=app.mongodb)
+    assert resolve(get_profile_db, plain) is plain.mongodb
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from src.config import settings
+from src.core.refresh_tokens import hash_token, revoke_token, revoke_user_tokens, rotate_token, store_token
+
+def test_store_token_keeps_only_the_hash(fake_db):
+    """Test the raw token is never stored and the entry expires with the token"""
+    asyncio.run(store_token(fake_db, "user-1", "raw-token"))
+    
+    [entry] = fake_db.refresh_tokens.documents
+    assert entry["token_hash"] == hash_token("raw-token")
+    assert len(entry["token_hash"]) == 32
+    assert "raw-token" not in entry.values()
+    lifetime = entry["expires_at"] - entry["created_at"]
+    assert lifetime == timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+def test_rotate_token_is_single_use(fake_db):
+    """Test a rotated token cannot be rotated again, and its replacement can"""
+    
+    async def run():
+        await store_token(fake_db, "user-1", "first")
+        rotated = await rotate_token(fake_db, "first", "second")
+        replayed = await rotate_token(fake_db, "first", "third")
+        rotated_again = await rotate_token(fake_db, "second", "fourth")
+        return rotated, replayed, rotated_again
+    
+    rotated, replayed, rotated_again = asyncio.run(run())
+    assert rotated["user_id"] == "user-1"
+    assert replayed is None
+    assert rotated_again["user_id"] == "user-1"
+    first = fake_db.refresh_tokens.documents[0]
+    assert first["is_blacklisted"] is True
+    assert isinstance(first["blacklisted_at"], datetime)
+
+def test_rotate_rejects_expired_token(fake_db):
+    fake_db.refresh_tokens.documents.append({
+        "user_id": "user-1",
+        "token_hash": hash_token("old"),
+        "expires_at": datetime.utcnow() - timedelta(seconds=1),
+    })
+    assert asyncio.run(rotate_token(fake_db, "old", "new")) is None
+    assert len(fake_db.refresh_tokens.documents) == 1
+
+def test_revoke_token_only_for_its_owner(fake_db):
+    """Test a token is revoked once, and only by the user it was issued to"""
+    
+    async def run():
+        await store_token(fake_db, "user-1", "token")
+        return [
+            await revoke_token(fake_db, "token", "user-2"),
+            await revoke_token(fake_db, "token", "user-1"),
+            await revoke_token(fake_db, "token", "user-1"),
+        ]
+    
+    assert asyncio.run(run()) == [False, True, False]
+
+def test_revoke_user_tokens_leaves_other_users(fake_db):
+    
+    async def run():
+        for user_id, token in (("user-1", "a"), ("user-1", "b"), ("user-2", "c")):
+            await store_token(fake_db, user_id, token)
+        await revoke_user_tokens(fake_db, "user-1")
+    
+    asyncio.run(run())
+    revoked = [doc.get("is_blacklisted", False) for doc in fake_db.refresh_tokens.documents]
+    assert revoked == [True, True, False]
@@ -0,0 +1,99 @@
+import asyncio
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.endpoints import storage
+from src.config import settings
+from src.core import s3
+from src.dependencies import get_current_user, get_db
+
+@pytest.fixture
+def s3_mode(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_MODE", "s3")
+    monkeypatch.setattr(settings, "AWS_ACCESS_KEY_ID", "AKIDEXAMPLE")
+    monkeypatch.setattr(settings, "AWS_SECRET_ACCESS_KEY", "secret")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    s3._reset_client()
+    s3.download_url_cache.clear()
+    yield
+    s3._reset_client()
+    s3.download_url_cache.clear()
+
+def test_client_is_shared_until_reset(s3_mode):
+    client = s3.get_s3_client()
+    assert s3.get_s3_client() is client
+    
+    s3._reset_client()
+    assert s3.get_s3_client() is not client
+
+def test_local_mode_has_no_client(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_MODE", "local")
+    assert s3.get_s3_client() is None
+
+def test_batch_presign_signs_each_key(s3_mode):
+    files = [
+        {"file_path": f"uploads/u1/{i}.jpg", "content_type": "image/jpeg"}
+        for i in range(3)
+    ]
+    
+    urls = asyncio.run(s3.generate_presigned_urls_async(files, expires_in=120))
+    
+    assert len(urls) == 3
+    for f, url in zip(files, urls):
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+        assert parsed.path.endswith(f["file_path"])
+        assert query["X-Amz-Expires"] == ["120"]
+        assert "X-Amz-Signature" in query
+
+def test_download_url_is_reused_until_slack(s3_mode):
+    url, reusable_for = asyncio.run(s3.presigned_download_url("uploads/u1/a.jpg"))
+    again, _ = asyncio.run(s3.presigned_download_url("uploads/u1/a.jpg"))
+    
+    assert again == url
+    assert parse_qs(urlparse(url).query)["X-Amz-Expires"] == [str(settings.S3_DOWNLOAD_URL_EXPIRES_SECONDS)]
+    assert reusable_for <= settings.S3_DOWNLOAD_URL_EXPIRES_SECONDS - settings.S3_DOWNLOAD_URL_SLACK_SECONDS
+    assert s3.download_url_cache.stats()["hits"] == 1
+    
+    # Once the entry lapses the key is signed again
+    s3.download_url_cache.delete("uploads/u1/a.jpg")
+    asyncio.run(s3.presigned_download_url("uploads/u1/a.jpg"))
+    assert s3.download_url_cache.stats()["misses"] == 2
+
+def test_s3_file_redirects_or_returns_json(s3_mode):
+    app = FastAPI()
+    app.include_router(storage.router, prefix="/storage")
+    app.dependency_overrides[get_db] = lambda: None
+    client = TestClient(app)
+    
+    response = client.get("/storage/files/uploads/u1/a.jpg", follow_redirects=False)
+    assert response.status_code == 302
+    assert "X-Amz-Signature" in response.headers["location"]
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    
+    body = client.get("/storage/files/uploads/u1/a.jpg?redirect=false").json()
+    assert body["url"] == response.headers["location"]
+    assert body["expires_in"] > 0
+
+@pytest.mark.parametrize("mode", ["local", "s3"])
+def test_presign_rejects_folders_outside_storage(s3_mode, monkeypatch, tmp_path, mode):
+    """Test a traversing folder is refused before local mode creates any directory"""
+    monkeypatch.setattr(settings, "STORAGE_MODE", mode)
+    monkeypatch.setattr(settings, "LOCAL_STORAGE_PATH", str(tmp_path / "storage"))
+    app = FastAPI()
+    app.include_router(storage.router, prefix="/storage")
+    app.dependency_overrides[get_current_user] = lambda: {"id": "u1"}
+    client = TestClient(app)
+    files = [{"filename": "a.jpg", "content_type": "image/jpeg"}]
+    
+    for folder in ("../../x", "blobs"):
+        response = client.post("/storage/presign", json={"files": files, "folder": folder})
+        assert response.status_code == 400
+    assert not (tmp_path / "x").exists()
+    
+    response = client.post("/storage/presign", json={"files": files, "folder": "listings"})
+    assert response.status_code == 200
+    assert response.json()["uploads"][0]["file_key"].startswith("listings/u1/")
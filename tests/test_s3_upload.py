@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import io
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+from src.core.s3 import upload_to_s3
+
+PART_SIZE = 1024
+PDF = b"%PDF-" + bytes(range(256)) * 40
+
+class FakeS3Client:
+    """In-memory stand-in for the boto3 S3 client calls used by multipart uploads"""
+    
+    def __init__(self, failures=None, error=("SlowDown", 503), delays=None):
+        self.objects = {}
+        self.delays = dict(delays or {})
+        self.events = []
+        self.uploads = {}
+        self.aborted = []
+        self.failures = dict(failures or {})
+        self.error = error
+        self.attempts = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+    
+    def put_object(self, Bucket, Key, Body, ContentType):
+        self.objects[Key] = Body
+    
+    def create_multipart_upload(self, Bucket, Key, ContentType):
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+    
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.attempts[PartNumber] = self.attempts.get(PartNumber, 0) + 1
+            failing = self.failures.get(PartNumber, 0)
+            if failing:
+                self.failures[PartNumber] = failing - 1
+        try:
+            time.sleep(self.delays.get(PartNumber, 0.005))
+            self.events.append(("part", PartNumber))
+            if failing:
+                code, status_code = self.error
+                raise ClientError(
+                    {"Error": {"Code": code, "Message": code}, "ResponseMetadata": {"HTTPStatusCode": status_code}},
+                    "UploadPart"
+                )
+            self.uploads[UploadId][PartNumber] = Body
+            return {"ETag": f'"{PartNumber}"'}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+    
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        self.objects[Key] = b"".join(parts[part["PartNumber"]] for part in MultipartUpload["Parts"])
+    
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+        self.aborted.append(UploadId)
+        self.events.append(("abort", UploadId))
+
+def make_upload(data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="doc.pdf", headers=Headers({"content-type": "application/pdf"}))
+
+def upload(client, data=PDF, **kwargs):
+    return asyncio.run(upload_to_s3(
+        make_upload(data), "uploads/doc.pdf", client=client,
+        part_size=PART_SIZE, concurrency=3, max_retries=2, **kwargs
+    ))
+
+def test_multipart_upload_with_bounded_window():
+    """Test parts are uploaded concurrently, never more than the window, and reassemble"""
+    client = FakeS3Client()
+    saved = upload(client)
+    assert saved == {"size": len(PDF), "sha256": hashlib.sha256(PDF).hexdigest()}
+    assert client.objects["uploads/doc.pdf"] == PDF
+    assert 1 < client.max_in_flight <= 3
+
+def test_small_upload_is_single_put():
+    """Test a file smaller than one part skips the multipart protocol"""
+    client = FakeS3Client()
+    upload(client, PDF[:100])
+    assert client.objects["uploads/doc.pdf"] == PDF[:100]
+    assert client.uploads == {} and client.aborted == []
+
+def test_failed_part_is_retried():
+    """Test a transient part failure is retried and the upload completes"""
+    client = FakeS3Client(failures={2: 2})
+    upload(client)
+    assert client.objects["uploads/doc.pdf"] == PDF
+    assert client.attempts[2] == 3
+
+def test_server_error_is_retried():
+    """Test a 5xx without a throttling code is treated as transient"""
+    client = FakeS3Client(failures={2: 1}, error=("InternalServerError", 500))
+    upload(client)
+    assert client.objects["uploads/doc.pdf"] == PDF
+
+def test_client_error_is_not_retried():
+    """Test a 4xx such as AccessDenied fails the upload on the first attempt"""
+    client = FakeS3Client(failures={2: 1}, error=("AccessDenied", 403))
+    with pytest.raises(HTTPException) as exc:
+        upload(client)
+    assert exc.value.status_code == 502
+    assert client.attempts[2] == 1
+    assert client.aborted == ["upload-0"]
+
+def test_upload_aborted_on_persistent_failure():
+    """Test a part failing past its retries aborts the multipart upload"""
+    client = FakeS3Client(failures={3: 10})
+    with pytest.raises(HTTPException) as exc:
+        upload(client)
+    assert exc.value.status_code == 502
+    assert client.aborted == ["upload-0"]
+    assert "uploads/doc.pdf" not in client.objects
+
+def test_upload_aborted_when_too_large():
+    """Test exceeding the size cap mid-stream aborts the multipart upload"""
+    client = FakeS3Client()
+    with pytest.raises(HTTPException) as exc:
+        upload(client, max_bytes=PART_SIZE * 3)
+    assert exc.value.status_code == 413
+    assert client.aborted == ["upload-0"]
+
+def test_abort_waits_for_parts_in_flight():
+    """Test parts still being sent when another fails finish before the upload is aborted"""
+    client = FakeS3Client(failures={1: 1}, error=("AccessDenied", 403), delays={2: 0.1, 3: 0.1})
+    with pytest.raises(HTTPException):
+        upload(client)
+    assert client.events[-1] == ("abort", "upload-0")
+    assert {("part", 2), ("part", 3)} <= set(client.events)
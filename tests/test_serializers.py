@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import orjson
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.core.fieldsets import parse_fields
+from src.core.serializers import JSONBytesResponse
+from src.models.user import User, UserPublic, UserRole, user_public_serializer, user_serializer
+
+def _document(**overrides) -> dict:
+    document = {
+        "_id": ObjectId(),
+        "email": "zoe@example.com",
+        "username": "zoe",
+        "full_name": "Zoë Müller",
+        "hashed_password": "not serialized",
+        "is_active": True,
+        "is_verified": False,
+        "role": "seller",
+        "phone": None,
+        "location": {"city": "Zürich", "coordinates": [8.54, 47.37]},
+        "created_at": datetime(2026, 10, 17, 12, 30, 15, 123000),
+        "updated_at": datetime(2026, 10, 17, 12, 30, 15),
+    }
+    document.update(overrides)
+    return document
+
+def _pydantic_body(model, document: dict) -> bytes:
+    """What a response_model endpoint returned for the document before DocumentSerializer"""
+    content = {**document, "id": str(document["_id"])}
+    return JSONResponse(jsonable_encoder(model.model_validate(content))).body
+
+def test_partial_serializer_projects_selected_fields():
+    """Test a fieldset maps to a matching projection and response shape"""
+    serializer = user_serializer.partial(["id", "username", "profile_picture_url"])
+    assert serializer.projection == {"username": 1, "profile_picture_url": 1}
+    assert user_serializer.partial(["id"]).projection == {"_id": 1}
+    assert user_serializer.partial(["username", "profile_picture_url", "id"]) is serializer
+    
+    user_id = ObjectId()
+    body = orjson.loads(serializer.dump({"_id": user_id, "username": "seller1"}))
+    assert body == {"username": "seller1", "id": str(user_id), "profile_picture_url": None}
+
+def test_parse_fields_enforces_allowlist():
+    """Test fields outside the allowlist are rejected with a 400"""
+    assert parse_fields(None, user_public_serializer.fields) is None
+    assert parse_fields("id, username", user_public_serializer.fields) == {"id", "username"}
+    for fields in ["id,email", ",", "password"]:
+        with pytest.raises(HTTPException) as exc:
+            parse_fields(fields, user_public_serializer.fields)
+        assert exc.value.status_code == 400
+
+@pytest.mark.parametrize("overrides", [
+    {},
+    {"role": UserRole.ADMIN},
+    {"created_at": datetime(2026, 1, 2, 3, 4, 5, 999000), "profile_picture_url": "/api/v1/storage/files/a.png"},
+])
+@pytest.mark.parametrize("model, serializer", [(User, user_serializer), (UserPublic, user_public_serializer)])
+def test_orjson_bytes_match_pydantic_response(model, serializer, overrides):
+    """Test ObjectIds, datetimes, enums and non-ASCII text encode exactly as the response_model path did"""
+    document = _document(**overrides)
+    assert serializer.dump(document) == _pydantic_body(model, document)
+    assert JSONBytesResponse(serializer.dump(document)).body == _pydantic_body(model, document)
+
+def test_dump_many_matches_pydantic_list():
+    documents = [_document(), _document(role=UserRole.MODERATOR, username="bo")]
+    expected = JSONResponse(jsonable_encoder([
+        UserPublic.model_validate({**document, "id": str(document["_id"])}) for document in documents
+    ])).body
+    assert user_public_serializer.dump_many(documents) == expected
@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+from src.api.endpoints.storage import _store_local
+from src.config import settings
+from src.core.blob_store import blob_path, check_not_blob_path, release_blob, save_blob
+from src.core.uploads import save_upload, storage_path
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 1000
+
+def make_upload(data: bytes, content_type: str = "image/png") -> UploadFile:
+    return UploadFile(
+        file=io.BytesIO(data),
+        filename="avatar.png",
+        headers=Headers({"content-type": content_type}),
+    )
+
+def test_save_upload_streams_and_hashes(tmp_path):
+    """Test the file lands atomically with its size and sha256, leaving no temp file"""
+    destination = str(tmp_path / "avatars" / "avatar.png")
+    saved = asyncio.run(save_upload(make_upload(PNG), destination, chunk_size=4096))
+    assert saved == {"size": len(PNG), "sha256": hashlib.sha256(PNG).hexdigest()}
+    assert open(destination, "rb").read() == PNG
+    assert os.listdir(tmp_path / "avatars") == ["avatar.png"]
+
+@pytest.mark.parametrize("data, content_type, status_code", [
+    (PNG, "image/png", 413),
+    (b"GIF89a" + PNG, "image/png", 415),
+    (PNG, "text/html", 415),
+])
+def test_save_upload_rejects_without_leftovers(tmp_path, data, content_type, status_code):
+    """Test oversized, mislabelled and disallowed uploads are refused and cleaned up"""
+    destination = str(tmp_path / "avatar.png")
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(save_upload(make_upload(data, content_type), destination, max_bytes=len(PNG) // 2, chunk_size=4096))
+    assert exc.value.status_code == status_code
+    assert os.listdir(tmp_path) == []
+
+def test_storage_path_stays_under_root(tmp_path, monkeypatch):
+    """Test relative paths cannot escape the storage root"""
+    monkeypatch.setattr(settings, "LOCAL_STORAGE_PATH", str(tmp_path))
+    assert storage_path("uploads/a.png") == os.path.join(os.path.realpath(tmp_path), "uploads", "a.png")
+    with pytest.raises(HTTPException) as exc:
+        storage_path("../secrets.txt")
+    assert exc.value.status_code == 400
+
+def interleave_delete(collection, when, interleave):
+    """Run `interleave` inside the collection's next delete_one, before or after it applies"""
+    delete_one = collection.delete_one
+    
+    async def interleaved(query):
+        collection.delete_one = delete_one
+        if when == "before":
+            await interleave()
+        result = await delete_one(query)
+        if when == "after":
+            await interleave()
+        return result
+    
+    collection.delete_one = interleaved
+
+def test_save_blob_stores_identical_content_once(tmp_path, monkeypatch, fake_db):
+    """Test re-uploaded bytes share one blob under their digest"""
+    monkeypatch.setattr(settings, "LOCAL_STORAGE_PATH", str(tmp_path))
+    first = asyncio.run(save_blob(fake_db, make_upload(PNG)))
+    second = asyncio.run(save_blob(fake_db, make_upload(PNG)))
+    digest = hashlib.sha256(PNG).hexdigest()
+    assert (first["created"], second["created"]) == (True, False)
+    assert first["sha256"] == second["sha256"] == digest
+    assert [(blob["_id"], blob["refcount"]) for blob in fake_db.file_blobs.documents] == [(digest, 2)]
+    assert open(storage_path(blob_path(digest)), "rb").read() == PNG
+    assert blob_path(digest) == os.path.join("blobs", digest[:2], digest[2:4], digest)
+    assert os.listdir(tmp_path / "blobs" / "tmp") == []
+
+@pytest.mark.parametrize("when", ["before", "after"])
+def test_release_racing_identical_upload_keeps_blob(tmp_path, monkeypatch, when, fake_db):
+    """Test an upload of the same bytes while the last reference is released still has its file"""
+    monkeypatch.setattr(settings, "LOCAL_STORAGE_PATH", str(tmp_path))
+    digest = hashlib.sha256(PNG).hexdigest()
+    
+    async def run():
+        await save_blob(fake_db, make_upload(PNG))
+        interleave_delete(fake_db.file_blobs, when, lambda: save_blob(fake_db, make_upload(PNG)))
+        await release_blob(fake_db, digest)
+    
+    asyncio.run(run())
+    assert [(blob["_id"], blob["refcount"]) for blob in fake_db.file_blobs.documents] == [(digest, 1)]
+    assert open(storage_path(blob_path(digest)), "rb").read() == PNG
+    assert os.listdir(tmp_path / "blobs" / "tmp") == []
+
+def test_release_last_reference_deletes_blob(tmp_path, monkeypatch, fake_db):
+    monkeypatch.setattr(settings, "LOCAL_STORAGE_PATH", str(tmp_path))
+    digest = hashlib.sha256(PNG).hexdigest()
+    asyncio.run(save_blob(fake_db, make_upload(PNG)))
+    asyncio.run(release_blob(fake_db, digest))
+    assert fake_db.file_blobs.documents == []
+    assert not os.path.exists(storage_path(blob_path(digest)))
+
+def test_plain_paths_cannot_target_blobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_STORAGE_PATH", str(tmp_path))
+    check_not_blob_path("uploads/blobs/a.png")
+    for path in ("blobs", "blobs/ab/cd/abcd", "uploads/../blobs/x"):
+        with pytest.raises(HTTPException) as exc:
+            check_not_blob_path(path)
+        assert exc.value.status_code == 400
+
+def test_failed_file_ref_releases_blob(tmp_path, monkeypatch, fake_db):
+    """Test a blob reference is given back when the path cannot be pointed at it"""
+    monkeypatch.setattr(settings, "LOCAL_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "LOCAL_STORAGE_DEDUP", True)
+    
+    async def find_one_and_replace(query, replacement, upsert=False):
+        raise RuntimeError("write failed")
+    
+    fake_db.file_refs.find_one_and_replace = find_one_and_replace
+    digest = hashlib.sha256(PNG).hexdigest()
+    with pytest.raises(RuntimeError):
+        asyncio.run(_store_local(make_upload(PNG), "uploads/a.png", "user", fake_db))
+    assert fake_db.file_blobs.documents == []
+    assert not os.path.exists(storage_path(blob_path(digest)))
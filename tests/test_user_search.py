@@ -0,0 +1,47 @@
+from src.core.user_search import exact_username_filter, merge_exact, rank_users, search_filter, search_words
+from src.models.user import build_search_tokens
+
+def test_search_tokens_are_folded_edge_ngrams():
+    """Test tokens are lowercased, accent-free prefixes of every word"""
+    tokens = build_search_tokens("Jane_Doe", "Zoë Müller")
+    for token in ["j", "jane", "d", "doe", "zoe", "mul", "muller"]:
+        assert token in tokens
+    assert "ane" not in tokens
+    assert "jane_doe" not in tokens
+
+def test_every_query_word_must_match_a_token():
+    """Test a multi-word query requires all words, most selective first"""
+    words = search_words("Jo  Müll")
+    assert words == ["mull", "jo"]
+    query = search_filter(words, "seller")
+    assert query == {"search_tokens": {"$all": ["mull", "jo"]}, "is_active": True, "role": "seller"}
+    assert all(word in build_search_tokens("jo", "Johanna Müller") for word in words)
+
+def test_rank_prefers_username_matches():
+    """Test exact username, username prefix, then full name prefix ordering"""
+    users = [
+        {"username": "annabel", "full_name": "Anna Bell"},
+        {"username": "zed", "full_name": "Anna Smith"},
+        {"username": "anna_k", "full_name": "Karen Anna"},
+        {"username": "anna", "full_name": "Someone Else"},
+        {"username": "bob", "full_name": "Bob Anna"},
+    ]
+    ranked = [user["username"] for user in rank_users(users, "Anna")]
+    assert ranked == ["anna", "anna_k", "annabel", "zed", "bob"]
+
+def test_exact_username_outside_candidates_is_merged():
+    """Test the exact match is ranked first even when the capped candidates missed it"""
+    candidates = [{"_id": i, "username": f"anna{i}", "full_name": "Anna"} for i in range(3)]
+    exact = {"_id": 99, "username": "Anna", "full_name": "Someone"}
+    assert exact_username_filter(" Anna ", "seller") == {"login_keys": "anna", "is_active": True, "role": "seller"}
+    
+    ranked = rank_users(merge_exact(candidates, exact, "anna"), "anna")
+    
+    assert ranked[0]["_id"] == 99
+    assert len(ranked) == 4
+    assert merge_exact(candidates, candidates[0], "anna0") == candidates
+
+def test_email_login_key_is_not_an_exact_match():
+    """Test a query equal to someone's email does not surface them through login_keys"""
+    by_email = {"_id": 1, "username": "jdoe", "full_name": "Jane Doe"}
+    assert merge_exact([], by_email, "jane@example.com") == []
@@ -1,8 +1,11 @@
-
+import asyncio
+import json
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from bson import ObjectId
 from src.main import app
+from src.api.endpoints import users as users_endpoints
 
 client = TestClient(app)
 
@@ -16,6 +19,13 @@ def test_read_current_user(test_user):
     assert data["username"] == test_user["username"]
     assert data["email"] == test_user["email"]
     
+def test_read_current_user_fields(test_user):
+    """Test selecting a sparse fieldset of the current user"""
+    headers = {"Authorization": f"Bearer {test_user['access_token']}"}
+    response = client.get("/api/v1/users/me", headers=headers, params={"fields": "id,username,profile_picture_url"})
+    assert response.status_code == 200
+    assert response.json() == {"username": test_user["username"], "id": test_user["id"], "profile_picture_url": None}
+
 def test_update_current_user(test_user):
     """Test updating current user profile"""
     headers = {"Authorization": f"Bearer {test_user['access_token']}"}
@@ -38,6 +48,43 @@ def test_read_user_profile(test_user):
     # Email should not be included in public profile
     assert "email" not in data
 
+def test_read_user_profile_fields_by_role(test_user, test_admin):
+    """Test non-public profile fields are only selectable by admins"""
+    response = client.get(f"/api/v1/users/profile/{test_user['id']}", params={"fields": "id,email"})
+    assert response.status_code == 400
+    
+    headers = {"Authorization": f"Bearer {test_admin['access_token']}"}
+    response = client.get(f"/api/v1/users/profile/{test_user['id']}", headers=headers, params={"fields": "id,email"})
+    assert response.status_code == 200
+    assert response.json() == {"email": test_user["email"], "id": test_user["id"]}
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+def test_read_user_profile_not_modified(test_user):
+    """Test a matching If-None-Match gets a 304 for a public profile"""
+    response = client.get(f"/api/v1/users/profile/{test_user['id']}")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    
+    response = client.get(
+        f"/api/v1/users/profile/{test_user['id']}",
+        headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+
+def test_search_users(test_user):
+    """Test typeahead search by username and full name prefix"""
+    headers = {"Authorization": f"Bearer {test_user['access_token']}"}
+    response = client.get("/api/v1/users/search", headers=headers, params={"q": "Test Us"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data[0]["id"] == test_user["id"]
+    assert "email" not in data[0]
+    
+    response = client.get("/api/v1/users/search", headers=headers, params={"q": "test", "role": "seller"})
+    assert response.status_code == 200
+    assert test_user["id"] not in {user["id"] for user in response.json()}
+
 def test_admin_get_users(test_admin):
     """Test admin getting all users"""
     headers = {"Authorization": f"Bearer {test_admin['access_token']}"}
@@ -45,6 +92,8 @@ def test_admin_get_users(test_admin):
     assert response.status_code == 200
     data = response.json()
     assert isinstance(data, list)
+    assert int(response.headers["X-Total-Count"]) >= len(data)
+    assert all("hashed_password" not in user for user in data)
     
 def test_non_admin_get_users(test_user):
     """Test non-admin trying to get all users"""
@@ -65,6 +114,87 @@ def test_admin_update_user(test_admin, test_user):
     assert data["role"] == "seller"
     assert data["is_active"] == True
     
+def test_admin_bulk_update_users(test_admin, test_user):
+    """Test admin updating users in bulk"""
+    headers = {"Authorization": f"Bearer {test_admin['access_token']}"}
+    response = client.post(
+        "/api/v1/users/bulk-update",
+        headers=headers,
+        json={"user_ids": [test_user["id"]], "update": {"is_verified": False}}
+    )
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0] == {"batch": 0, "matched": 1, "modified": 1}
+    assert lines[-1] == {"batches": 1, "matched": 1, "modified": 1}
+    
+def test_admin_bulk_update_audits_only_written_users(test_admin, test_user):
+    """Test ids that match no user get neither an update nor an audit entry"""
+    headers = {"Authorization": f"Bearer {test_admin['access_token']}"}
+    missing_id = str(ObjectId())
+    response = client.post(
+        "/api/v1/users/bulk-update",
+        headers=headers,
+        json={"items": [
+            {"user_id": test_user["id"], "update": {"is_verified": False}},
+            {"user_id": missing_id, "update": {"is_verified": False}},
+        ]}
+    )
+    assert response.status_code == 200
+    assert json.loads(response.text.splitlines()[-1]) == {"batches": 1, "matched": 1, "modified": 1}
+    
+    for user_id, count in ((test_user["id"], 1), (missing_id, 0)):
+        response = client.get("/api/v1/users/audit-logs", headers=headers, params={"user_id": user_id, "action": "user_update"})
+        assert response.status_code == 200
+        assert len(response.json()) == count
+    
+def test_admin_bulk_update_requires_selection(test_admin):
+    """Test an empty filter or id list is rejected rather than selecting everyone"""
+    headers = {"Authorization": f"Bearer {test_admin['access_token']}"}
+    for body in ({"filter": {}, "update": {"is_active": False}}, {"user_ids": [], "update": {"is_active": False}}):
+        response = client.post("/api/v1/users/bulk-update", headers=headers, json=body)
+        assert response.status_code == 422
+    
+def test_admin_bulk_update_filter_skips_caller(test_admin):
+    """Test a filter-based update never deactivates the admin making it"""
+    headers = {"Authorization": f"Bearer {test_admin['access_token']}"}
+    response = client.post(
+        "/api/v1/users/bulk-update",
+        headers=headers,
+        json={"filter": {"role": "admin"}, "update": {"is_active": False}}
+    )
+    assert response.status_code == 200
+    assert json.loads(response.text.splitlines()[-1])["matched"] == 0
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+    
+def test_admin_export_users(test_admin, test_user):
+    """Test admin exporting users as gzip-encoded NDJSON"""
+    headers = {"Authorization": f"Bearer {test_admin['access_token']}"}
+    response = client.get("/api/v1/users/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    users = [json.loads(line) for line in response.text.splitlines()]
+    assert test_user["id"] in {user["id"] for user in users}
+    assert all("hashed_password" not in user for user in users)
+    
+def test_admin_import_users(test_admin, test_user):
+    """Test admin importing users reports bad rows without aborting"""
+    headers = {"Authorization": f"Bearer {test_admin['access_token']}"}
+    rows = [
+        {"username": "importeduser", "email": "imported@example.com", "full_name": "Imported User", "password": "password123"},
+        {"username": "shortpass", "email": "short@example.com", "full_name": "Short Pass", "password": "short"},
+        {"username": test_user["username"], "email": test_user["email"], "full_name": "Duplicate", "password": "password123"},
+    ]
+    response = client.post(
+        "/api/v1/users/import",
+        headers=headers,
+        content="\n".join(json.dumps(row) for row in rows)
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inserted"] == 1
+    assert data["failed"] == 2
+    assert [error["line"] for error in data["errors"]] == [2, 3]
+    
 def test_non_admin_update_user(test_user, test_db):
     """Test non-admin trying to update another user"""
     # Create another user for testing
@@ -87,3 +217,20 @@ def test_non_admin_update_user(test_user, test_db):
         json={"role": "admin"}
     )
     assert response.status_code == 403
+
+def test_import_chunk_reports_busy_hash_pool(monkeypatch, fake_db):
+    """Test a saturated hashing pool fails its rows instead of aborting the import"""
+    async def get_password_hash_async(password):
+        if password == "busy-password":
+            raise HTTPException(status_code=503, detail="Server is busy, please try again shortly")
+        return f"hashed:{password}"
+    
+    monkeypatch.setattr(users_endpoints, "get_password_hash_async", get_password_hash_async)
+    rows = [
+        (1, json.dumps({"username": "first", "email": "first@example.com", "full_name": "First", "password": "password123"}).encode()),
+        (2, json.dumps({"username": "second", "email": "second@example.com", "full_name": "Second", "password": "busy-password"}).encode()),
+    ]
+    report = {"inserted": 0, "failed": 0, "errors": []}
+    asyncio.run(users_endpoints._import_chunk(fake_db, rows, report))
+    assert report == {"inserted": 1, "failed": 1, "errors": [{"line": 2, "error": "Server is busy, please try again shortly"}]}
+    assert [document["username"] for document in fake_db.users.documents] == ["first"]